@@ -0,0 +1,85 @@
+# AI dev note: Endpoint /metrics para o Prometheus
+# Métricas do pool, caches e circuitos são lidas do serviço só no momento da coleta
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.dossie_refresher import dossie_refresher
+from app.services.embedding_worker import embedding_worker
+from app.services.supabase_service import supabase_service
+from app.utils.metrics import REGISTRY
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool_samples():
+    stats = supabase_service.get_pool_stats()
+    for key in ("connections", "idle_connections", "active_connections", "queued_requests"):
+        yield {"state": key}, stats[key]
+    yield {"state": "max_connections"}, stats["max_connections"]
+
+
+def _cache_samples(field: str):
+    def collect():
+        for name, stats in supabase_service.get_cache_stats().items():
+            yield {"cache": name}, stats[field]
+    return collect
+
+
+def _singleflight_samples():
+    stats = supabase_service.get_singleflight_stats()
+    for key in ("leaders", "coalesced"):
+        if key in stats:
+            yield {"result": key}, stats[key]
+
+
+def _circuit_samples():
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    for table, stats in supabase_service.get_resilience_stats()["circuits"].items():
+        yield {"table": table}, states.get(stats["state"], 0)
+
+
+REGISTRY.callback(
+    "guido_supabase_in_flight_requests",
+    "Chamadas ao PostgREST em andamento",
+    lambda: [({}, supabase_service.get_pool_stats()["in_flight_requests"])],
+)
+REGISTRY.callback("guido_supabase_pool_connections", "Conexões do pool httpx por estado", _pool_samples)
+REGISTRY.callback("guido_cache_hits_total", "Acertos dos caches em memória", _cache_samples("hits"), "counter")
+REGISTRY.callback("guido_cache_misses_total", "Faltas dos caches em memória", _cache_samples("misses"), "counter")
+REGISTRY.callback(
+    "guido_supabase_singleflight_total",
+    "GETs executados (leaders) e coalescidos em chamadas idênticas",
+    _singleflight_samples,
+    "counter",
+)
+REGISTRY.callback(
+    "guido_supabase_retries_total",
+    "Retentativas de chamadas ao PostgREST",
+    lambda: [({}, supabase_service.get_resilience_stats()["retries_total"])],
+    "counter",
+)
+REGISTRY.callback(
+    "guido_supabase_circuit_state",
+    "Estado do circuit breaker por tabela (0 fechado, 1 meio-aberto, 2 aberto)",
+    _circuit_samples,
+)
+
+REGISTRY.callback(
+    "guido_embedding_queue_depth",
+    "Mensagens na fila do worker de embeddings",
+    lambda: [({}, embedding_worker.queue_depth())],
+)
+
+REGISTRY.callback(
+    "guido_dossie_refresh_pending",
+    "Clientes com atualização de dossiê agendada (debounce)",
+    lambda: [({}, dossie_refresher.pending())],
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """AI dev note: Exposição no formato texto do Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,64 @@
+# AI dev note: Classe de rota que separa validação, endpoint e serialização em spans
+# Usada pelos routers via APIRouter(route_class=TracedRoute)
+
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+from app.utils.tracing import current_trace, span
+
+
+def _traced_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """AI dev note: Envolver o endpoint mantendo assinatura (FastAPI segue __wrapped__)"""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            with span("endpoint") as current:
+                if current is not None:
+                    current_trace().marks["endpoint_start"] = current.start
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    if current is not None:
+                        current_trace().marks["endpoint_end"] = time.perf_counter()
+        return wrapper
+    
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        with span("endpoint") as current:
+            if current is not None:
+                current_trace().marks["endpoint_start"] = current.start
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                if current is not None:
+                    current_trace().marks["endpoint_end"] = time.perf_counter()
+    return sync_wrapper
+
+
+class TracedRoute(APIRoute):
+    """AI dev note: APIRoute com spans validate (antes do endpoint) e encode (depois)"""
+    
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        
+        async def traced_handler(request):
+            trace = current_trace()
+            if trace is None:
+                return await handler(request)
+            started = time.perf_counter()
+            response = await handler(request)
+            finished = time.perf_counter()
+            endpoint_start = trace.marks.pop("endpoint_start", None)
+            endpoint_end = trace.marks.pop("endpoint_end", None)
+            if endpoint_start is not None and endpoint_end is not None:
+                trace.record("validate", started, endpoint_start)
+                trace.record("encode", endpoint_end, finished)
+            return response
+        
+        return traced_handler
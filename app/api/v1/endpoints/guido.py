@@ -1,20 +1,99 @@
 # AI dev note: Endpoints específicos para o sistema Guido
 # Endpoints para gerenciar contas, corretores, clientes, etc.
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from app.services.supabase_service import supabase_service
+import asyncio
+
+import httpx
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from app.api.traced_route import TracedRoute
+from app.config import settings
+from app.middleware.compression import no_compression
+from app.services.dossie_refresher import dossie_refresher
+from app.services.embedding_worker import embedding_worker
+from app.services.supabase_loader import SupabaseLoader, get_supabase_loader
+from app.services.supabase_service import supabase_service, MENSAGEM_COLUMNS_SEM_EMBEDDING, RETRYABLE_STATUS
+from app.utils.deadline import DeadlineExceeded
+from app.utils.embedding_codec import EmbeddingFormat, encode_embedding_rows, negotiate_embedding_dtype
+from app.utils.etag import FRESHNESS_COLUMNS, compute_etag, etag_matches
+from app.utils.pagination import InvalidCursorError
+from app.utils.resilience import CircuitOpenError
+from app.utils.responses import model_response
+from app.utils.streaming import StreamFormat, stream_pages
+from app.schemas.pagination import CountMode, PaginatedResponse
 from app.schemas.guido import (
     ContaCreate, ContaResponse, ContaUpdate,
     CorretorCreate, CorretorResponse, CorretorUpdate,
-    ClienteCreate, ClienteResponse, ClienteUpdate,
-    ConversaCreate, ConversaResponse, ConversaUpdate,
-    MensagemCreate, MensagemResponse, MensagemUpdate,
+    ClienteCreate, ClienteResponse, ClienteUpdate, ClienteOverviewResponse,
+    ConversaCreate, ConversaResponse, ConversaUpdate, ConversaInboxResponse,
+    MensagemCreate, MensagemResponse, MensagemResumoResponse, MensagemUpdate,
+    MensagemBinariaResponse, MensagemEmbeddingUpdate,
+    MensagemBatchResponse, MensagemSearchRequest, MensagemSearchResult,
     LembreteCreate, LembreteResponse, LembreteUpdate,
     DossieIACreate, DossieIAResponse, DossieIAUpdate
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
+
+# AI dev note: Parâmetro limit comum às listagens paginadas
+LimitQuery = Query(settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit)
+
+
+def _http_error(e: Exception) -> HTTPException:
+    """AI dev note: Converter exceções em HTTPException preservando erros já tratados"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, InvalidCursorError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))}
+        )
+    if isinstance(e, httpx.TransportError) or (
+        isinstance(e, httpx.HTTPStatusError) and e.response.status_code in RETRYABLE_STATUS
+    ):
+        return HTTPException(status_code=503, detail="Banco de dados temporariamente indisponível")
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def _mensagem_response(request: Request, embedding_format: Optional[str], data: Any, wrapper: Any = None) -> Response:
+    """AI dev note: Mensagem(ns) com o embedding no formato negociado
+    
+    ?embedding_format=float32|float16|json ou Accept: application/json; embedding=float32.
+    Na forma binária o embedding vira {dtype, dim, data} em base64 little-endian.
+    """
+    dtype = negotiate_embedding_dtype(request.headers.get("accept"), embedding_format)
+    schema = MensagemBinariaResponse if dtype else MensagemResponse
+    response = model_response(wrapper[schema] if wrapper else schema, encode_embedding_rows(data, dtype))
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+async def _conditional_get(
+    request: Request,
+    fetch: Callable[[Optional[str]], Awaitable[Optional[Dict[str, Any]]]],
+    schema: Any,
+    not_found: str,
+) -> Response:
+    """AI dev note: GET com ETag; com If-None-Match checa só id,updated_at antes da linha completa"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        fresh = await fetch(FRESHNESS_COLUMNS)
+        if not fresh:
+            raise HTTPException(status_code=404, detail=not_found)
+        etag = compute_etag(fresh)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    result = await fetch(None)
+    if not result:
+        raise HTTPException(status_code=404, detail=not_found)
+    response = model_response(schema, result)
+    response.headers["ETag"] = compute_etag(result)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 # Endpoints para Contas
@@ -25,32 +104,53 @@ async def criar_conta(conta: ContaCreate):
         data = conta.dict()
         result = await supabase_service.create_conta(data)
         if result:
-            return ContaResponse(**result)
+            return model_response(ContaResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar conta")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
-@router.get("/contas", response_model=List[ContaResponse])
-async def listar_todas_contas():
-    """AI dev note: Listar todas as contas"""
+@router.get("/contas", response_model=PaginatedResponse[ContaResponse])
+async def listar_todas_contas(
+    cursor: Optional[str] = None,
+    limit: int = LimitQuery,
+    count: Optional[CountMode] = None,
+):
+    """AI dev note: Listar contas com paginação por cursor"""
     try:
-        results = await supabase_service.get_all_contas()
-        return [ContaResponse(**result) for result in results]
+        page = await supabase_service.get_contas_page(limit, cursor, count)
+        return model_response(PaginatedResponse[ContaResponse], page)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
+
+@router.get("/contas/export")
+@no_compression
+async def exportar_contas(formato: StreamFormat = Query("ndjson", alias="format")):
+    """AI dev note: Exportar todas as contas em streaming (NDJSON ou array JSON)
+    
+    Sem compressão: consumidores de NDJSON processam linha a linha e proxies
+    costumam segurar blocos comprimidos, atrasando a entrega de cada página.
+    """
+    try:
+        pages = supabase_service.iter_contas(settings.stream_page_size)
+        return await stream_pages(pages, ContaResponse, formato)
+    except Exception as e:
+        raise _http_error(e)
 
 
 @router.get("/contas/{conta_id}", response_model=ContaResponse)
-async def obter_conta(conta_id: str):
-    """AI dev note: Obter conta por ID"""
+async def obter_conta(conta_id: str, request: Request):
+    """AI dev note: Obter conta por ID (ETag / If-None-Match)"""
     try:
-        result = await supabase_service.get_conta_by_id(conta_id)
-        if result:
-            return ContaResponse(**result)
-        raise HTTPException(status_code=404, detail="Conta não encontrada")
+        return await _conditional_get(
+            request,
+            lambda select: supabase_service.get_conta_by_id(conta_id, select),
+            ContaResponse,
+            "Conta não encontrada",
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.put("/contas/{conta_id}", response_model=ContaResponse)
@@ -63,10 +163,10 @@ async def atualizar_conta(conta_id: str, conta: ContaUpdate):
         
         result = await supabase_service.update_conta(conta_id, data)
         if result:
-            return ContaResponse(**result)
+            return model_response(ContaResponse, result)
         raise HTTPException(status_code=404, detail="Conta não encontrada")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.delete("/contas/{conta_id}")
@@ -78,7 +178,7 @@ async def deletar_conta(conta_id: str):
             return {"message": "Conta deletada com sucesso"}
         raise HTTPException(status_code=404, detail="Conta não encontrada")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Corretores
@@ -89,10 +189,10 @@ async def criar_corretor(corretor: CorretorCreate):
         data = corretor.dict()
         result = await supabase_service.create_corretor(data)
         if result:
-            return CorretorResponse(**result)
+            return model_response(CorretorResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar corretor")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.get("/corretores/conta/{conta_id}", response_model=List[CorretorResponse])
@@ -100,9 +200,9 @@ async def obter_corretores_conta(conta_id: str):
     """AI dev note: Obter corretores de uma conta"""
     try:
         results = await supabase_service.get_corretores_by_conta(conta_id)
-        return [CorretorResponse(**result) for result in results]
+        return model_response(List[CorretorResponse], results)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.put("/corretores/{corretor_id}", response_model=CorretorResponse)
@@ -115,10 +215,10 @@ async def atualizar_corretor(corretor_id: str, corretor: CorretorUpdate):
         
         result = await supabase_service.update_corretor(corretor_id, data)
         if result:
-            return CorretorResponse(**result)
+            return model_response(CorretorResponse, result)
         raise HTTPException(status_code=404, detail="Corretor não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.delete("/corretores/{corretor_id}")
@@ -130,7 +230,7 @@ async def deletar_corretor(corretor_id: str):
             return {"message": "Corretor deletado com sucesso"}
         raise HTTPException(status_code=404, detail="Corretor não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Clientes
@@ -141,32 +241,71 @@ async def criar_cliente(cliente: ClienteCreate):
         data = cliente.dict()
         result = await supabase_service.create_cliente(data)
         if result:
-            return ClienteResponse(**result)
+            return model_response(ClienteResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar cliente")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
-@router.get("/clientes/conta/{conta_id}", response_model=List[ClienteResponse])
-async def obter_clientes_conta(conta_id: str):
-    """AI dev note: Obter clientes de uma conta"""
+@router.get("/clientes/conta/{conta_id}", response_model=PaginatedResponse[ClienteResponse])
+async def obter_clientes_conta(
+    conta_id: str,
+    cursor: Optional[str] = None,
+    limit: int = LimitQuery,
+    count: Optional[CountMode] = None,
+):
+    """AI dev note: Obter clientes de uma conta com paginação por cursor"""
     try:
-        results = await supabase_service.get_clientes_by_conta(conta_id)
-        return [ClienteResponse(**result) for result in results]
+        page = await supabase_service.get_clientes_by_conta_page(conta_id, limit, cursor, count)
+        return model_response(PaginatedResponse[ClienteResponse], page)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
+
+@router.get("/clientes/conta/{conta_id}/export")
+@no_compression
+async def exportar_clientes_conta(conta_id: str, formato: StreamFormat = Query("ndjson", alias="format")):
+    """AI dev note: Exportar todos os clientes de uma conta em streaming"""
+    try:
+        pages = supabase_service.iter_clientes_by_conta(conta_id, settings.stream_page_size)
+        return await stream_pages(pages, ClienteResponse, formato)
+    except Exception as e:
+        raise _http_error(e)
 
 
 @router.get("/clientes/{cliente_id}", response_model=ClienteResponse)
-async def obter_cliente(cliente_id: str):
-    """AI dev note: Obter cliente por ID"""
+async def obter_cliente(cliente_id: str, request: Request):
+    """AI dev note: Obter cliente por ID (ETag / If-None-Match)"""
     try:
-        result = await supabase_service.get_cliente_by_id(cliente_id)
-        if result:
-            return ClienteResponse(**result)
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return await _conditional_get(
+            request,
+            lambda select: supabase_service.get_cliente_by_id(cliente_id, select),
+            ClienteResponse,
+            "Cliente não encontrado",
+        )
+    except Exception as e:
+        raise _http_error(e)
+
+
+@router.get("/clientes/{cliente_id}/overview", response_model=ClienteOverviewResponse)
+async def obter_overview_cliente(
+    cliente_id: str,
+    mensagens: int = Query(settings.overview_mensagens_default, ge=0, le=settings.overview_mensagens_max),
+):
+    """AI dev note: Cliente, conversas, últimas mensagens, dossiê e lembretes em uma chamada
+    
+    Substitui as cinco requisições sequenciais da tela do cliente; as
+    consultas ao Supabase rodam em paralelo.
+    """
+    try:
+        result = await supabase_service.get_cliente_overview(
+            cliente_id, mensagens, settings.overview_lembretes_limit, settings.overview_conversas_limit
+        )
+        if not result:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return model_response(ClienteOverviewResponse, result)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.put("/clientes/{cliente_id}", response_model=ClienteResponse)
@@ -179,10 +318,10 @@ async def atualizar_cliente(cliente_id: str, cliente: ClienteUpdate):
         
         result = await supabase_service.update_cliente(cliente_id, data)
         if result:
-            return ClienteResponse(**result)
+            return model_response(ClienteResponse, result)
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.delete("/clientes/{cliente_id}")
@@ -194,7 +333,7 @@ async def deletar_cliente(cliente_id: str):
             return {"message": "Cliente deletado com sucesso"}
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Conversas
@@ -205,10 +344,10 @@ async def criar_conversa(conversa: ConversaCreate):
         data = conversa.dict()
         result = await supabase_service.create_conversa(data)
         if result:
-            return ConversaResponse(**result)
+            return model_response(ConversaResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar conversa")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.get("/conversas/cliente/{cliente_id}", response_model=List[ConversaResponse])
@@ -216,9 +355,31 @@ async def obter_conversas_cliente(cliente_id: str):
     """AI dev note: Obter conversas de um cliente"""
     try:
         results = await supabase_service.get_conversas_by_cliente(cliente_id)
-        return [ConversaResponse(**result) for result in results]
+        return model_response(List[ConversaResponse], results)
+    except Exception as e:
+        raise _http_error(e)
+
+
+@router.get("/conversas/inbox", response_model=PaginatedResponse[ConversaInboxResponse])
+async def obter_inbox(
+    corretor_id: Optional[str] = None,
+    conta_id: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = LimitQuery,
+):
+    """AI dev note: Caixa de entrada do corretor (ou da conta) em uma consulta por página
+    
+    AGUARDANDO_CORRETOR primeiro, depois por última mensagem; cada conversa
+    traz o nome do cliente e a última mensagem. status filtra (repetível).
+    """
+    try:
+        if bool(corretor_id) == bool(conta_id):
+            raise HTTPException(status_code=400, detail="Informe corretor_id ou conta_id")
+        page = await supabase_service.get_inbox_page(limit, corretor_id, conta_id, status, cursor)
+        return model_response(PaginatedResponse[ConversaInboxResponse], page)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.put("/conversas/{conversa_id}", response_model=ConversaResponse)
@@ -231,10 +392,10 @@ async def atualizar_conversa(conversa_id: str, conversa: ConversaUpdate):
         
         result = await supabase_service.update_conversa(conversa_id, data)
         if result:
-            return ConversaResponse(**result)
+            return model_response(ConversaResponse, result)
         raise HTTPException(status_code=404, detail="Conversa não encontrada")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.delete("/conversas/{conversa_id}")
@@ -246,7 +407,7 @@ async def deletar_conversa(conversa_id: str):
             return {"message": "Conversa deletada com sucesso"}
         raise HTTPException(status_code=404, detail="Conversa não encontrada")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Mensagens
@@ -257,24 +418,121 @@ async def criar_mensagem(mensagem: MensagemCreate):
         data = mensagem.dict()
         result = await supabase_service.create_mensagem(data)
         if result:
-            return MensagemResponse(**result)
+            embedding_worker.submit([result])
+            dossie_refresher.notify_mensagens([result])
+            return model_response(MensagemResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar mensagem")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
+
+@router.post("/mensagens/batch", response_model=MensagemBatchResponse)
+async def criar_mensagens_lote(mensagens: List[MensagemCreate]):
+    """AI dev note: Criar mensagens em lote (ex.: replay do WhatsApp após reconexão)"""
+    try:
+        if not mensagens:
+            raise HTTPException(status_code=400, detail="Nenhuma mensagem para inserir")
+        if len(mensagens) > settings.mensagens_batch_max_items:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Máximo de {settings.mensagens_batch_max_items} mensagens por lote"
+            )
+        
+        data = [mensagem.dict() for mensagem in mensagens]
+        result = await supabase_service.create_mensagens_batch(data, settings.mensagens_batch_chunk_size)
+        inseridas = sum(1 for item in result["resultados"] if item["sucesso"])
+        criadas = [item["mensagem"] for item in result["resultados"] if item["sucesso"]]
+        embedding_worker.submit(criadas)
+        dossie_refresher.notify_mensagens(criadas)
+        return model_response(MensagemBatchResponse, {
+            "total": len(mensagens),
+            "inseridas": inseridas,
+            "falhas": len(mensagens) - inseridas,
+            "conversas_atualizadas": result["conversas_atualizadas"],
+            "resultados": result["resultados"],
+        })
+    except Exception as e:
+        raise _http_error(e)
 
 
-@router.get("/mensagens/conversa/{conversa_id}", response_model=List[MensagemResponse])
-async def obter_mensagens_conversa(conversa_id: str):
-    """AI dev note: Obter mensagens de uma conversa"""
+async def _com_cliente(loader: SupabaseLoader, mensagem: Dict[str, Any]) -> Dict[str, Any]:
+    """AI dev note: Mensagem com o cliente da sua conversa (buscas agrupadas pelo loader)"""
+    conversa = await loader.load_conversa(mensagem["conversa_id"])
+    cliente = await loader.load_cliente(conversa["cliente_id"]) if conversa else None
+    return {**mensagem, "cliente": cliente}
+
+
+@router.post("/mensagens/search", response_model=List[MensagemSearchResult])
+async def buscar_mensagens(busca: MensagemSearchRequest, loader: SupabaseLoader = Depends(get_supabase_loader)):
+    """AI dev note: Top-k mensagens mais similares a um vetor, no escopo de um cliente ou conta
+    
+    Usa a RPC do pgvector quando o banco a expõe; senão, o índice vetorial
+    local (carregado na primeira busca e atualizado a cada novo embedding).
+    O cliente de cada resultado vem do loader: uma consulta de conversas e
+    uma de clientes para todos os resultados.
+    """
     try:
-        results = await supabase_service.get_mensagens_by_conversa(conversa_id)
-        return [MensagemResponse(**result) for result in results]
+        if bool(busca.cliente_id) == bool(busca.conta_id):
+            raise HTTPException(status_code=400, detail="Informe cliente_id ou conta_id")
+        if busca.k > settings.search_max_k:
+            raise HTTPException(status_code=400, detail=f"k máximo é {settings.search_max_k}")
+        try:
+            embedding = busca.embedding
+            results = await supabase_service.search_mensagens(
+                embedding if isinstance(embedding, list) else embedding.dict(),
+                busca.k,
+                str(busca.cliente_id) if busca.cliente_id else None,
+                str(busca.conta_id) if busca.conta_id else None,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        results = await asyncio.gather(*(_com_cliente(loader, mensagem) for mensagem in results))
+        return model_response(List[MensagemSearchResult], list(results))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
 
+@router.get(
+    "/mensagens/conversa/{conversa_id}",
+    response_model=Union[
+        PaginatedResponse[MensagemResumoResponse],
+        PaginatedResponse[MensagemResponse],
+        PaginatedResponse[MensagemBinariaResponse],
+    ],
+)
+async def obter_mensagens_conversa(
+    request: Request,
+    conversa_id: str,
+    cursor: Optional[str] = None,
+    limit: int = LimitQuery,
+    count: Optional[CountMode] = None,
+    include_embedding: bool = False,
+    embedding_format: Optional[EmbeddingFormat] = None,
+):
+    """AI dev note: Obter mensagens de uma conversa com paginação por cursor
+    
+    O embedding_vetorial só é buscado com include_embedding=true; em lista JSON
+    ou, negociado, em base64 (float32/float16), bem menor e rápido de decodificar.
+    """
+    try:
+        if not include_embedding:
+            page = await supabase_service.get_mensagens_by_conversa_page(
+                conversa_id, limit, cursor, count, MENSAGEM_COLUMNS_SEM_EMBEDDING
+            )
+            return model_response(PaginatedResponse[MensagemResumoResponse], page)
+        page = await supabase_service.get_mensagens_by_conversa_page(conversa_id, limit, cursor, count)
+        return _mensagem_response(request, embedding_format, page, PaginatedResponse)
+    except Exception as e:
+        raise _http_error(e)
 
-@router.put("/mensagens/{mensagem_id}", response_model=MensagemResponse)
-async def atualizar_mensagem(mensagem_id: str, mensagem: MensagemUpdate):
+
+@router.put("/mensagens/{mensagem_id}", response_model=Union[MensagemResponse, MensagemBinariaResponse])
+async def atualizar_mensagem(
+    request: Request,
+    mensagem_id: str,
+    mensagem: MensagemUpdate,
+    embedding_format: Optional[EmbeddingFormat] = None,
+):
     """AI dev note: Atualizar mensagem"""
     try:
         data = mensagem.dict(exclude_unset=True)
@@ -283,10 +541,33 @@ async def atualizar_mensagem(mensagem_id: str, mensagem: MensagemUpdate):
         
         result = await supabase_service.update_mensagem(mensagem_id, data)
         if result:
-            return MensagemResponse(**result)
+            return _mensagem_response(request, embedding_format, result)
         raise HTTPException(status_code=404, detail="Mensagem não encontrada")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
+
+@router.put("/mensagens/{mensagem_id}/embedding", response_model=Union[MensagemResponse, MensagemBinariaResponse])
+async def atualizar_embedding_mensagem(
+    request: Request,
+    mensagem_id: str,
+    body: MensagemEmbeddingUpdate,
+    embedding_format: Optional[EmbeddingFormat] = None,
+):
+    """AI dev note: Gravar o embedding de uma mensagem (lista de floats ou base64 float32/float16)"""
+    try:
+        embedding = body.embedding
+        try:
+            result = await supabase_service.update_mensagem_embedding(
+                mensagem_id, embedding if isinstance(embedding, list) else embedding.dict()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if result:
+            return _mensagem_response(request, embedding_format, result)
+        raise HTTPException(status_code=404, detail="Mensagem não encontrada")
+    except Exception as e:
+        raise _http_error(e)
 
 
 @router.delete("/mensagens/{mensagem_id}")
@@ -298,7 +579,7 @@ async def deletar_mensagem(mensagem_id: str):
             return {"message": "Mensagem deletada com sucesso"}
         raise HTTPException(status_code=404, detail="Mensagem não encontrada")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Lembretes
@@ -309,20 +590,25 @@ async def criar_lembrete(lembrete: LembreteCreate):
         data = lembrete.dict()
         result = await supabase_service.create_lembrete(data)
         if result:
-            return LembreteResponse(**result)
+            return model_response(LembreteResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar lembrete")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
-@router.get("/lembretes/corretor/{corretor_id}", response_model=List[LembreteResponse])
-async def obter_lembretes_corretor(corretor_id: str):
-    """AI dev note: Obter lembretes de um corretor"""
+@router.get("/lembretes/corretor/{corretor_id}", response_model=PaginatedResponse[LembreteResponse])
+async def obter_lembretes_corretor(
+    corretor_id: str,
+    cursor: Optional[str] = None,
+    limit: int = LimitQuery,
+    count: Optional[CountMode] = None,
+):
+    """AI dev note: Obter lembretes de um corretor com paginação por cursor"""
     try:
-        results = await supabase_service.get_lembretes_by_corretor(corretor_id)
-        return [LembreteResponse(**result) for result in results]
+        page = await supabase_service.get_lembretes_by_corretor_page(corretor_id, limit, cursor, count)
+        return model_response(PaginatedResponse[LembreteResponse], page)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.put("/lembretes/{lembrete_id}", response_model=LembreteResponse)
@@ -335,10 +621,10 @@ async def atualizar_lembrete(lembrete_id: str, lembrete: LembreteUpdate):
         
         result = await supabase_service.update_lembrete(lembrete_id, data)
         if result:
-            return LembreteResponse(**result)
+            return model_response(LembreteResponse, result)
         raise HTTPException(status_code=404, detail="Lembrete não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.delete("/lembretes/{lembrete_id}")
@@ -350,7 +636,7 @@ async def deletar_lembrete(lembrete_id: str):
             return {"message": "Lembrete deletado com sucesso"}
         raise HTTPException(status_code=404, detail="Lembrete não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Dossiês IA
@@ -361,22 +647,36 @@ async def criar_dossie_ia(dossie: DossieIACreate):
         data = dossie.dict()
         result = await supabase_service.create_or_update_dossie(data)
         if result:
-            return DossieIAResponse(**result)
+            return model_response(DossieIAResponse, result)
         raise HTTPException(status_code=400, detail="Erro ao criar dossiê")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.get("/dossies-ia/cliente/{cliente_id}", response_model=DossieIAResponse)
-async def obter_dossie_cliente(cliente_id: str):
-    """AI dev note: Obter dossiê de um cliente"""
+async def obter_dossie_cliente(cliente_id: str, request: Request):
+    """AI dev note: Obter dossiê de um cliente (ETag / If-None-Match)"""
+    try:
+        return await _conditional_get(
+            request,
+            lambda select: supabase_service.get_dossie_by_cliente(cliente_id, select),
+            DossieIAResponse,
+            "Dossiê não encontrado",
+        )
+    except Exception as e:
+        raise _http_error(e)
+
+
+@router.post("/dossies-ia/cliente/{cliente_id}/refresh", response_model=DossieIAResponse)
+async def atualizar_dossie_cliente(cliente_id: str):
+    """AI dev note: Atualizar agora o dossiê com as mensagens posteriores a ultima_atualizacao"""
     try:
-        result = await supabase_service.get_dossie_by_cliente(cliente_id)
+        result = await dossie_refresher.refresh(cliente_id)
         if result:
-            return DossieIAResponse(**result)
+            return model_response(DossieIAResponse, result)
         raise HTTPException(status_code=404, detail="Dossiê não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.put("/dossies-ia/{dossie_id}", response_model=DossieIAResponse)
@@ -389,10 +689,10 @@ async def atualizar_dossie_ia(dossie_id: str, dossie: DossieIAUpdate):
         
         result = await supabase_service.update_dossie(dossie_id, data)
         if result:
-            return DossieIAResponse(**result)
+            return model_response(DossieIAResponse, result)
         raise HTTPException(status_code=404, detail="Dossiê não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.delete("/dossies-ia/{dossie_id}")
@@ -404,7 +704,7 @@ async def deletar_dossie_ia(dossie_id: str):
             return {"message": "Dossiê deletado com sucesso"}
         raise HTTPException(status_code=404, detail="Dossiê não encontrado")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 # Endpoints para Planos
@@ -415,4 +715,14 @@ async def obter_planos_ativos():
         results = await supabase_service.get_planos_ativos()
         return results
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise _http_error(e)
+
+
+@router.post("/planos/refresh")
+async def atualizar_cache_planos():
+    """AI dev note: Recarregar o cache de planos após mudanças feitas fora da API"""
+    try:
+        total = await supabase_service.refresh_planos_cache()
+        return {"message": "Cache de planos atualizado", "planos": total}
+    except Exception as e:
+        raise _http_error(e)
@@ -3,6 +3,7 @@
 
 from fastapi import APIRouter
 from app.schemas.health import HealthResponse
+from app.services.supabase_service import supabase_service
 
 router = APIRouter()
 
@@ -14,4 +15,15 @@ async def health_check():
         status="healthy",
         message="Guido API is running",
         version="1.0.0"
-    ) 
\ No newline at end of file
+    ) 
+
+
+@router.get("/health/supabase")
+async def supabase_pool_stats():
+    """AI dev note: Estatísticas do pool HTTP e dos caches do Supabase neste worker"""
+    return {
+        "pool": supabase_service.get_pool_stats(),
+        "caches": supabase_service.get_cache_stats(),
+        "singleflight": supabase_service.get_singleflight_stats(),
+        "resilience": supabase_service.get_resilience_stats(),
+    }
@@ -6,6 +6,7 @@ from typing import Dict, Any
 import httpx
 from app.config import settings
 from app.schemas.integration import IntegrationRequest, IntegrationResponse
+from app.utils import deadline
 
 router = APIRouter()
 
@@ -24,7 +25,7 @@ async def call_external_api(request: IntegrationRequest):
                     "Authorization": f"Bearer {settings.external_api_key}",
                     "Content-Type": "application/json"
                 },
-                timeout=30.0
+                timeout=deadline.timeout_for(30.0)
             )
             
             if response.status_code == 200:
@@ -39,6 +40,13 @@ async def call_external_api(request: IntegrationRequest):
                     detail=f"Erro na API externa: {response.text}"
                 )
                 
+    except HTTPException:
+        raise
+    except (deadline.DeadlineExceeded, httpx.TimeoutException) as e:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tempo limite excedido na API externa: {str(e)}"
+        )
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=503,
@@ -58,7 +66,7 @@ async def check_external_api_health():
         async with httpx.AsyncClient() as client:
             response = await client.get(
                 f"{settings.external_api_base_url}/health",
-                timeout=10.0
+                timeout=deadline.timeout_for(10.0)
             )
             
             return {
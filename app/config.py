@@ -20,6 +20,22 @@ class Settings(BaseSettings):
     version: str = "1.0.0"
     debug: bool = True
     
+    # Deadline por requisição (segundos); o cliente pode pedir menos via header
+    request_timeout_default: float = 30.0
+    request_timeout_header: str = "X-Request-Timeout"
+    
+    # Tracing: Server-Timing em toda resposta; fração das requisições com log JSON de spans
+    tracing_server_timing: bool = True
+    tracing_sample_rate: float = 0.0
+    
+    # Compressão das respostas (gzip; brotli/zstd se instalados); prefixos separados por vírgula ficam de fora
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    compression_excluded_paths: str = ""
+    
     # Security
     secret_key: str = "your-super-secret-key-change-this-in-production"
     access_token_expire_minutes: int = 30
@@ -42,6 +58,71 @@ class Settings(BaseSettings):
     supabase_key: str = ""
     supabase_service_role_key: str = ""
     
+    # Supabase HTTP client (um pool por worker do uvicorn)
+    supabase_http2: bool = False
+    supabase_pool_max_connections: int = 100
+    supabase_pool_max_keepalive: int = 20
+    supabase_keepalive_expiry: float = 30.0
+    supabase_timeout_connect: float = 5.0
+    supabase_timeout_read: float = 15.0
+    supabase_timeout_write: float = 15.0
+    supabase_timeout_pool: float = 5.0
+    supabase_singleflight_enabled: bool = True
+    
+    # Supabase: resiliência (retries, circuit breaker, hedging)
+    supabase_retry_max_attempts: int = 3
+    supabase_retry_backoff_base: float = 0.1
+    supabase_retry_backoff_max: float = 2.0
+    supabase_circuit_failure_threshold: int = 5
+    supabase_circuit_recovery_seconds: float = 30.0
+    supabase_hedge_enabled: bool = False
+    supabase_hedge_delay_ms: Optional[float] = None  # None usa o p95 observado
+    supabase_hedge_min_samples: int = 50
+    
+    # Paginação das listagens
+    pagination_default_limit: int = 50
+    pagination_max_limit: int = 500
+    stream_page_size: int = 1000
+    
+    # Inserção de mensagens em lote
+    mensagens_batch_max_items: int = 1000
+    mensagens_batch_chunk_size: int = 200
+    
+    # Visão 360 do cliente (tamanho da cauda de mensagens, das conversas e dos lembretes)
+    overview_mensagens_default: int = 20
+    overview_mensagens_max: int = 100
+    overview_conversas_limit: int = 50
+    overview_lembretes_limit: int = 50
+    
+    # Busca semântica de mensagens (RPC do pgvector; índice local como fallback)
+    search_rpc_name: str = "match_mensagens"
+    search_rpc_retry_seconds: float = 300.0
+    search_max_k: int = 100
+    search_index_max_age_seconds: float = 600.0
+    search_ivf_min_size: int = 4096
+    search_ivf_nprobe: int = 8
+    
+    # Worker de embeddings em segundo plano (desligado por padrão)
+    embedding_worker_enabled: bool = False
+    embedding_dim: int = 256
+    embedding_batch_size: int = 64
+    embedding_queue_size: int = 1024
+    embedding_poll_interval_seconds: float = 5.0
+    embedding_flush_interval_ms: float = 50.0
+    embedding_retry_backoff_max_seconds: float = 300.0
+    # Gravação em massa via RPC; sem ela, PATCHes por linha com concorrência limitada
+    embedding_update_rpc_name: str = "update_mensagens_embeddings"
+    embedding_update_concurrency: int = 8
+    
+    # Atualização incremental dos dossiês (agendada ao criar mensagens; desligada por padrão)
+    dossie_refresh_enabled: bool = False
+    dossie_refresh_debounce_seconds: float = 30.0
+    dossie_refresh_max_delay_seconds: float = 300.0
+    dossie_refresh_batch_size: int = 500
+    
+    # Cache em memória (segundos; 0 desativa)
+    planos_cache_ttl_seconds: float = 300.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,10 +1,37 @@
 # AI dev note: Ponto de entrada principal da aplicação
 # Configurar FastAPI com todas as rotas e middlewares necessários
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api import metrics
 from app.api.v1.api import api_router
 from app.config import settings
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.dossie_refresher import dossie_refresher
+from app.services.embedding_worker import embedding_worker
+from app.services.supabase_service import supabase_service
+from app.utils.responses import FastJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """AI dev note: Abrir e fechar o pool HTTP do Supabase e os workers em segundo plano"""
+    await supabase_service.startup()
+    if settings.embedding_worker_enabled:
+        await embedding_worker.start()
+    if settings.dossie_refresh_enabled:
+        await dossie_refresher.start()
+    try:
+        yield
+    finally:
+        await dossie_refresher.stop()
+        await embedding_worker.stop()
+        await supabase_service.shutdown()
+
 
 # AI dev note: Configurar aplicação FastAPI
 app = FastAPI(
@@ -13,8 +40,38 @@ app = FastAPI(
     openapi_url=f"{settings.api_v1_str}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+# AI dev note: Deadline por requisição (504 se a resposta não começar a tempo)
+app.add_middleware(
+    DeadlineMiddleware,
+    default_timeout=settings.request_timeout_default,
+    header=settings.request_timeout_header,
 )
 
+# AI dev note: Métricas Prometheus (por fora do deadline para contar também os 504)
+app.add_middleware(MetricsMiddleware)
+
+# AI dev note: Tracing (Server-Timing e traceparent; log JSON amostrado)
+app.add_middleware(
+    TracingMiddleware,
+    sample_rate=settings.tracing_sample_rate,
+    server_timing=settings.tracing_server_timing,
+)
+
+# AI dev note: Compressão negociada por Accept-Encoding (em streaming, inclusive nas exportações)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+        excluded_paths=[path.strip() for path in settings.compression_excluded_paths.split(",") if path.strip()],
+    )
+
 # AI dev note: Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +83,7 @@ app.add_middleware(
 
 # AI dev note: Incluir rotas da API
 app.include_router(api_router, prefix=settings.api_v1_str)
+app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.get("/")
@@ -0,0 +1,2 @@
+# AI dev note: Middlewares ASGI da aplicação
+# Implementados como ASGI puro para não bufferizar respostas em streaming
@@ -0,0 +1,249 @@
+# AI dev note: Middleware de compressão negociada (gzip e, se instalados, brotli/zstd)
+# Comprime em streaming: só o necessário para decidir pelo tamanho mínimo fica em memória
+
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard é opcional
+    zstandard = None
+
+# AI dev note: Tipos que valem a pena comprimir (imagens/zip já são comprimidos)
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+)
+
+EXEMPT_ATTRIBUTE = "__compression_exempt__"
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """AI dev note: Decorator para desligar a compressão de uma rota específica"""
+    setattr(endpoint, EXEMPT_ATTRIBUTE, True)
+    return endpoint
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._obj.process(data)
+        return out + (self._obj.finish() if final else self._obj.flush())
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+def add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """AI dev note: Acrescenta Accept-Encoding ao Vary existente (ou cria o header)"""
+    for index, (name, value) in enumerate(headers):
+        if name.lower() != b"vary":
+            continue
+        fields = [field.strip().lower() for field in value.split(b",")]
+        if b"accept-encoding" in fields or b"*" in fields:
+            return headers
+        headers = list(headers)
+        headers[index] = (name, value + b", Accept-Encoding")
+        return headers
+    return [*headers, (b"vary", b"Accept-Encoding")]
+
+
+def available_encodings() -> List[str]:
+    """AI dev note: Codificações suportadas neste ambiente"""
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """AI dev note: Accept-Encoding -> {codificação: q}"""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header: str, preference: Sequence[str]) -> Optional[str]:
+    """AI dev note: Maior q do cliente; empate resolvido pela ordem de preferência do servidor"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """AI dev note: Comprime respostas conforme Accept-Encoding, em streaming
+    
+    Não comprime respostas abaixo de minimum_size, tipos não compressíveis,
+    respostas já codificadas, Cache-Control: no-transform nem rotas marcadas
+    com @no_compression ou sob excluded_paths. Chunks de respostas em
+    streaming são enviados com flush, sem esperar o corpo inteiro. Toda
+    resposta elegível leva Vary: Accept-Encoding, comprimida ou não.
+    """
+    
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        encodings: Sequence[str] = ("zstd", "br", "gzip"),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        excluded_paths: Sequence[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        supported = available_encodings()
+        self.encodings = [encoding for encoding in encodings if encoding in supported]
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.excluded_paths = tuple(excluded_paths)
+    
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _Brotli(self.brotli_quality)
+        if encoding == "zstd":
+            return _Zstd(self.zstd_level)
+        return _Gzip(self.gzip_level)
+    
+    def _negotiable(self, scope, headers: List[Tuple[bytes, bytes]], status: int) -> bool:
+        """AI dev note: Resposta cuja representação depende do Accept-Encoding (leva Vary)"""
+        if status < 200 or status in (204, 304):
+            return False
+        route = scope.get("route")
+        if route is not None and getattr(getattr(route, "endpoint", None), EXEMPT_ATTRIBUTE, False):
+            return False
+        values = {name.decode("latin-1").lower(): value.decode("latin-1").lower() for name, value in headers}
+        if "content-encoding" in values or "no-transform" in values.get("cache-control", ""):
+            return False
+        return values.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+    
+    def _large_enough(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        for name, value in headers:
+            if name.lower() == b"content-length" and value.isdigit():
+                return int(value) >= self.minimum_size
+        return True
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        if self.excluded_paths and scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+        
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept, self.encodings) if accept else None
+        
+        start_message: Optional[dict] = None
+        pending: List[bytes] = []
+        pending_size = 0
+        compressor = None
+        passthrough = False
+        
+        async def start_compressed():
+            nonlocal compressor
+            compressor = self._compressor(encoding)
+            headers = []
+            for name, value in start_message.get("headers", []):
+                lowered = name.lower()
+                if lowered == b"content-length":
+                    continue
+                if lowered == b"etag" and value.startswith(b'"'):
+                    # A representação comprimida não é byte a byte igual: ETag passa a fraco
+                    value = b"W/" + value
+                headers.append((name, value))
+            headers.append((b"content-encoding", encoding.encode()))
+            await send({**start_message, "headers": add_vary(headers)})
+        
+        async def send_wrapper(message):
+            nonlocal start_message, pending_size, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if not self._negotiable(scope, headers, message["status"]):
+                    passthrough = True
+                    await send(message)
+                    return
+                # AI dev note: Elegível para compressão -> a resposta varia com Accept-Encoding,
+                # mesmo quando sai sem comprimir (cliente sem gzip ou corpo pequeno)
+                start_message = {**message, "headers": add_vary(headers)}
+                passthrough = encoding is None or not self._large_enough(headers)
+                if passthrough:
+                    await send(start_message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                # Acumular até decidir pelo tamanho mínimo (respostas sem Content-Length)
+                pending.append(body)
+                pending_size += len(body)
+                if pending_size < self.minimum_size and more_body:
+                    return
+                body = b"".join(pending)
+                pending.clear()
+                if pending_size < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+                await start_compressed()
+            
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+        
+        await self.app(scope, receive, send_wrapper)
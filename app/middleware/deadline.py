@@ -0,0 +1,84 @@
+# AI dev note: Middleware de deadline por requisição
+# Cada requisição recebe um orçamento de tempo (ajustável por header) propagado via contextvar
+
+import asyncio
+import json
+from typing import Optional
+
+from app.utils.deadline import deadline_scope
+
+
+class DeadlineMiddleware:
+    """AI dev note: Cancela a requisição com 504 se o orçamento acabar antes da resposta
+    
+    O orçamento cobre o tempo até o início da resposta; depois disso o prazo é
+    liberado para que respostas em streaming possam terminar.
+    """
+    
+    def __init__(self, app, default_timeout: float, header: str = "x-request-timeout"):
+        self.app = app
+        self.default_timeout = default_timeout
+        self.header = header.lower().encode()
+    
+    def _budget(self, scope) -> float:
+        """AI dev note: Orçamento em segundos (o header só pode encurtar o padrão)"""
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                try:
+                    requested = float(value.decode())
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, self.default_timeout)
+                break
+        return self.default_timeout
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        budget = self._budget(scope)
+        started = False
+        
+        with deadline_scope(budget) as deadline:
+            async def send_wrapper(message):
+                nonlocal started
+                if message["type"] == "http.response.start":
+                    started = True
+                    deadline.clear()
+                await send(message)
+            
+            # A tarefa herda o contexto atual, incluindo o deadline
+            task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+            try:
+                done, _ = await asyncio.wait({task}, timeout=budget)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            if done or started:
+                await task
+                return
+            
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                # Erro causado pelo cancelamento; a resposta é o 504 abaixo
+                pass
+            if not started:
+                await self._send_timeout(send, budget)
+    
+    @staticmethod
+    async def _send_timeout(send, budget: Optional[float]) -> None:
+        """AI dev note: Resposta 504 padrão"""
+        body = json.dumps({"detail": f"Tempo limite da requisição excedido ({budget:g}s)"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
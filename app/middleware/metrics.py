@@ -0,0 +1,75 @@
+# AI dev note: Middleware de métricas HTTP
+# Latência por rota (template, não o path cru) e status, mais requisições em andamento
+
+import time
+from typing import Dict, Optional
+
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS
+
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # FastAPI antigo: as rotas incluídas já carregam o prefixo
+    iter_route_contexts = None
+
+
+def route_prefixes(routes) -> Dict[int, str]:
+    """AI dev note: Prefixo dos routers incluídos de cada rota (id da rota -> prefixo)
+    
+    Versões recentes do FastAPI guardam em scope["route"] a rota original, com o
+    path relativo ao router incluído; o prefixo sai dos contextos de inclusão.
+    """
+    if iter_route_contexts is None:
+        return {}
+    prefixes = {}
+    for context in iter_route_contexts(routes):
+        template = context.path_format
+        path = getattr(context.original_route, "path_format", None)
+        if template and path is not None and template.endswith(path):
+            prefixes[id(context.original_route)] = template[:len(template) - len(path)]
+    return prefixes
+
+
+def route_template(scope, prefixes: Dict[int, str]) -> str:
+    """AI dev note: Template da rota casada (ex.: /api/v1/guido/contas/{conta_id})
+    
+    Requisições sem rota viram "unmatched" (cardinalidade fixa).
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    return prefixes.get(id(route), "") + path_format
+
+
+class MetricsMiddleware:
+    """AI dev note: Mede cada requisição HTTP até o fim do corpo da resposta"""
+    
+    def __init__(self, app, excluded_paths: tuple = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = frozenset(excluded_paths)
+        self._prefixes: Optional[Dict[int, str]] = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            if self._prefixes is None:
+                self._prefixes = route_prefixes(scope["app"].routes)
+            HTTP_REQUEST_DURATION.labels(method, route_template(scope, self._prefixes), str(status)).observe(time.perf_counter() - started)
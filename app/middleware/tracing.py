@@ -0,0 +1,54 @@
+# AI dev note: Middleware de tracing por requisição
+# Abre o trace, devolve Server-Timing/traceparent e grava o log JSON quando amostrado
+
+import json
+import logging
+import random
+import time
+
+from app.utils.tracing import Trace, trace_scope
+
+logger = logging.getLogger("app.tracing")
+
+
+class TracingMiddleware:
+    """AI dev note: Trace por requisição com header Server-Timing
+    
+    O Server-Timing cobre os spans concluídos até o início da resposta. Com
+    sample_rate > 0 (ou traceparent recebido com flag sampled) os spans são
+    gravados em JSON no logger app.tracing.
+    """
+    
+    def __init__(self, app, sample_rate: float = 0.0, server_timing: bool = True):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.server_timing = server_timing
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        header = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                header = value.decode("latin-1")
+                break
+        trace = Trace.from_traceparent(header, self.sample_rate, random.random())
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"traceparent", trace.traceparent().encode()))
+                if self.server_timing:
+                    total_ms = (time.perf_counter() - trace.started) * 1000
+                    headers.append((b"server-timing", trace.server_timing(total_ms).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        with trace_scope(trace):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if trace.sampled:
+                    logger.info(json.dumps(trace.to_log(time.perf_counter()), ensure_ascii=False))
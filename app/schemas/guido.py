@@ -2,8 +2,8 @@
 # Schemas para todas as entidades do sistema
 
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, UUID4
+from typing import Optional, List, Literal, Union
+from pydantic import BaseModel, EmailStr, Field, UUID4, conlist
 
 
 # Schemas para Contas
@@ -135,6 +135,27 @@ class ConversaResponse(ConversaBase):
         from_attributes = True
 
 
+class ClienteResumoResponse(BaseModel):
+    """AI dev note: Cliente embutido na caixa de entrada (só o necessário para a lista)"""
+    id: UUID4
+    nome: str
+
+
+class MensagemPreviewResponse(BaseModel):
+    """AI dev note: Última mensagem embutida na caixa de entrada"""
+    id: UUID4
+    remetente: str
+    conteudo_texto: str
+    timestamp: datetime
+
+
+class ConversaInboxResponse(ConversaResponse):
+    """AI dev note: Conversa da caixa de entrada com cliente e última mensagem"""
+    status_conversa: Optional[str] = None  # conversas antigas podem estar sem status
+    cliente: ClienteResumoResponse
+    ultima_mensagem: Optional[MensagemPreviewResponse] = None
+
+
 # Schemas para Mensagens
 class MensagemBase(BaseModel):
     """AI dev note: Schema base para mensagem"""
@@ -154,11 +175,10 @@ class MensagemUpdate(BaseModel):
     conteudo_texto: Optional[str] = None
 
 
-class MensagemResponse(MensagemBase):
-    """AI dev note: Schema para resposta de mensagem"""
+class MensagemResumoResponse(MensagemBase):
+    """AI dev note: Schema para resposta de mensagem sem embedding (listagens)"""
     id: UUID4
     timestamp: datetime
-    embedding_vetorial: Optional[List[float]] = None
     created_at: datetime
     updated_at: datetime
 
@@ -166,6 +186,59 @@ class MensagemResponse(MensagemBase):
         from_attributes = True
 
 
+class MensagemResponse(MensagemResumoResponse):
+    """AI dev note: Schema para resposta de mensagem"""
+    embedding_vetorial: Optional[List[float]] = None
+
+
+class EmbeddingBinario(BaseModel):
+    """AI dev note: Embedding compacto: base64 de floats little-endian (float16 perde precisão)"""
+    dtype: Literal["float32", "float16"]
+    dim: int = Field(..., ge=1)
+    data: str
+
+
+class MensagemBinariaResponse(MensagemResumoResponse):
+    """AI dev note: Schema para resposta de mensagem com embedding em base64"""
+    embedding_vetorial: Optional[EmbeddingBinario] = None
+
+
+class MensagemEmbeddingUpdate(BaseModel):
+    """AI dev note: Novo embedding de uma mensagem (lista de floats ou forma binária)"""
+    embedding: Union[EmbeddingBinario, conlist(float, min_length=1)]
+
+
+class MensagemSearchRequest(BaseModel):
+    """AI dev note: Busca semântica: vetor da consulta e escopo (cliente ou conta)"""
+    embedding: Union[EmbeddingBinario, conlist(float, min_length=1)]
+    k: int = Field(10, ge=1)
+    cliente_id: Optional[UUID4] = None
+    conta_id: Optional[UUID4] = None
+
+
+class MensagemSearchResult(MensagemResumoResponse):
+    """AI dev note: Mensagem encontrada com a similaridade de cosseno e o cliente da conversa"""
+    similaridade: float
+    cliente: Optional[ClienteResumoResponse] = None
+
+
+class MensagemBatchItemResult(BaseModel):
+    """AI dev note: Resultado de um item da inserção em lote"""
+    indice: int
+    sucesso: bool
+    mensagem: Optional[MensagemResponse] = None
+    erro: Optional[str] = None
+
+
+class MensagemBatchResponse(BaseModel):
+    """AI dev note: Schema para resposta da inserção de mensagens em lote"""
+    total: int
+    inseridas: int
+    falhas: int
+    conversas_atualizadas: int
+    resultados: List[MensagemBatchItemResult]
+
+
 # Schemas para Lembretes
 class LembreteBase(BaseModel):
     """AI dev note: Schema base para lembrete"""
@@ -222,6 +295,7 @@ class DossieIAResponse(DossieIABase):
     """AI dev note: Schema para resposta de dossiê IA"""
     id: UUID4
     ultima_atualizacao: Optional[datetime] = None
+    ultima_mensagem_id: Optional[UUID4] = None
     created_at: datetime
     updated_at: datetime
 
@@ -229,6 +303,19 @@ class DossieIAResponse(DossieIABase):
         from_attributes = True
 
 
+# Schema agregado da tela do cliente
+class ClienteOverviewResponse(BaseModel):
+    """AI dev note: Schema da visão 360 do cliente (tela do cliente em uma chamada)"""
+    cliente: ClienteResponse
+    conversas: List[ConversaResponse]  # as mais recentes, até o limite configurado
+    mais_conversas: bool
+    ultima_conversa_id: Optional[UUID4] = None
+    mensagens_recentes: List[MensagemResumoResponse]  # cauda da última conversa, em ordem cronológica
+    mais_mensagens: bool
+    dossie: Optional[DossieIAResponse] = None
+    lembretes: List[LembreteResponse]  # pendentes, do mais antigo ao mais distante
+
+
 # Schemas para Assinaturas
 class AssinaturaBase(BaseModel):
     """AI dev note: Schema base para assinatura"""
@@ -0,0 +1,17 @@
+# AI dev note: Schemas genéricos de paginação
+# Envelope usado por todos os endpoints de listagem paginada
+
+from typing import Generic, List, Literal, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# AI dev note: Modos do header Prefer: count= do PostgREST
+CountMode = Literal["exact", "planned", "estimated"]
+
+
+class PaginatedResponse(BaseModel, Generic[T]):
+    """AI dev note: Página de resultados com cursor para a próxima página"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total_count: Optional[int] = None
@@ -0,0 +1,218 @@
+# AI dev note: Atualização incremental dos dossiês a partir das mensagens novas
+# (ultima_atualizacao, ultima_mensagem_id) é a marca d'água: só mensagens posteriores são lidas e resumidas
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from app.config import settings
+from app.services.summarizers import RuleBasedSummarizer, Summarizer
+from app.services.supabase_service import SupabaseService, supabase_service
+from app.utils.metrics import DOSSIE_REFRESH_MESSAGES, DOSSIE_REFRESHES
+
+logger = logging.getLogger(__name__)
+
+# AI dev note: Limite do mapa conversa -> cliente (esvaziado ao encher)
+CONVERSA_CACHE_MAX = 10000
+
+
+class DossieRefresher:
+    """AI dev note: Agenda e executa a atualização incremental do dossiê de cada cliente
+    
+    Cada mensagem criada agenda o cliente com debounce: uma rajada vira uma
+    única atualização `debounce` segundos após a última mensagem, mas nunca
+    mais que `max_delay` após a primeira. A atualização lê o dossiê, busca as
+    mensagens após a marca d'água em páginas de `batch_size`, dobra cada
+    página no resumo com o summarizer e grava o resultado num único upsert,
+    movendo a marca d'água para a última mensagem incorporada. A marca é o
+    par (timestamp, id), então mensagens com o mesmo timestamp da última
+    incorporada não se perdem. Atualizações do mesmo cliente são serializadas.
+    """
+    
+    def __init__(
+        self,
+        service: SupabaseService,
+        summarizer: Summarizer,
+        debounce: float = 30.0,
+        max_delay: float = 300.0,
+        batch_size: int = 500,
+    ):
+        self.service = service
+        self.summarizer = summarizer
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self._running = False
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._first_scheduled: Dict[str, float] = {}
+        self._locks: Dict[str, List[Any]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._conversa_clientes: Dict[str, str] = {}
+        self.refreshed_total = 0
+        self.failed_total = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._running
+    
+    async def start(self) -> None:
+        """AI dev note: Passar a aceitar agendamentos (chamado no lifespan)"""
+        self._running = True
+    
+    async def stop(self) -> None:
+        """AI dev note: Cancelar agendamentos e atualizações em andamento
+        
+        Nada se perde: a marca d'água só avança quando o dossiê é gravado.
+        """
+        self._running = False
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._first_scheduled.clear()
+        tasks, self._tasks = self._tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def pending(self) -> int:
+        """AI dev note: Clientes com atualização agendada"""
+        return len(self._timers)
+    
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def notify_mensagens(self, mensagens: List[Dict[str, Any]]) -> None:
+        """AI dev note: Agendar os clientes das mensagens recém-criadas (não bloqueia a requisição)"""
+        if not self._running:
+            return
+        conversa_ids = {mensagem["conversa_id"] for mensagem in mensagens if mensagem.get("conversa_id")}
+        if conversa_ids:
+            self._spawn(self._schedule_conversas(conversa_ids))
+    
+    async def _schedule_conversas(self, conversa_ids: Set[str]) -> None:
+        missing = [conversa_id for conversa_id in conversa_ids if conversa_id not in self._conversa_clientes]
+        if missing:
+            try:
+                rows = await self.service.get_by_ids("conversas", missing, "id,cliente_id")
+            except Exception as e:
+                logger.warning("Falha ao resolver clientes de %d conversas: %s", len(missing), e)
+                rows = []
+            if len(self._conversa_clientes) + len(rows) > CONVERSA_CACHE_MAX:
+                self._conversa_clientes.clear()
+            for row in rows:
+                self._conversa_clientes[row["id"]] = row["cliente_id"]
+        clientes = {self._conversa_clientes[conversa_id] for conversa_id in conversa_ids if conversa_id in self._conversa_clientes}
+        for cliente_id in clientes:
+            self.schedule(cliente_id)
+    
+    def schedule(self, cliente_id: str) -> None:
+        """AI dev note: (Re)agendar a atualização do cliente com debounce e atraso máximo"""
+        if not self._running:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        first = self._first_scheduled.setdefault(cliente_id, now)
+        delay = max(0.0, min(self.debounce, first + self.max_delay - now))
+        timer = self._timers.pop(cliente_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[cliente_id] = loop.call_later(delay, self._fire, cliente_id)
+    
+    def _cancel_scheduled(self, cliente_id: str) -> None:
+        timer = self._timers.pop(cliente_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._first_scheduled.pop(cliente_id, None)
+    
+    def _fire(self, cliente_id: str) -> None:
+        self._timers.pop(cliente_id, None)
+        self._first_scheduled.pop(cliente_id, None)
+        self._spawn(self._refresh_logged(cliente_id))
+    
+    async def _refresh_logged(self, cliente_id: str) -> None:
+        try:
+            await self.refresh(cliente_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Falha ao atualizar o dossiê do cliente %s: %s", cliente_id, e)
+    
+    async def _summarize(self, dossie: Optional[Dict[str, Any]], mensagens: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if inspect.iscoroutinefunction(self.summarizer.summarize):
+            return await self.summarizer.summarize(dossie, mensagens)
+        return await asyncio.to_thread(self.summarizer.summarize, dossie, mensagens)
+    
+    async def refresh(self, cliente_id: str) -> Optional[Dict[str, Any]]:
+        """AI dev note: Atualizar agora o dossiê do cliente (absorve o agendamento pendente)
+        
+        Devolve o dossiê gravado, o atual se não havia mensagens novas ou None
+        se o cliente não tem dossiê nem mensagens.
+        """
+        self._cancel_scheduled(cliente_id)
+        entry = self._locks.setdefault(cliente_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._refresh(cliente_id)
+        except Exception:
+            self.failed_total += 1
+            DOSSIE_REFRESHES.labels("failed").inc()
+            raise
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(cliente_id, None)
+    
+    async def _refresh(self, cliente_id: str) -> Optional[Dict[str, Any]]:
+        dossie = await self.service.get_dossie_by_cliente(cliente_id)
+        after = None
+        if dossie and dossie.get("ultima_atualizacao"):
+            after = (dossie["ultima_atualizacao"], dossie.get("ultima_mensagem_id"))
+        state = dict(dossie) if dossie else None
+        folded = 0
+        while True:
+            rows = await self.service.get_mensagens_cliente_desde(cliente_id, after, self.batch_size)
+            if rows:
+                state = {**(state or {}), **await self._summarize(state, rows)}
+                folded += len(rows)
+                after = (rows[-1]["timestamp"], rows[-1]["id"])
+            if len(rows) < self.batch_size:
+                break
+        
+        if not folded:
+            DOSSIE_REFRESHES.labels("unchanged").inc()
+            return dossie
+        result = await self.service.create_or_update_dossie({
+            "cliente_id": cliente_id,
+            "resumo_gerado": state.get("resumo_gerado"),
+            "sentimento_geral": state.get("sentimento_geral"),
+            "ultima_atualizacao": after[0],
+            "ultima_mensagem_id": after[1],
+        })
+        self.refreshed_total += 1
+        DOSSIE_REFRESHES.labels("updated").inc()
+        DOSSIE_REFRESH_MESSAGES.labels().inc(folded)
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """AI dev note: Estado do agendador"""
+        return {
+            "running": self._running,
+            "pending": self.pending(),
+            "in_progress": len(self._locks),
+            "refreshed_total": self.refreshed_total,
+            "failed_total": self.failed_total,
+        }
+
+
+# AI dev note: Instância global; o agendamento só roda com DOSSIE_REFRESH_ENABLED=true
+dossie_refresher = DossieRefresher(
+    supabase_service,
+    RuleBasedSummarizer(),
+    debounce=settings.dossie_refresh_debounce_seconds,
+    max_delay=settings.dossie_refresh_max_delay_seconds,
+    batch_size=settings.dossie_refresh_batch_size,
+)
@@ -0,0 +1,45 @@
+# AI dev note: Geradores de embeddings para o worker de mensagens
+# Qualquer objeto com embed(textos) -> vetores serve (síncrono ou async); o padrão é local e determinístico
+
+import hashlib
+import math
+import re
+from typing import Awaitable, List, Protocol, Union
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(Protocol):
+    """AI dev note: Contrato dos embedders (síncronos rodam numa thread do worker)"""
+    
+    dim: int
+    
+    def embed(self, texts: List[str]) -> Union[List[List[float]], Awaitable[List[List[float]]]]:
+        ...
+
+
+class HashingEmbedder:
+    """AI dev note: Embedding por feature hashing de palavras e bigramas
+    
+    Sem modelo nem rede: o mesmo texto sempre gera o mesmo vetor, o que o torna
+    o padrão para desenvolvimento e o dublê dos testes. Cada termo soma ±1 numa
+    posição escolhida pelo hash; o vetor sai normalizado (cosseno = produto).
+    """
+    
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+    
+    def _features(self, text: str) -> List[str]:
+        tokens = TOKEN_RE.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
@@ -0,0 +1,223 @@
+# AI dev note: Worker em segundo plano que gera embeddings das mensagens
+# Busca mensagens sem embedding_vetorial, agrupa em micro-lotes e grava o lote numa única RPC
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from app.config import settings
+from app.services.embedders import Embedder, HashingEmbedder
+from app.services.supabase_service import EmbeddingWriteResult, SupabaseService, supabase_service
+from app.utils.metrics import EMBEDDING_BATCH_DURATION, EMBEDDING_BATCH_SIZE, EMBEDDING_MESSAGES
+from app.utils.resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingWorker:
+    """AI dev note: Pipeline produtor/consumidor com fila limitada
+    
+    O produtor consulta o banco pelas mensagens pendentes (a fonte da verdade)
+    e só busca o que cabe na fila: se o embedder ficar para trás, a fila cheia
+    segura o produtor (backpressure). Os endpoints chamam submit() após criar
+    mensagens para que entrem sem esperar o próximo ciclo; com a fila cheia a
+    mensagem é descartada ali e o produtor a encontra depois, então a
+    requisição nunca espera o worker. Embedders síncronos rodam numa thread.
+    Mensagens cuja gravação falha ficam reservadas (o produtor não as relê)
+    por um backoff exponencial com jitter, que cresce a cada lote com falha
+    seguido; as gravadas do mesmo lote seguem normalmente.
+    """
+    
+    def __init__(
+        self,
+        service: SupabaseService,
+        embedder: Embedder,
+        batch_size: int = 64,
+        queue_size: int = 1024,
+        poll_interval: float = 5.0,
+        flush_interval: float = 0.05,
+        retry_backoff_max: float = 300.0,
+    ):
+        self.service = service
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.retry_backoff_max = retry_backoff_max
+        self._consecutive_failures = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self.embedded_total = 0
+        self.failed_total = 0
+        self.dropped_total = 0
+        self.batches_total = 0
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+    
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    async def start(self) -> None:
+        """AI dev note: Iniciar produtor e consumidor (chamado no lifespan)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._poll_loop(), name="embedding-poller"),
+            asyncio.create_task(self._embed_loop(), name="embedding-worker"),
+        ]
+    
+    async def stop(self) -> None:
+        """AI dev note: Parar o worker; mensagens não gravadas ficam para o próximo início"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._pending.clear()
+    
+    def submit(self, mensagens: List[Dict[str, Any]]) -> int:
+        """AI dev note: Enfileirar mensagens recém-criadas sem bloquear; devolve quantas entraram"""
+        if not self.running:
+            return 0
+        accepted = 0
+        for mensagem in mensagens:
+            if mensagem.get("embedding_vetorial") is not None or mensagem["id"] in self._pending:
+                continue
+            try:
+                self._queue.put_nowait(mensagem)
+            except asyncio.QueueFull:
+                self.dropped_total += 1
+                EMBEDDING_MESSAGES.labels("dropped").inc()
+                continue
+            self._pending.add(mensagem["id"])
+            accepted += 1
+        return accepted
+    
+    async def _poll_loop(self) -> None:
+        while True:
+            free = self._queue.maxsize - self._queue.qsize()
+            added = 0
+            if free > 0:
+                try:
+                    # As pendentes ainda aparecem como sem embedding; buscar a mais para compensar
+                    rows = await self.service.get_mensagens_sem_embedding(free + len(self._pending))
+                except Exception as e:
+                    logger.warning("Falha ao buscar mensagens sem embedding: %s", e)
+                    rows = []
+                for row in rows:
+                    if row["id"] in self._pending:
+                        continue
+                    self._pending.add(row["id"])
+                    await self._queue.put(row)
+                    added += 1
+            if added == 0:
+                await asyncio.sleep(self.poll_interval)
+    
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """AI dev note: Micro-lote: espera a primeira mensagem e junta o que chegar em flush_interval"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        flush_at = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = flush_at - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        if inspect.iscoroutinefunction(self.embedder.embed):
+            return await self.embedder.embed(texts)
+        return await asyncio.to_thread(self.embedder.embed, texts)
+    
+    async def process_batch(self, batch: List[Dict[str, Any]]) -> EmbeddingWriteResult:
+        """AI dev note: Gerar os embeddings de um lote e gravar só a coluna embedding_vetorial
+        
+        Devolve o resultado da gravação; as linhas em failed não foram gravadas.
+        """
+        started = time.perf_counter()
+        vectors = await self._embed([row.get("conteudo_texto") or "" for row in batch])
+        result = await self.service.update_mensagens_embeddings([
+            {"id": row["id"], "conversa_id": row["conversa_id"], "embedding_vetorial": vector}
+            for row, vector in zip(batch, vectors)
+        ])
+        done = len(batch) - len(result.failed)
+        self.batches_total += 1
+        self.embedded_total += done
+        EMBEDDING_MESSAGES.labels("embedded").inc(done)
+        EMBEDDING_BATCH_SIZE.labels().observe(len(batch))
+        EMBEDDING_BATCH_DURATION.labels().observe(time.perf_counter() - started)
+        return result
+    
+    def _release(self, ids: List[str]) -> None:
+        for mensagem_id in ids:
+            self._pending.discard(mensagem_id)
+    
+    async def _embed_loop(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            ids = [row["id"] for row in batch]
+            try:
+                result = await self.process_batch(batch)
+                failed, error = result.failed, result.error
+            except asyncio.CancelledError:
+                self._release(ids)
+                raise
+            except Exception as e:
+                failed, error = ids, e
+            if not failed:
+                self._consecutive_failures = 0
+                self._release(ids)
+                continue
+            
+            # As que falharam continuam sem embedding; o produtor as busca de novo após o backoff
+            failed_ids = set(failed)
+            self._release([mensagem_id for mensagem_id in ids if mensagem_id not in failed_ids])
+            self.failed_total += len(failed)
+            EMBEDDING_MESSAGES.labels("failed").inc(len(failed))
+            delay = backoff_delay(self._consecutive_failures, self.poll_interval, self.retry_backoff_max)
+            self._consecutive_failures += 1
+            logger.warning(
+                "Falha ao gerar embeddings de %d mensagens (nova tentativa em %.1fs): %s", len(failed), delay, error
+            )
+            asyncio.get_running_loop().call_later(delay, self._release, list(failed))
+    
+    def stats(self) -> Dict[str, Any]:
+        """AI dev note: Estado do worker"""
+        return {
+            "running": self.running,
+            "queue_depth": self.queue_depth(),
+            "queue_size": self.queue_size,
+            "pending": len(self._pending),
+            "embedded_total": self.embedded_total,
+            "failed_total": self.failed_total,
+            "dropped_total": self.dropped_total,
+            "batches_total": self.batches_total,
+        }
+
+
+# AI dev note: Instância global; só roda com EMBEDDING_WORKER_ENABLED=true
+embedding_worker = EmbeddingWorker(
+    supabase_service,
+    HashingEmbedder(settings.embedding_dim),
+    batch_size=settings.embedding_batch_size,
+    queue_size=settings.embedding_queue_size,
+    poll_interval=settings.embedding_poll_interval_seconds,
+    flush_interval=settings.embedding_flush_interval_ms / 1000,
+    retry_backoff_max=settings.embedding_retry_backoff_max_seconds,
+)
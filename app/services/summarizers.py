@@ -0,0 +1,113 @@
+# AI dev note: Resumidores incrementais para o dossiê do cliente
+# Recebem o dossiê atual e só as mensagens novas; devolvem resumo_gerado e sentimento_geral
+
+import re
+from typing import Any, Awaitable, Dict, List, Optional, Protocol, Union
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SENTIMENTOS = ("NEGATIVO", "NEUTRO", "POSITIVO")
+
+POSITIVE_WORDS = {
+    "obrigado", "obrigada", "ótimo", "ótima", "otimo", "excelente", "perfeito", "perfeita", "gostei",
+    "adorei", "amei", "maravilhoso", "maravilhosa", "lindo", "linda", "bom", "boa", "legal", "top",
+    "interessado", "interessada", "fechado", "fechar", "combinado", "show", "parabéns",
+}
+NEGATIVE_WORDS = {
+    "caro", "cara", "ruim", "problema", "reclamação", "reclamacao", "insatisfeito", "insatisfeita",
+    "desisti", "desistir", "cancelar", "cancelamento", "demora", "demorado", "péssimo", "pessimo",
+    "atraso", "atrasado", "absurdo", "horrível", "horrivel", "chateado", "chateada",
+}
+NEGATIONS = {"não", "nao", "nem", "nunca"}
+
+# AI dev note: Palavra-chave -> interesse registrado no resumo
+TOPICS = {
+    "quarto": "quartos", "quartos": "quartos", "suíte": "suíte", "suite": "suíte",
+    "garagem": "vaga de garagem", "vaga": "vaga de garagem", "vagas": "vaga de garagem",
+    "visita": "visita", "visitar": "visita", "financiamento": "financiamento", "financiar": "financiamento",
+    "aluguel": "aluguel", "alugar": "aluguel", "comprar": "compra", "compra": "compra",
+    "preço": "orçamento", "preco": "orçamento", "valor": "orçamento", "orçamento": "orçamento",
+    "bairro": "localização", "perto": "localização", "metrô": "localização", "metro": "localização",
+    "apartamento": "apartamento", "apto": "apartamento", "casa": "casa", "terreno": "terreno",
+}
+
+INTERESSES_PREFIX = "Interesses: "
+
+
+class Summarizer(Protocol):
+    """AI dev note: Contrato dos resumidores (síncronos rodam numa thread)"""
+    
+    def summarize(
+        self, dossie: Optional[Dict[str, Any]], mensagens: List[Dict[str, Any]]
+    ) -> Union[Dict[str, Optional[str]], Awaitable[Dict[str, Optional[str]]]]:
+        ...
+
+
+class RuleBasedSummarizer:
+    """AI dev note: Resumo por regras, sem modelo nem rede
+    
+    O resumo tem uma linha de interesses (união dos temas citados pelo cliente)
+    e os últimos destaques (mensagens do cliente que citam um tema ou número).
+    O sentimento é uma média móvel: o rótulo anterior pesa `inertia` e as
+    mensagens novas do cliente o restante, então uma rajada não o vira sozinha.
+    """
+    
+    def __init__(self, max_highlights: int = 10, highlight_chars: int = 160, inertia: float = 0.5):
+        self.max_highlights = max_highlights
+        self.highlight_chars = highlight_chars
+        self.inertia = inertia
+    
+    @staticmethod
+    def _score(tokens: List[str]) -> float:
+        """AI dev note: Polaridade em [-1, 1]; negação inverte a palavra seguinte"""
+        positive = negative = 0
+        for i, token in enumerate(tokens):
+            polarity = 1 if token in POSITIVE_WORDS else -1 if token in NEGATIVE_WORDS else 0
+            if polarity and i and tokens[i - 1] in NEGATIONS:
+                polarity = -polarity
+            positive += polarity > 0
+            negative += polarity < 0
+        return (positive - negative) / (positive + negative) if positive or negative else 0.0
+    
+    def _parse(self, resumo: Optional[str]):
+        interesses: List[str] = []
+        highlights: List[str] = []
+        for line in (resumo or "").splitlines():
+            if line.startswith(INTERESSES_PREFIX):
+                interesses = [item.strip() for item in line[len(INTERESSES_PREFIX):].split(",") if item.strip()]
+            elif line.strip():
+                highlights.append(line)
+        return interesses, highlights
+    
+    def summarize(self, dossie: Optional[Dict[str, Any]], mensagens: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        dossie = dossie or {}
+        interesses, highlights = self._parse(dossie.get("resumo_gerado"))
+        scores = []
+        for mensagem in mensagens:
+            if mensagem.get("remetente") != "CLIENTE":
+                continue
+            texto = " ".join((mensagem.get("conteudo_texto") or "").split())
+            tokens = TOKEN_RE.findall(texto.lower())
+            scores.append(self._score(tokens))
+            temas = [TOPICS[token] for token in tokens if token in TOPICS]
+            if "r$" in texto.lower():
+                temas.append("orçamento")
+            for tema in temas:
+                if tema not in interesses:
+                    interesses.append(tema)
+            if temas or any(token.isdigit() for token in tokens):
+                if len(texto) > self.highlight_chars:
+                    texto = texto[:self.highlight_chars - 1].rstrip() + "…"
+                highlights.append(f"- {texto}")
+        
+        highlights = highlights[-self.max_highlights:]
+        lines = ([INTERESSES_PREFIX + ", ".join(interesses)] if interesses else []) + highlights
+        
+        sentimento = dossie.get("sentimento_geral")
+        if scores:
+            combined = sum(scores) / len(scores)
+            if sentimento in SENTIMENTOS:
+                previous = SENTIMENTOS.index(sentimento) - 1
+                combined = self.inertia * previous + (1 - self.inertia) * combined
+            sentimento = "POSITIVO" if combined > 0.2 else "NEGATIVO" if combined < -0.2 else "NEUTRO"
+        return {"resumo_gerado": "\n".join(lines) or dossie.get("resumo_gerado"), "sentimento_geral": sentimento}
@@ -0,0 +1,95 @@
+# AI dev note: Carregador por requisição no estilo DataLoader
+# Agrupa buscas por ID feitas no mesmo tick do event loop em consultas id=in.(...)
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.supabase_service import SupabaseService, supabase_service
+
+
+class SupabaseLoader:
+    """AI dev note: Agrupa get-por-ID em uma consulta por tabela
+    
+    Deve ser criado por requisição (ou por job): os resultados ficam
+    memorizados durante a vida do loader.
+    """
+    
+    def __init__(self, service: SupabaseService, max_batch_size: int = 100):
+        self._service = service
+        self._max_batch_size = max_batch_size
+        self._memo: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._scheduled = False
+        self._tasks: set = set()
+        self.batches = 0
+    
+    def load(self, table: str, row_id: Any) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """AI dev note: Agendar a busca de uma linha; None se o ID não existir"""
+        key = (table, str(row_id))
+        future = self._memo.get(key)
+        if future is not None:
+            return future
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._memo[key] = future
+        self._pending.setdefault(table, {})[key[1]] = future
+        if not self._scheduled:
+            # Despachar depois que as demais corrotinas prontas deste tick agendarem suas buscas
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+    
+    async def load_many(self, table: str, row_ids: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """AI dev note: Buscar várias linhas preservando a ordem dos IDs"""
+        return list(await asyncio.gather(*(self.load(table, row_id) for row_id in row_ids)))
+    
+    def load_cliente(self, cliente_id: Any) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """AI dev note: Cliente por ID"""
+        return self.load("clientes", cliente_id)
+    
+    def load_conta(self, conta_id: Any) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """AI dev note: Conta por ID"""
+        return self.load("contas", conta_id)
+    
+    def load_corretor(self, corretor_id: Any) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """AI dev note: Corretor por ID"""
+        return self.load("corretores", corretor_id)
+    
+    def load_conversa(self, conversa_id: Any) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """AI dev note: Conversa por ID"""
+        return self.load("conversas", conversa_id)
+    
+    def _dispatch(self) -> None:
+        """AI dev note: Enviar uma consulta por tabela (em blocos de max_batch_size)"""
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        for table, futures in pending.items():
+            ids = list(futures)
+            for start in range(0, len(ids), self._max_batch_size):
+                chunk = {row_id: futures[row_id] for row_id in ids[start:start + self._max_batch_size]}
+                self.batches += 1
+                task = asyncio.ensure_future(self._fetch(table, chunk))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+    
+    async def _fetch(self, table: str, futures: Dict[str, asyncio.Future]) -> None:
+        """AI dev note: Resolver cada chamador com sua linha (ou None)"""
+        try:
+            rows = await self._service.get_by_ids(table, list(futures))
+        except Exception as e:
+            for key, future in futures.items():
+                # Permitir nova tentativa em uma próxima chamada
+                self._memo.pop((table, key), None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_id = {str(row["id"]): row for row in rows}
+        for row_id, future in futures.items():
+            if not future.done():
+                future.set_result(by_id.get(row_id))
+
+
+def get_supabase_loader() -> SupabaseLoader:
+    """AI dev note: Dependência FastAPI: um loader novo por requisição"""
+    return SupabaseLoader(supabase_service)
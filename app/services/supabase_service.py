@@ -1,16 +1,97 @@
 # AI dev note: Serviço para integração com Supabase
 # Centraliza todas as operações com o banco de dados Supabase
 
+import asyncio
 import httpx
 import json
-from typing import Dict, Any, List, Optional
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from typing import AsyncIterator, Dict, Any, List, Literal, NamedTuple, Optional, Tuple
 from app.config import settings
+from app.utils import deadline, tracing
+from app.utils.cache import TTLCache
+from app.utils.embedding_codec import decode_embedding
+from app.utils.metrics import SUPABASE_ERRORS, SUPABASE_REQUEST_DURATION
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay
+from app.utils.singleflight import SingleFlight
+from app.utils.vector_index import VectorIndex, parse_vector
+from app.utils.pagination import (
+    InvalidCursorError, OrderColumns, _quote, decode_cursor, encode_cursor, keyset_filter, keyset_filter_nulls_last,
+    order_param,
+    parse_content_range_count, parse_content_range_total,
+)
+
+logger = logging.getLogger(__name__)
+
+# AI dev note: Métodos seguros para repetir e status considerados transitórios
+# DELETE fica de fora: a contagem de uma repetição após um commit sem resposta seria 0
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT"})
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+# AI dev note: Falhas em que o pedido não chegou ao servidor (repetíveis em qualquer método)
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# AI dev note: Ordenações keyset das listagens (sempre terminando em id)
+CONTAS_ORDER: OrderColumns = (("created_at", False), ("id", False))
+CLIENTES_ORDER: OrderColumns = (("created_at", False), ("id", False))
+MENSAGENS_ORDER: OrderColumns = (("timestamp", False), ("id", False))
+LEMBRETES_ORDER: OrderColumns = (("data_lembrete", False), ("id", False))
+
+# AI dev note: Projeção de mensagens sem embedding_vetorial (milhares de floats por linha)
+MENSAGEM_COLUMNS_SEM_EMBEDDING = "id,conversa_id,remetente,conteudo_texto,timestamp,created_at,updated_at"
+
+# AI dev note: Caixa de entrada: AGUARDANDO_CORRETOR primeiro, depois as demais por última mensagem
+INBOX_PRIORITY_STATUS = "AGUARDANDO_CORRETOR"
+INBOX_SELECT = (
+    "id,cliente_id,plataforma,status_conversa,timestamp_ultima_mensagem,created_at,updated_at,"
+    "cliente:clientes!inner(id,nome),"
+    "ultima_mensagem:mensagens(id,remetente,conteudo_texto,timestamp)"
+)
+
+# AI dev note: Prefer: return= das escritas (minimal e headers-only não trafegam as linhas)
+ReturnMode = Literal["minimal", "representation", "headers-only"]
+
+
+class WriteResult(NamedTuple):
+    """AI dev note: Resultado de uma escrita: linhas (só em representation), afetadas e Location"""
+    rows: List[Dict[str, Any]]
+    count: Optional[int]
+    location: Optional[str]
+
+
+class EmbeddingWriteResult(NamedTuple):
+    """AI dev note: Gravação de embeddings: IDs gravados, IDs que falharam e o primeiro erro
+    
+    IDs fora das duas listas não existem mais (mensagem apagada).
+    """
+    updated: List[str]
+    failed: List[str]
+    error: Optional[BaseException]
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """AI dev note: Timestamp ISO-8601 comparável entre offsets e precisões (naive = UTC)"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _select(select: Optional[str]) -> Optional[List[Tuple[str, str]]]:
+    """AI dev note: Parâmetro select= do PostgREST (None = todas as colunas)"""
+    return [("select", select)] if select else None
 
 
 class SupabaseService:
     """AI dev note: Serviço para integração com Supabase usando httpx"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         """AI dev note: Inicializar cliente Supabase"""
         if not settings.supabase_url or not settings.supabase_key:
             raise ValueError("SUPABASE_URL e SUPABASE_KEY são obrigatórios")
@@ -23,25 +104,478 @@ class SupabaseService:
             "Content-Type": "application/json",
             "Prefer": "return=representation"
         }
+        
+        # AI dev note: Um único cliente com pool de conexões por processo,
+        # criado no lifespan da aplicação (ou sob demanda em scripts)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._http2 = settings.supabase_http2 and find_spec("h2") is not None
+        if settings.supabase_http2 and not self._http2:
+            logger.warning("SUPABASE_HTTP2 ativo mas o pacote 'h2' não está instalado; usando HTTP/1.1")
+        self._limits = httpx.Limits(
+            max_connections=settings.supabase_pool_max_connections,
+            max_keepalive_connections=settings.supabase_pool_max_keepalive,
+            keepalive_expiry=settings.supabase_keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(
+            connect=settings.supabase_timeout_connect,
+            read=settings.supabase_timeout_read,
+            write=settings.supabase_timeout_write,
+            pool=settings.supabase_timeout_pool,
+        )
+        self._in_flight = 0
+        self._requests_total = 0
+        
+        # AI dev note: GETs idênticos concorrentes compartilham uma só chamada
+        self._singleflight = SingleFlight() if settings.supabase_singleflight_enabled else None
+        self._write_generation = 0
+        
+        # AI dev note: Resiliência: retries, circuit breaker por tabela e hedging de GETs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+        self._retries_total = 0
+        self._hedged_total = 0
+        
+        # AI dev note: Planos mudam raramente; manter a tabela inteira em memória
+        self._planos_cache = TTLCache(ttl=settings.planos_cache_ttl_seconds)
+        
+        # AI dev note: Busca semântica: RPC do pgvector quando existir, senão índice local
+        self._vector_index = self._new_vector_index()
+        self._vector_index_lock = asyncio.Lock()
+        self._search_rpc_retry_at = 0.0
+        self._embedding_rpc_retry_at = 0.0
     
-    async def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
-        """AI dev note: Fazer requisição para a API do Supabase"""
-        url = f"{self.base_url}/rest/v1/{endpoint}"
-        
-        async with httpx.AsyncClient() as client:
-            if method == "GET":
-                response = await client.get(url, headers=self.headers)
-            elif method == "POST":
-                response = await client.post(url, headers=self.headers, json=data)
-            elif method == "PUT":
-                response = await client.put(url, headers=self.headers, json=data)
-            elif method == "DELETE":
-                response = await client.delete(url, headers=self.headers)
+    def _build_client(self) -> httpx.AsyncClient:
+        """AI dev note: Criar cliente httpx com pool, keep-alive e HTTP/2 opcional"""
+        return httpx.AsyncClient(
+            base_url=f"{self.base_url}/rest/v1/",
+            headers=self.headers,
+            limits=self._limits,
+            timeout=self._timeout,
+            http2=self._http2,
+            transport=self._transport,
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """AI dev note: Cliente compartilhado (criado sob demanda se o lifespan não rodou)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+    
+    async def startup(self) -> None:
+        """AI dev note: Abrir o pool de conexões (chamado no lifespan do FastAPI)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+    
+    async def shutdown(self) -> None:
+        """AI dev note: Fechar o pool de conexões (chamado no lifespan do FastAPI)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def set_transport(self, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        """AI dev note: Trocar o transporte HTTP (ex.: FakePostgrest em testes e benchmarks)
+        
+        O cliente atual é descartado sem fechar; o próximo uso cria outro com o
+        novo transporte. Circuitos e cache de planos do backend anterior são zerados.
+        """
+        self._transport = transport
+        self._client = None
+        self._breakers.clear()
+        self._planos_cache.invalidate()
+        self._vector_index = self._new_vector_index()
+        self._search_rpc_retry_at = 0.0
+        self._embedding_rpc_retry_at = 0.0
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """AI dev note: Estatísticas do pool para dimensionar por worker"""
+        stats: Dict[str, Any] = {
+            "http2": self._http2,
+            "max_connections": self._limits.max_connections,
+            "max_keepalive_connections": self._limits.max_keepalive_connections,
+            "keepalive_expiry": self._limits.keepalive_expiry,
+            "client_open": self._client is not None and not self._client.is_closed,
+            "in_flight_requests": self._in_flight,
+            "requests_total": self._requests_total,
+            "connections": 0,
+            "idle_connections": 0,
+            "active_connections": 0,
+            "queued_requests": 0,
+        }
+        # AI dev note: httpcore não tem API pública de métricas; ler o pool com cautela
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = list(getattr(pool, "connections", []))
+            idle = sum(1 for conn in connections if conn.is_idle())
+            stats["connections"] = len(connections)
+            stats["idle_connections"] = idle
+            stats["active_connections"] = len(connections) - idle
+            stats["queued_requests"] = len(getattr(pool, "_requests", []))
+        return stats
+    
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Any = None,
+        params: Optional[List[Tuple[str, str]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: Optional[bool] = None,
+    ) -> httpx.Response:
+        """AI dev note: Enviar requisição ao PostgREST e devolver a resposta crua
+        
+        idempotent=True permite retry em métodos não idempotentes por natureza
+        (ex.: upsert via POST com merge-duplicates).
+        """
+        if method not in ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"):
+            raise ValueError(f"Método {method} não suportado")
+        
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        
+        with tracing.span("supabase", table=endpoint, method=method):
+            if self._singleflight is not None and method in ("GET", "HEAD"):
+                # Cada chamador faz seu próprio response.json(), então não há objetos compartilhados.
+                # A geração de escrita evita que uma leitura iniciada após um write
+                # reaproveite uma chamada anterior a ele.
+                key = (
+                    self._write_generation,
+                    method,
+                    endpoint,
+                    tuple(params or ()),
+                    tuple(sorted((headers or {}).items())),
+                )
+                return await self._singleflight.do(
+                    key, lambda: self._execute(method, endpoint, None, params, headers, idempotent)
+                )
+            if method not in ("GET", "HEAD"):
+                self._write_generation += 1
+            return await self._execute(method, endpoint, data, params, headers, idempotent)
+    
+    def _breaker(self, table: str) -> CircuitBreaker:
+        """AI dev note: Circuit breaker da tabela (criado sob demanda)"""
+        breaker = self._breakers.get(table)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                table,
+                settings.supabase_circuit_failure_threshold,
+                settings.supabase_circuit_recovery_seconds,
+            )
+            self._breakers[table] = breaker
+        return breaker
+    
+    async def _execute(
+        self,
+        method: str,
+        endpoint: str,
+        data: Any,
+        params: Optional[List[Tuple[str, str]]],
+        headers: Optional[Dict[str, str]],
+        idempotent: bool,
+    ) -> httpx.Response:
+        """AI dev note: Executar com circuit breaker e retries com backoff
+        
+        Não idempotentes só repetem quando o pedido nem chegou a ser enviado.
+        """
+        table = endpoint.split("?", 1)[0]
+        breaker = self._breaker(table)
+        max_attempts = settings.supabase_retry_max_attempts
+        
+        for attempt in range(max_attempts):
+            deadline.check()
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                SUPABASE_ERRORS.labels(table, method, "circuit_open").inc()
+                raise
+            retry_after = None
+            try:
+                if method == "GET" and settings.supabase_hedge_enabled:
+                    response = await self._hedged_dispatch(table, method, endpoint, params, headers)
+                else:
+                    response = await self._dispatch(table, method, endpoint, data, params, headers)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                if attempt + 1 >= max_attempts or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                    raise
             else:
-                raise ValueError(f"Método {method} não suportado")
+                if response.status_code not in RETRYABLE_STATUS and response.status_code < 500:
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                breaker.record_failure()
+                if not idempotent or response.status_code not in RETRYABLE_STATUS or attempt + 1 >= max_attempts:
+                    response.raise_for_status()
+                retry_after = response.headers.get("retry-after")
             
-            response.raise_for_status()
-            return response.json() if response.content else {}
+            self._retries_total += 1
+            delay = backoff_delay(attempt, settings.supabase_retry_backoff_base, settings.supabase_retry_backoff_max)
+            if retry_after and retry_after.isdigit():
+                delay = min(max(delay, float(retry_after)), settings.supabase_retry_backoff_max)
+            left = deadline.remaining()
+            if left is not None and left <= delay:
+                # Não vale a pena esperar por uma tentativa que não cabe no prazo
+                raise deadline.DeadlineExceeded()
+            await asyncio.sleep(delay)
+        
+        raise RuntimeError("unreachable")
+    
+    def _hedge_delay(self, table: str) -> Optional[float]:
+        """AI dev note: Atraso antes do pedido de hedge (fixo ou p95 observado da tabela)"""
+        if settings.supabase_hedge_delay_ms is not None:
+            return settings.supabase_hedge_delay_ms / 1000
+        tracker = self._latencies[table]
+        if len(tracker) < settings.supabase_hedge_min_samples:
+            return None
+        return tracker.percentile(0.95)
+    
+    async def _hedged_dispatch(
+        self,
+        table: str,
+        method: str,
+        endpoint: str,
+        params: Optional[List[Tuple[str, str]]],
+        headers: Optional[Dict[str, str]],
+    ) -> httpx.Response:
+        """AI dev note: GET com hedge: dispara uma segunda cópia se a primeira passar do p95"""
+        first = asyncio.ensure_future(self._dispatch(table, method, endpoint, None, params, headers))
+        delay = self._hedge_delay(table)
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        
+        self._hedged_total += 1
+        second = asyncio.ensure_future(self._dispatch(table, method, endpoint, None, params, headers))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _request_timeout(self) -> Any:
+        """AI dev note: Timeouts do cliente limitados pelo deadline da requisição atual"""
+        left = deadline.remaining()
+        if left is None:
+            return httpx.USE_CLIENT_DEFAULT
+        if left <= 0:
+            raise deadline.DeadlineExceeded()
+        return httpx.Timeout(
+            connect=min(self._timeout.connect, left),
+            read=min(self._timeout.read, left),
+            write=min(self._timeout.write, left),
+            pool=min(self._timeout.pool, left),
+        )
+    
+    async def _dispatch(
+        self,
+        table: str,
+        method: str,
+        endpoint: str,
+        data: Any,
+        params: Optional[List[Tuple[str, str]]],
+        headers: Optional[Dict[str, str]],
+    ) -> httpx.Response:
+        """AI dev note: Executar uma única requisição HTTP no cliente compartilhado"""
+        # AI dev note: default=str cobre UUID/datetime vindos dos schemas Pydantic
+        content = json.dumps(data, default=str) if data is not None else None
+        self._in_flight += 1
+        self._requests_total += 1
+        timeout = self._request_timeout()
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, endpoint, content=content, params=params, headers=headers, timeout=timeout
+            )
+        except httpx.TimeoutException as e:
+            SUPABASE_ERRORS.labels(table, method, "timeout").inc()
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                raise deadline.DeadlineExceeded() from e
+            raise
+        except httpx.TransportError:
+            SUPABASE_ERRORS.labels(table, method, "transport").inc()
+            raise
+        finally:
+            self._in_flight -= 1
+        elapsed = time.perf_counter() - started
+        self._latencies[table].record(elapsed)
+        SUPABASE_REQUEST_DURATION.labels(table, method).observe(elapsed)
+        if response.status_code >= 400:
+            SUPABASE_ERRORS.labels(table, method, str(response.status_code)).inc()
+        return response
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Any = None,
+        params: Optional[List[Tuple[str, str]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: Optional[bool] = None,
+    ) -> Any:
+        """AI dev note: Fazer requisição para a API do Supabase"""
+        response = await self._send(method, endpoint, data, params=params, headers=headers, idempotent=idempotent)
+        return response.json() if response.content else {}
+    
+    async def _write(
+        self,
+        method: str,
+        endpoint: str,
+        data: Any = None,
+        params: Optional[List[Tuple[str, str]]] = None,
+        returning: ReturnMode = "representation",
+        prefer: Optional[str] = None,
+        idempotent: Optional[bool] = None,
+    ) -> WriteResult:
+        """AI dev note: Escrita com modo de retorno por chamada e contagem via Content-Range
+        
+        count=exact faz o PostgREST informar as linhas afetadas no Content-Range
+        mesmo quando o corpo não é devolvido (return=minimal/headers-only).
+        """
+        headers = {"Prefer": ",".join(filter(None, (prefer, f"return={returning}", "count=exact")))}
+        response = await self._send(method, endpoint, data, params=params, headers=headers, idempotent=idempotent)
+        rows = response.json() if returning == "representation" and response.content else []
+        count = parse_content_range_count(response.headers.get("content-range"))
+        if count is None and returning == "representation":
+            count = len(rows)
+        return WriteResult(rows, count, response.headers.get("location"))
+    
+    async def _update(
+        self,
+        table: str,
+        filters: List[Tuple[str, str]],
+        data: Dict[str, Any],
+        returning: ReturnMode = "representation",
+    ) -> WriteResult:
+        """AI dev note: PATCH nas linhas filtradas (atualização parcial, inclusive em massa)"""
+        return await self._write("PATCH", table, data, params=filters, returning=returning, idempotent=True)
+    
+    async def _delete(self, table: str, filters: List[Tuple[str, str]]) -> int:
+        """AI dev note: DELETE sem corpo de resposta; devolve quantas linhas foram removidas"""
+        result = await self._write("DELETE", table, params=filters, returning="minimal")
+        return result.count or 0
+    
+    async def _upsert(
+        self, table: str, data: Any, on_conflict: str, returning: ReturnMode = "representation"
+    ) -> List[Dict[str, Any]]:
+        """AI dev note: Upsert nativo do PostgREST em um único round trip
+        
+        Requer constraint UNIQUE na(s) coluna(s) de on_conflict. Aceita um
+        objeto ou uma lista de objetos.
+        """
+        result = await self._write(
+            "POST",
+            table,
+            data,
+            params=[("on_conflict", on_conflict)],
+            returning=returning,
+            prefer="resolution=merge-duplicates",
+            idempotent=True,
+        )
+        return result.rows
+    
+    async def _count(self, table: str, filters: List[Tuple[str, str]], count: str) -> Optional[int]:
+        """AI dev note: Contar linhas via HEAD + Prefer: count= (sem trafegar corpo)"""
+        response = await self._send("HEAD", table, params=filters, headers={"Prefer": f"count={count}"})
+        return parse_content_range_total(response.headers.get("content-range"))
+    
+    async def _get_page(
+        self,
+        table: str,
+        filters: List[Tuple[str, str]],
+        order: OrderColumns,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None,
+        select: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """AI dev note: Página keyset: order + limit + filtro após o cursor
+        
+        A ordenação deve terminar em uma coluna única (id) para ser estável.
+        Busca limit + 1 linhas para saber se existe próxima página.
+        """
+        params = list(filters) + (_select(select) or [])
+        if cursor:
+            params.append(("or", keyset_filter(order, decode_cursor(cursor, len(order)))))
+        params.append(("order", order_param(order)))
+        params.append(("limit", str(limit + 1)))
+        
+        total_count = None
+        if count and cursor:
+            # O filtro do cursor reduziria o total; contar só com os filtros base
+            response, total_count = await asyncio.gather(
+                self._send("GET", table, params=params),
+                self._count(table, filters, count),
+            )
+        elif count:
+            response = await self._send("GET", table, params=params, headers={"Prefer": f"count={count}"})
+            total_count = parse_content_range_total(response.headers.get("content-range"))
+        else:
+            response = await self._send("GET", table, params=params)
+        
+        rows = response.json() if response.content else []
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][col] for col, _ in order])
+        return {"items": rows, "next_cursor": next_cursor, "total_count": total_count}
+    
+    async def _iter_pages(
+        self,
+        table: str,
+        filters: List[Tuple[str, str]],
+        order: OrderColumns,
+        page_size: int,
+        select: Optional[str] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """AI dev note: Percorrer uma consulta inteira em blocos via header Range
+        
+        A próxima página é buscada enquanto a atual é consumida, mantendo no
+        máximo dois blocos em memória.
+        """
+        params = list(filters) + (_select(select) or []) + [("order", order_param(order))]
+        
+        async def fetch(start: int) -> List[Dict[str, Any]]:
+            headers = {"Range-Unit": "items", "Range": f"{start}-{start + page_size - 1}"}
+            response = await self._send("GET", table, params=params, headers=headers)
+            return response.json() if response.content else []
+        
+        start = 0
+        pending = asyncio.ensure_future(fetch(start))
+        try:
+            while True:
+                rows = await pending
+                if len(rows) < page_size:
+                    if rows:
+                        yield rows
+                    return
+                start += page_size
+                pending = asyncio.ensure_future(fetch(start))
+                yield rows
+        finally:
+            if not pending.done():
+                pending.cancel()
+    
+    async def get_by_ids(
+        self, table: str, ids: List[str], select: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """AI dev note: Buscar várias linhas por ID em uma única consulta id=in.(...)"""
+        if not ids:
+            return []
+        values = ",".join(_quote(value) for value in ids)
+        params = [("id", f"in.({values})")] + (_select(select) or [])
+        return await self._make_request("GET", table, params=params)
     
     # Métodos para Contas
     async def create_conta(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -49,32 +583,47 @@ class SupabaseService:
         result = await self._make_request("POST", "contas", data)
         return result[0] if result else None
     
-    async def get_conta_by_id(self, conta_id: str) -> Optional[Dict[str, Any]]:
+    async def get_conta_by_id(self, conta_id: str, select: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter conta por ID"""
-        result = await self._make_request("GET", f"contas?id=eq.{conta_id}")
+        result = await self._make_request("GET", f"contas?id=eq.{conta_id}", params=_select(select))
         return result[0] if result else None
     
-    async def get_conta_by_documento(self, documento: str) -> Optional[Dict[str, Any]]:
+    async def get_conta_by_documento(self, documento: str, select: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter conta por documento"""
-        result = await self._make_request("GET", f"contas?documento=eq.{documento}")
+        result = await self._make_request("GET", f"contas?documento=eq.{documento}", params=_select(select))
         return result[0] if result else None
     
-    async def get_all_contas(self) -> List[Dict[str, Any]]:
+    async def get_all_contas(self, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter todas as contas"""
-        return await self._make_request("GET", "contas")
+        return await self._make_request("GET", "contas", params=_select(select))
+    
+    async def get_contas_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None,
+        select: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """AI dev note: Obter página de contas (ordem de criação)"""
+        return await self._get_page("contas", [], CONTAS_ORDER, limit, cursor, count, select)
+    
+    def iter_contas(self, page_size: int, select: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """AI dev note: Percorrer todas as contas em blocos (exportação)"""
+        return self._iter_pages("contas", [], CONTAS_ORDER, page_size, select)
+    
+    async def upsert_conta(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """AI dev note: Criar ou atualizar conta pela chave natural documento"""
+        result = await self._upsert("contas", data, "documento")
+        return result[0] if result else None
     
     async def update_conta(self, conta_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar conta"""
-        result = await self._make_request("PUT", f"contas?id=eq.{conta_id}", data)
-        return result[0] if result else None
+        result = await self._update("contas", [("id", f"eq.{conta_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_conta(self, conta_id: str) -> bool:
         """AI dev note: Deletar conta"""
-        try:
-            await self._make_request("DELETE", f"contas?id=eq.{conta_id}")
-            return True
-        except:
-            return False
+        return await self._delete("contas", [("id", f"eq.{conta_id}")]) > 0
     
     # Métodos para Corretores
     async def create_corretor(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -82,27 +631,28 @@ class SupabaseService:
         result = await self._make_request("POST", "corretores", data)
         return result[0] if result else None
     
-    async def get_corretor_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    async def get_corretor_by_email(self, email: str, select: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter corretor por email"""
-        result = await self._make_request("GET", f"corretores?email=eq.{email}")
+        result = await self._make_request("GET", f"corretores?email=eq.{email}", params=_select(select))
+        return result[0] if result else None
+    
+    async def upsert_corretor(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """AI dev note: Criar ou atualizar corretor pela chave natural email"""
+        result = await self._upsert("corretores", data, "email")
         return result[0] if result else None
     
-    async def get_corretores_by_conta(self, conta_id: str) -> List[Dict[str, Any]]:
+    async def get_corretores_by_conta(self, conta_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter corretores de uma conta"""
-        return await self._make_request("GET", f"corretores?conta_id=eq.{conta_id}")
+        return await self._make_request("GET", f"corretores?conta_id=eq.{conta_id}", params=_select(select))
     
     async def update_corretor(self, corretor_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar corretor"""
-        result = await self._make_request("PUT", f"corretores?id=eq.{corretor_id}", data)
-        return result[0] if result else None
+        result = await self._update("corretores", [("id", f"eq.{corretor_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_corretor(self, corretor_id: str) -> bool:
         """AI dev note: Deletar corretor"""
-        try:
-            await self._make_request("DELETE", f"corretores?id=eq.{corretor_id}")
-            return True
-        except:
-            return False
+        return await self._delete("corretores", [("id", f"eq.{corretor_id}")]) > 0
     
     # Métodos para Clientes
     async def create_cliente(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -110,27 +660,42 @@ class SupabaseService:
         result = await self._make_request("POST", "clientes", data)
         return result[0] if result else None
     
-    async def get_clientes_by_conta(self, conta_id: str) -> List[Dict[str, Any]]:
+    async def get_clientes_by_conta(self, conta_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter clientes de uma conta"""
-        return await self._make_request("GET", f"clientes?conta_id=eq.{conta_id}")
+        return await self._make_request("GET", f"clientes?conta_id=eq.{conta_id}", params=_select(select))
+    
+    async def get_clientes_by_conta_page(
+        self,
+        conta_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None,
+        select: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """AI dev note: Obter página de clientes de uma conta"""
+        filters = [("conta_id", f"eq.{conta_id}")]
+        return await self._get_page("clientes", filters, CLIENTES_ORDER, limit, cursor, count, select)
     
-    async def get_cliente_by_id(self, cliente_id: str) -> Optional[Dict[str, Any]]:
+    def iter_clientes_by_conta(
+        self, conta_id: str, page_size: int, select: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """AI dev note: Percorrer todos os clientes de uma conta em blocos (exportação)"""
+        filters = [("conta_id", f"eq.{conta_id}")]
+        return self._iter_pages("clientes", filters, CLIENTES_ORDER, page_size, select)
+    
+    async def get_cliente_by_id(self, cliente_id: str, select: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter cliente por ID"""
-        result = await self._make_request("GET", f"clientes?id=eq.{cliente_id}")
+        result = await self._make_request("GET", f"clientes?id=eq.{cliente_id}", params=_select(select))
         return result[0] if result else None
     
     async def update_cliente(self, cliente_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar cliente"""
-        result = await self._make_request("PUT", f"clientes?id=eq.{cliente_id}", data)
-        return result[0] if result else None
+        result = await self._update("clientes", [("id", f"eq.{cliente_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_cliente(self, cliente_id: str) -> bool:
         """AI dev note: Deletar cliente"""
-        try:
-            await self._make_request("DELETE", f"clientes?id=eq.{cliente_id}")
-            return True
-        except:
-            return False
+        return await self._delete("clientes", [("id", f"eq.{cliente_id}")]) > 0
     
     # Métodos para Conversas
     async def create_conversa(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -138,22 +703,137 @@ class SupabaseService:
         result = await self._make_request("POST", "conversas", data)
         return result[0] if result else None
     
-    async def get_conversas_by_cliente(self, cliente_id: str) -> List[Dict[str, Any]]:
+    async def get_conversas_by_cliente(self, cliente_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter conversas de um cliente"""
-        return await self._make_request("GET", f"conversas?cliente_id=eq.{cliente_id}")
+        return await self._make_request("GET", f"conversas?cliente_id=eq.{cliente_id}", params=_select(select))
+    
+    async def get_inbox_page(
+        self,
+        limit: int,
+        corretor_id: Optional[str] = None,
+        conta_id: Optional[str] = None,
+        status: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """AI dev note: Caixa de entrada de um corretor ou conta, sem N+1
+        
+        Uma consulta por faixa de prioridade: AGUARDANDO_CORRETOR e depois as
+        demais, ambas por timestamp_ultima_mensagem desc (nulos por último).
+        O nome do cliente (join !inner, que também aplica o escopo) e a última
+        mensagem vêm embutidos. O cursor é [faixa, timestamp, id]; a segunda
+        faixa só é consultada quando a primeira não completa a página.
+        """
+        if corretor_id:
+            scope = [("cliente.corretor_id", f"eq.{corretor_id}")]
+        elif conta_id:
+            scope = [("cliente.conta_id", f"eq.{conta_id}")]
+        else:
+            raise ValueError("Informe corretor_id ou conta_id")
+        
+        # AI dev note: Condição de cada faixa dentro de and(...); a segunda inclui status nulo,
+        # que neq sozinho descartaria
+        others = [value for value in status or [] if value != INBOX_PRIORITY_STATUS]
+        tiers: List[Optional[str]] = [None, None]
+        if status is None or INBOX_PRIORITY_STATUS in status:
+            tiers[0] = f"status_conversa.eq.{_quote(INBOX_PRIORITY_STATUS)}"
+        if status is None:
+            tiers[1] = f"or(status_conversa.neq.{_quote(INBOX_PRIORITY_STATUS)},status_conversa.is.null)"
+        elif others:
+            tiers[1] = "status_conversa.in.(" + ",".join(_quote(value) for value in others) + ")"
+        
+        after = decode_cursor(cursor, 3) if cursor else None
+        if after and after[0] not in (0, 1):
+            raise InvalidCursorError("Cursor inválido")
+        
+        rows: List[Dict[str, Any]] = []
+        for tier, status_filter in enumerate(tiers):
+            if status_filter is None or (after and tier < after[0]):
+                continue
+            conditions = [status_filter]
+            if after and tier == after[0]:
+                conditions.append("or" + keyset_filter_nulls_last("timestamp_ultima_mensagem", after[1], after[2]))
+            params = scope + [
+                ("and", "(" + ",".join(conditions) + ")"),
+                ("select", INBOX_SELECT),
+                ("order", "timestamp_ultima_mensagem.desc.nullslast,id.desc"),
+                ("limit", str(limit + 1 - len(rows))),
+                ("ultima_mensagem.order", "timestamp.desc,id.desc"),
+                ("ultima_mensagem.limit", "1"),
+            ]
+            for row in await self._make_request("GET", "conversas", params=params):
+                row["ultima_mensagem"] = row["ultima_mensagem"][0] if row["ultima_mensagem"] else None
+                rows.append(row)
+            if len(rows) > limit:
+                break
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            tier = 0 if last["status_conversa"] == INBOX_PRIORITY_STATUS else 1
+            next_cursor = encode_cursor([tier, last["timestamp_ultima_mensagem"], last["id"]])
+        return {"items": rows, "next_cursor": next_cursor, "total_count": None}
     
     async def update_conversa(self, conversa_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar conversa"""
-        result = await self._make_request("PUT", f"conversas?id=eq.{conversa_id}", data)
-        return result[0] if result else None
+        result = await self._update("conversas", [("id", f"eq.{conversa_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_conversa(self, conversa_id: str) -> bool:
         """AI dev note: Deletar conversa"""
-        try:
-            await self._make_request("DELETE", f"conversas?id=eq.{conversa_id}")
-            return True
-        except:
-            return False
+        return await self._delete("conversas", [("id", f"eq.{conversa_id}")]) > 0
+    
+    async def get_cliente_overview(
+        self, cliente_id: str, mensagens_limit: int, lembretes_limit: int, conversas_limit: int
+    ) -> Optional[Dict[str, Any]]:
+        """AI dev note: Visão 360 do cliente em um único round trip de latência
+        
+        Cliente, conversas, cauda de mensagens da conversa mais recente, dossiê
+        e lembretes são buscados em paralelo. A cauda vem embutida na consulta
+        da última conversa (mensagens.order/limit), então não depende do
+        resultado das conversas. Mensagens e conversas buscam limit + 1 para
+        saber se há mais. Lembretes concluídos ficam de fora; os pendentes vêm
+        do mais antigo (atrasados primeiro) ao mais distante.
+        """
+        conversa_order = "timestamp_ultima_mensagem.desc.nullslast,created_at.desc,id.desc"
+        ultima_params = [
+            ("cliente_id", f"eq.{cliente_id}"),
+            ("select", f"id,mensagens({MENSAGEM_COLUMNS_SEM_EMBEDDING})"),
+            ("order", conversa_order),
+            ("limit", "1"),
+            ("mensagens.order", "timestamp.desc,id.desc"),
+            ("mensagens.limit", str(mensagens_limit + 1)),
+        ]
+        cliente, conversas, ultima, dossie, lembretes = await asyncio.gather(
+            self.get_cliente_by_id(cliente_id),
+            self._make_request("GET", "conversas", params=[
+                ("cliente_id", f"eq.{cliente_id}"),
+                ("order", conversa_order),
+                ("limit", str(conversas_limit + 1)),
+            ]),
+            self._make_request("GET", "conversas", params=ultima_params),
+            self.get_dossie_by_cliente(cliente_id),
+            self._make_request("GET", "lembretes", params=[
+                ("cliente_id", f"eq.{cliente_id}"),
+                ("status", "neq.CONCLUIDO"),
+                ("order", "data_lembrete.asc,id.asc"),
+                ("limit", str(lembretes_limit)),
+            ]),
+        )
+        if not cliente:
+            return None
+        
+        tail = ultima[0]["mensagens"] if ultima else []
+        return {
+            "cliente": cliente,
+            "conversas": conversas[:conversas_limit],
+            "mais_conversas": len(conversas) > conversas_limit,
+            "ultima_conversa_id": ultima[0]["id"] if ultima else None,
+            "mensagens_recentes": list(reversed(tail[:mensagens_limit])),
+            "mais_mensagens": len(tail) > mensagens_limit,
+            "dossie": dossie,
+            "lembretes": lembretes,
+        }
     
     # Métodos para Mensagens
     async def create_mensagem(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -161,28 +841,275 @@ class SupabaseService:
         result = await self._make_request("POST", "mensagens", data)
         return result[0] if result else None
     
-    async def get_mensagens_by_conversa(self, conversa_id: str) -> List[Dict[str, Any]]:
+    async def get_mensagens_by_conversa(self, conversa_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter mensagens de uma conversa"""
-        return await self._make_request("GET", f"mensagens?conversa_id=eq.{conversa_id}&order=timestamp.asc")
+        return await self._make_request("GET", f"mensagens?conversa_id=eq.{conversa_id}&order=timestamp.asc", params=_select(select))
     
-    async def update_mensagem_embedding(self, mensagem_id: str, embedding: List[float]) -> Dict[str, Any]:
-        """AI dev note: Atualizar embedding de uma mensagem"""
-        data = {"embedding_vetorial": embedding}
-        result = await self._make_request("PUT", f"mensagens?id=eq.{mensagem_id}", data)
-        return result[0] if result else None
+    async def get_mensagens_by_conversa_page(
+        self,
+        conversa_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None,
+        select: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """AI dev note: Obter página de mensagens de uma conversa (cronológica)"""
+        filters = [("conversa_id", f"eq.{conversa_id}")]
+        return await self._get_page("mensagens", filters, MENSAGENS_ORDER, limit, cursor, count, select)
+    
+    async def create_mensagens_batch(self, items: List[Dict[str, Any]], chunk_size: int) -> Dict[str, Any]:
+        """AI dev note: Inserir mensagens em lote com POSTs de arrays
+        
+        Cada bloco é um INSERT atômico no PostgREST: se falhar, todos os itens
+        do bloco são reportados com erro e os demais blocos seguem (inclusive com
+        circuito aberto ou deadline esgotado no meio do lote). Ao final,
+        timestamp_ultima_mensagem é atualizado uma vez por conversa afetada, só
+        se avançar (replay de mensagens antigas não o faz voltar no tempo).
+        """
+        results: List[Dict[str, Any]] = []
+        latest: Dict[str, Tuple[datetime, str]] = {}
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            try:
+                rows = await self._make_request("POST", "mensagens", chunk)
+            except (httpx.HTTPError, CircuitOpenError, deadline.DeadlineExceeded) as e:
+                results.extend(
+                    {"indice": start + i, "sucesso": False, "mensagem": None, "erro": str(e)}
+                    for i in range(len(chunk))
+                )
+                continue
+            # PostgREST devolve as linhas na ordem do array enviado
+            for i, row in enumerate(rows):
+                results.append({"indice": start + i, "sucesso": True, "mensagem": row, "erro": None})
+                conversa_id, timestamp = str(row.get("conversa_id")), row.get("timestamp")
+                parsed = _parse_timestamp(timestamp)
+                if parsed is not None and (conversa_id not in latest or parsed > latest[conversa_id][0]):
+                    latest[conversa_id] = (parsed, timestamp)
+        
+        updates = await asyncio.gather(
+            *(
+                self._update(
+                    "conversas",
+                    [
+                        ("id", f"eq.{conversa_id}"),
+                        ("or", f"(timestamp_ultima_mensagem.is.null,timestamp_ultima_mensagem.lt.{_quote(timestamp)})"),
+                    ],
+                    {"timestamp_ultima_mensagem": timestamp},
+                    returning="minimal",
+                )
+                for conversa_id, (_, timestamp) in latest.items()
+            ),
+            return_exceptions=True,
+        )
+        conversas_atualizadas = 0
+        for conversa_id, outcome in zip(latest, updates):
+            if isinstance(outcome, Exception):
+                logger.warning("Falha ao atualizar timestamp da conversa %s: %s", conversa_id, outcome)
+            elif outcome.count:
+                # count 0: a conversa já tinha uma mensagem mais nova (ou não existe)
+                conversas_atualizadas += 1
+        
+        return {
+            "resultados": results,
+            "conversas_atualizadas": conversas_atualizadas,
+        }
+    
+    async def update_mensagem_embedding(self, mensagem_id: str, embedding: Any) -> Dict[str, Any]:
+        """AI dev note: Atualizar embedding de uma mensagem (e o índice local, se carregado)
+        
+        Aceita a lista de floats ou a forma binária {dtype, dim, data} dos endpoints.
+        """
+        vector = decode_embedding(embedding) if isinstance(embedding, dict) else embedding
+        data = {"embedding_vetorial": parse_vector(vector)}
+        result = await self._update("mensagens", [("id", f"eq.{mensagem_id}")], data)
+        row = result.rows[0] if result.rows else None
+        if row and self._vector_index.loaded:
+            try:
+                self._vector_index.add(row["id"], row["conversa_id"], vector)
+            except ValueError as e:
+                logger.warning("Embedding da mensagem %s fora do índice local: %s", mensagem_id, e)
+        return row
     
     async def update_mensagem(self, mensagem_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar mensagem"""
-        result = await self._make_request("PUT", f"mensagens?id=eq.{mensagem_id}", data)
-        return result[0] if result else None
+        result = await self._update("mensagens", [("id", f"eq.{mensagem_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_mensagem(self, mensagem_id: str) -> bool:
         """AI dev note: Deletar mensagem"""
-        try:
-            await self._make_request("DELETE", f"mensagens?id=eq.{mensagem_id}")
-            return True
-        except:
-            return False
+        deleted = await self._delete("mensagens", [("id", f"eq.{mensagem_id}")]) > 0
+        if deleted:
+            self._vector_index.remove(mensagem_id)
+        return deleted
+    
+    async def get_mensagens_sem_embedding(self, limit: int) -> List[Dict[str, Any]]:
+        """AI dev note: Mensagens mais antigas ainda sem embedding_vetorial (fila do worker)"""
+        return await self._make_request("GET", "mensagens", params=[
+            ("embedding_vetorial", "is.null"),
+            ("select", "id,conversa_id,conteudo_texto"),
+            ("order", "timestamp.asc,id.asc"),
+            ("limit", str(limit)),
+        ])
+    
+    async def update_mensagens_embeddings(self, items: List[Dict[str, Any]]) -> EmbeddingWriteResult:
+        """AI dev note: Gravar embeddings de várias mensagens em massa
+        
+        Usa a RPC settings.embedding_update_rpc_name (um UPDATE ... FROM
+        jsonb_array_elements) quando o banco a expõe; senão, um PATCH por linha
+        com no máximo settings.embedding_update_concurrency em voo, e a falha de
+        uma linha não derruba as demais. Só embedding_vetorial é escrito e nunca
+        há INSERT: edições feitas entre a leitura e a gravação são preservadas e
+        mensagens apagadas não voltam. items traz id, conversa_id e
+        embedding_vetorial; o índice local recebe só as linhas gravadas.
+        """
+        if not items:
+            return EmbeddingWriteResult([], [], None)
+        result: Optional[EmbeddingWriteResult] = None
+        if time.monotonic() >= self._embedding_rpc_retry_at:
+            try:
+                rows = await self._make_request("POST", f"rpc/{settings.embedding_update_rpc_name}", {
+                    "items": [
+                        {"id": item["id"], "embedding_vetorial": parse_vector(item["embedding_vetorial"])}
+                        for item in items
+                    ],
+                }, idempotent=True)
+                result = EmbeddingWriteResult([str(row["id"]) for row in rows], [], None)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    raise
+                self._embedding_rpc_retry_at = time.monotonic() + settings.search_rpc_retry_seconds
+                logger.info("RPC %s indisponível; gravando embeddings linha a linha", settings.embedding_update_rpc_name)
+        if result is None:
+            result = await self._update_embeddings_per_row(items)
+        
+        if self._vector_index.loaded:
+            updated = set(result.updated)
+            for item in items:
+                if item["id"] in updated:
+                    self._vector_index.add(item["id"], item["conversa_id"], item["embedding_vetorial"])
+        return result
+    
+    async def _update_embeddings_per_row(self, items: List[Dict[str, Any]]) -> EmbeddingWriteResult:
+        """AI dev note: Fallback sem a RPC: PATCH por linha com concorrência limitada"""
+        semaphore = asyncio.Semaphore(settings.embedding_update_concurrency)
+        
+        async def write(item: Dict[str, Any]) -> WriteResult:
+            async with semaphore:
+                return await self._update(
+                    "mensagens",
+                    [("id", f"eq.{item['id']}")],
+                    {"embedding_vetorial": item["embedding_vetorial"]},
+                    returning="minimal",
+                )
+        
+        results = await asyncio.gather(*(write(item) for item in items), return_exceptions=True)
+        updated, failed, error = [], [], None
+        for item, outcome in zip(items, results):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                failed.append(item["id"])
+                error = error or outcome
+            elif outcome.count:
+                updated.append(item["id"])
+        return EmbeddingWriteResult(updated, failed, error)
+    
+    # Busca semântica de mensagens
+    @staticmethod
+    def _new_vector_index() -> VectorIndex:
+        return VectorIndex(nprobe=settings.search_ivf_nprobe, ivf_min_size=settings.search_ivf_min_size)
+    
+    async def _load_vector_index(self) -> VectorIndex:
+        """AI dev note: Índice local carregado sob demanda e recarregado após search_index_max_age_seconds
+        
+        Cada worker tem o seu; as escritas deste processo o atualizam na hora e
+        a recarga periódica traz as feitas por outros processos.
+        """
+        max_age = settings.search_index_max_age_seconds
+        
+        def fresh(index: VectorIndex) -> bool:
+            return index.loaded and (max_age <= 0 or index.age() < max_age)
+        
+        if fresh(self._vector_index):
+            return self._vector_index
+        async with self._vector_index_lock:
+            if fresh(self._vector_index):
+                return self._vector_index
+            index = self._new_vector_index()
+            pages = self._iter_pages(
+                "mensagens",
+                [("embedding_vetorial", "not.is.null")],
+                MENSAGENS_ORDER,
+                settings.stream_page_size,
+                "id,conversa_id,embedding_vetorial",
+            )
+            skipped = 0
+            async for rows in pages:
+                for row in rows:
+                    try:
+                        index.add(row["id"], row["conversa_id"], row["embedding_vetorial"])
+                    except ValueError:
+                        skipped += 1
+            if skipped:
+                logger.warning("%d embeddings com dimensão diferente ficaram fora do índice local", skipped)
+            index.mark_loaded()
+            index.schedule_training()
+            self._vector_index = index
+            return index
+    
+    async def _scope_conversa_ids(self, cliente_id: Optional[str], conta_id: Optional[str]) -> List[str]:
+        """AI dev note: Conversas de um cliente ou de uma conta (escopo da busca local)"""
+        if cliente_id:
+            params = [("cliente_id", f"eq.{cliente_id}"), ("select", "id")]
+        else:
+            params = [("select", "id,cliente:clientes!inner(id)"), ("cliente.conta_id", f"eq.{conta_id}")]
+        rows = await self._make_request("GET", "conversas", params=params)
+        return [row["id"] for row in rows]
+    
+    async def search_mensagens(
+        self,
+        embedding: Any,
+        k: int,
+        cliente_id: Optional[str] = None,
+        conta_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """AI dev note: Top-k mensagens mais similares ao vetor, no escopo de um cliente ou conta
+        
+        Usa a RPC do pgvector (settings.search_rpc_name) quando o banco a expõe.
+        Se ela não existir (404), usa o índice local e só volta a tentá-la após
+        settings.search_rpc_retry_seconds.
+        O vetor pode vir em lista ou na forma binária {dtype, dim, data}.
+        """
+        if not cliente_id and not conta_id:
+            raise ValueError("Informe cliente_id ou conta_id")
+        if isinstance(embedding, dict):
+            embedding = decode_embedding(embedding)
+        
+        if time.monotonic() >= self._search_rpc_retry_at:
+            try:
+                return await self._make_request("POST", f"rpc/{settings.search_rpc_name}", {
+                    "query_embedding": parse_vector(embedding),
+                    "match_count": k,
+                    "filter_cliente_id": cliente_id,
+                    "filter_conta_id": conta_id,
+                })
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    raise
+                self._search_rpc_retry_at = time.monotonic() + settings.search_rpc_retry_seconds
+                logger.info("RPC %s indisponível; usando índice vetorial local", settings.search_rpc_name)
+        
+        index, conversa_ids = await asyncio.gather(
+            self._load_vector_index(), self._scope_conversa_ids(cliente_id, conta_id)
+        )
+        # Treino do IVF (se devido) roda numa thread; até lá a busca é exata
+        index.schedule_training()
+        hits = index.search(embedding, k, conversa_ids)
+        if not hits:
+            return []
+        rows = await self.get_by_ids("mensagens", [mensagem_id for mensagem_id, _ in hits], MENSAGEM_COLUMNS_SEM_EMBEDDING)
+        by_id = {row["id"]: row for row in rows}
+        return [{**by_id[mensagem_id], "similaridade": score} for mensagem_id, score in hits if mensagem_id in by_id]
     
     # Métodos para Dossiês IA
     async def create_or_update_dossie(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -191,35 +1118,51 @@ class SupabaseService:
         if not cliente_id:
             raise ValueError("cliente_id é obrigatório")
         
-        # Verificar se já existe
-        existing = await self._make_request("GET", f"dossies_ia?cliente_id=eq.{cliente_id}")
-        
-        if existing:
-            # Atualizar
-            result = await self._make_request("PUT", f"dossies_ia?cliente_id=eq.{cliente_id}", data)
-        else:
-            # Criar
-            result = await self._make_request("POST", "dossies_ia", data)
-        
+        # Upsert atômico: um dossiê por cliente (UNIQUE em cliente_id)
+        result = await self._upsert("dossies_ia", data, "cliente_id")
         return result[0] if result else None
     
-    async def get_dossie_by_cliente(self, cliente_id: str) -> Optional[Dict[str, Any]]:
+    async def get_dossie_by_cliente(self, cliente_id: str, select: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter dossiê de um cliente"""
-        result = await self._make_request("GET", f"dossies_ia?cliente_id=eq.{cliente_id}")
+        result = await self._make_request("GET", f"dossies_ia?cliente_id=eq.{cliente_id}", params=_select(select))
         return result[0] if result else None
     
+    async def get_mensagens_cliente_desde(
+        self,
+        cliente_id: str,
+        after: Optional[Tuple[str, Optional[str]]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """AI dev note: Mensagens de todas as conversas do cliente posteriores à marca d'água
+        
+        after é o par (timestamp, id) da última mensagem já lida, seja a marca
+        d'água do dossiê ou a última linha da página anterior (None = histórico
+        inteiro). Mensagens com o mesmo timestamp e id maior ainda entram. Sem
+        id (dossiê anterior à marca com id) vale só timestamp > after[0].
+        """
+        params = [
+            ("select", "id,conversa_id,remetente,conteudo_texto,timestamp,conversa:conversas!inner(id)"),
+            ("conversa.cliente_id", f"eq.{cliente_id}"),
+            ("order", order_param(MENSAGENS_ORDER)),
+            ("limit", str(limit)),
+        ]
+        if after and after[1] is not None:
+            params.append(("or", keyset_filter(MENSAGENS_ORDER, after)))
+        elif after:
+            params.append(("timestamp", f"gt.{after[0]}"))
+        rows = await self._make_request("GET", "mensagens", params=params)
+        for row in rows:
+            row.pop("conversa", None)
+        return rows
+    
     async def update_dossie(self, dossie_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar dossiê IA"""
-        result = await self._make_request("PUT", f"dossies_ia?id=eq.{dossie_id}", data)
-        return result[0] if result else None
+        result = await self._update("dossies_ia", [("id", f"eq.{dossie_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_dossie(self, dossie_id: str) -> bool:
         """AI dev note: Deletar dossiê IA"""
-        try:
-            await self._make_request("DELETE", f"dossies_ia?id=eq.{dossie_id}")
-            return True
-        except:
-            return False
+        return await self._delete("dossies_ia", [("id", f"eq.{dossie_id}")]) > 0
     
     # Métodos para Lembretes
     async def create_lembrete(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -227,22 +1170,30 @@ class SupabaseService:
         result = await self._make_request("POST", "lembretes", data)
         return result[0] if result else None
     
-    async def get_lembretes_by_corretor(self, corretor_id: str) -> List[Dict[str, Any]]:
+    async def get_lembretes_by_corretor(self, corretor_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter lembretes de um corretor"""
-        return await self._make_request("GET", f"lembretes?corretor_id=eq.{corretor_id}&order=data_lembrete.asc")
+        return await self._make_request("GET", f"lembretes?corretor_id=eq.{corretor_id}&order=data_lembrete.asc", params=_select(select))
+    
+    async def get_lembretes_by_corretor_page(
+        self,
+        corretor_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None,
+        select: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """AI dev note: Obter página de lembretes de um corretor (por data)"""
+        filters = [("corretor_id", f"eq.{corretor_id}")]
+        return await self._get_page("lembretes", filters, LEMBRETES_ORDER, limit, cursor, count, select)
     
     async def update_lembrete(self, lembrete_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar lembrete"""
-        result = await self._make_request("PUT", f"lembretes?id=eq.{lembrete_id}", data)
-        return result[0] if result else None
+        result = await self._update("lembretes", [("id", f"eq.{lembrete_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_lembrete(self, lembrete_id: str) -> bool:
         """AI dev note: Deletar lembrete"""
-        try:
-            await self._make_request("DELETE", f"lembretes?id=eq.{lembrete_id}")
-            return True
-        except:
-            return False
+        return await self._delete("lembretes", [("id", f"eq.{lembrete_id}")]) > 0
     
     # Métodos para Assinaturas
     async def create_assinatura(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -250,23 +1201,19 @@ class SupabaseService:
         result = await self._make_request("POST", "assinaturas", data)
         return result[0] if result else None
     
-    async def get_assinatura_by_conta(self, conta_id: str) -> Optional[Dict[str, Any]]:
+    async def get_assinatura_by_conta(self, conta_id: str, select: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter assinatura de uma conta"""
-        result = await self._make_request("GET", f"assinaturas?conta_id=eq.{conta_id}")
+        result = await self._make_request("GET", f"assinaturas?conta_id=eq.{conta_id}", params=_select(select))
         return result[0] if result else None
     
     async def update_assinatura(self, assinatura_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar assinatura"""
-        result = await self._make_request("PUT", f"assinaturas?id=eq.{assinatura_id}", data)
-        return result[0] if result else None
+        result = await self._update("assinaturas", [("id", f"eq.{assinatura_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_assinatura(self, assinatura_id: str) -> bool:
         """AI dev note: Deletar assinatura"""
-        try:
-            await self._make_request("DELETE", f"assinaturas?id=eq.{assinatura_id}")
-            return True
-        except:
-            return False
+        return await self._delete("assinaturas", [("id", f"eq.{assinatura_id}")]) > 0
     
     # Métodos para Faturas
     async def create_fatura(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -274,22 +1221,18 @@ class SupabaseService:
         result = await self._make_request("POST", "faturas", data)
         return result[0] if result else None
     
-    async def get_faturas_by_assinatura(self, assinatura_id: str) -> List[Dict[str, Any]]:
+    async def get_faturas_by_assinatura(self, assinatura_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter faturas de uma assinatura"""
-        return await self._make_request("GET", f"faturas?assinatura_id=eq.{assinatura_id}&order=data_vencimento.desc")
+        return await self._make_request("GET", f"faturas?assinatura_id=eq.{assinatura_id}&order=data_vencimento.desc", params=_select(select))
     
     async def update_fatura(self, fatura_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar fatura"""
-        result = await self._make_request("PUT", f"faturas?id=eq.{fatura_id}", data)
-        return result[0] if result else None
+        result = await self._update("faturas", [("id", f"eq.{fatura_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_fatura(self, fatura_id: str) -> bool:
         """AI dev note: Deletar fatura"""
-        try:
-            await self._make_request("DELETE", f"faturas?id=eq.{fatura_id}")
-            return True
-        except:
-            return False
+        return await self._delete("faturas", [("id", f"eq.{fatura_id}")]) > 0
     
     # Métodos para Conexões Externas
     async def create_conexao_externa(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -297,45 +1240,79 @@ class SupabaseService:
         result = await self._make_request("POST", "conexoes_externas", data)
         return result[0] if result else None
     
-    async def get_conexoes_by_conta(self, conta_id: str) -> List[Dict[str, Any]]:
+    async def get_conexoes_by_conta(self, conta_id: str, select: Optional[str] = None) -> List[Dict[str, Any]]:
         """AI dev note: Obter conexões de uma conta"""
-        return await self._make_request("GET", f"conexoes_externas?conta_id=eq.{conta_id}")
+        return await self._make_request("GET", f"conexoes_externas?conta_id=eq.{conta_id}", params=_select(select))
     
     async def update_conexao_externa(self, conexao_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar conexão externa"""
-        result = await self._make_request("PUT", f"conexoes_externas?id=eq.{conexao_id}", data)
-        return result[0] if result else None
+        result = await self._update("conexoes_externas", [("id", f"eq.{conexao_id}")], data)
+        return result.rows[0] if result.rows else None
     
     async def delete_conexao_externa(self, conexao_id: str) -> bool:
         """AI dev note: Deletar conexão externa"""
-        try:
-            await self._make_request("DELETE", f"conexoes_externas?id=eq.{conexao_id}")
-            return True
-        except:
-            return False
+        return await self._delete("conexoes_externas", [("id", f"eq.{conexao_id}")]) > 0
     
     # Métodos para Planos
+    async def _load_planos(self) -> Dict[int, Dict[str, Any]]:
+        """AI dev note: Carregar a tabela de planos inteira indexada por ID"""
+        results = await self._make_request("GET", "planos")
+        return {plano["id"]: plano for plano in results}
+    
+    async def _get_planos_snapshot(self) -> Dict[int, Dict[str, Any]]:
+        """AI dev note: Planos do cache (read-through com TTL)"""
+        return await self._planos_cache.get_or_load("planos", self._load_planos)
+    
+    async def refresh_planos_cache(self) -> int:
+        """AI dev note: Recarregar o cache de planos manualmente"""
+        self._planos_cache.invalidate()
+        planos = await self._get_planos_snapshot()
+        return len(planos)
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """AI dev note: Retries, hedges e estado dos circuitos por tabela"""
+        return {
+            "retries_total": self._retries_total,
+            "hedged_total": self._hedged_total,
+            "circuits": {table: breaker.stats() for table, breaker in self._breakers.items()},
+            "p95_seconds": {table: tracker.percentile(0.95) for table, tracker in self._latencies.items()},
+        }
+    
+    def get_singleflight_stats(self) -> Dict[str, int]:
+        """AI dev note: Estatísticas de coalescência de leituras"""
+        if self._singleflight is None:
+            return {"in_flight": 0, "leaders": 0, "coalesced": 0}
+        return self._singleflight.stats()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """AI dev note: Estatísticas dos caches em memória"""
+        return {"planos": self._planos_cache.stats()}
+    
     async def get_planos_ativos(self) -> List[Dict[str, Any]]:
         """AI dev note: Obter planos ativos"""
-        return await self._make_request("GET", "planos?is_ativo=eq.true")
+        planos = await self._get_planos_snapshot()
+        return [dict(plano) for plano in planos.values() if plano.get("is_ativo")]
     
     async def get_plano_by_id(self, plano_id: int) -> Optional[Dict[str, Any]]:
         """AI dev note: Obter plano por ID"""
-        result = await self._make_request("GET", f"planos?id=eq.{plano_id}")
-        return result[0] if result else None
+        planos = await self._get_planos_snapshot()
+        plano = planos.get(plano_id)
+        return dict(plano) if plano else None
     
     async def update_plano(self, plano_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """AI dev note: Atualizar plano"""
-        result = await self._make_request("PUT", f"planos?id=eq.{plano_id}", data)
-        return result[0] if result else None
+        try:
+            result = await self._update("planos", [("id", f"eq.{plano_id}")], data)
+        finally:
+            self._planos_cache.invalidate()
+        return result.rows[0] if result.rows else None
     
     async def delete_plano(self, plano_id: int) -> bool:
         """AI dev note: Deletar plano"""
         try:
-            await self._make_request("DELETE", f"planos?id=eq.{plano_id}")
-            return True
-        except:
-            return False
+            return await self._delete("planos", [("id", f"eq.{plano_id}")]) > 0
+        finally:
+            self._planos_cache.invalidate()
 
 
 # Instância global do serviço
@@ -0,0 +1,5 @@
+# AI dev note: Ferramentas de teste e benchmark (backend Supabase em memória)
+
+from app.testing.fake_postgrest import FakePostgrest, PostgrestError
+
+__all__ = ["FakePostgrest", "PostgrestError"]
@@ -0,0 +1,608 @@
+# AI dev note: Backend PostgREST falso em memória para testes e benchmarks
+# Implementa o subconjunto da API usado pelo SupabaseService como transporte httpx
+
+import asyncio
+import json
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import cmp_to_key
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+# AI dev note: Tabelas do schema do Guido
+TABLES = (
+    "contas", "corretores", "clientes", "conversas", "mensagens", "lembretes",
+    "dossies_ia", "assinaturas", "faturas", "conexoes_externas", "planos",
+)
+
+# AI dev note: Chaves estrangeiras (tabela -> coluna -> tabela referenciada), usadas no embedding
+FOREIGN_KEYS: Dict[str, Dict[str, str]] = {
+    "corretores": {"conta_id": "contas"},
+    "clientes": {"conta_id": "contas", "corretor_id": "corretores"},
+    "conversas": {"cliente_id": "clientes"},
+    "mensagens": {"conversa_id": "conversas"},
+    "lembretes": {"corretor_id": "corretores", "cliente_id": "clientes"},
+    "dossies_ia": {"cliente_id": "clientes"},
+    "assinaturas": {"conta_id": "contas", "plano_id": "planos"},
+    "faturas": {"assinatura_id": "assinaturas"},
+    "conexoes_externas": {"conta_id": "contas"},
+}
+
+# AI dev note: Constraints UNIQUE além da chave primária id
+UNIQUE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "contas": ("documento",),
+    "corretores": ("email",),
+    "dossies_ia": ("cliente_id",),
+}
+
+# AI dev note: Colunas com valor padrão no banco
+TIMESTAMP_DEFAULTS: Dict[str, Tuple[str, ...]] = {
+    "contas": ("data_criacao",),
+    "clientes": ("data_criacao",),
+    "mensagens": ("timestamp",),
+    "dossies_ia": ("ultima_atualizacao",),
+}
+NULL_DEFAULTS: Dict[str, Tuple[str, ...]] = {
+    "mensagens": ("embedding_vetorial",),
+    "conversas": ("timestamp_ultima_mensagem",),
+    "clientes": ("corretor_id", "telefone", "email", "status_funil"),
+    "lembretes": ("cliente_id",),
+    "dossies_ia": ("ultima_mensagem_id",),
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "in", "is"}
+
+
+class PostgrestError(Exception):
+    """AI dev note: Erro no formato de resposta do PostgREST"""
+    
+    def __init__(self, status: int, message: str, code: str = "PGRST100"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _split_top(text: str) -> List[str]:
+    """AI dev note: Separar por vírgulas fora de parênteses e aspas"""
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\" and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _unquote(value: str) -> str:
+    """AI dev note: Remover aspas duplas e escapes de valores de filtro"""
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    """AI dev note: Interpretar strings ISO-8601 (naive = UTC)"""
+    if not isinstance(value, str) or len(value) < 10 or value[4:5] != "-" or value[7:8] != "-":
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _coerce(row_value: Any, text: str) -> Tuple[Any, Any]:
+    """AI dev note: Converter o valor textual do filtro para o tipo da coluna"""
+    if isinstance(row_value, bool):
+        return row_value, text.lower() == "true"
+    if isinstance(row_value, (int, float)):
+        try:
+            return float(row_value), float(text)
+        except ValueError:
+            return str(row_value), text
+    if isinstance(row_value, str):
+        row_dt = _parse_datetime(row_value)
+        text_dt = _parse_datetime(text) if row_dt else None
+        if row_dt and text_dt:
+            return row_dt, text_dt
+        return row_value, text
+    return str(row_value), text
+
+
+def _like(pattern: str, value: Any, flags: int = 0) -> bool:
+    regex = "^" + re.escape(pattern).replace(r"\*", ".*").replace("%", ".*") + "$"
+    return value is not None and re.match(regex, str(value), flags) is not None
+
+
+def _match(row: Dict[str, Any], column: str, operator: str, value: str) -> bool:
+    """AI dev note: Avaliar um filtro coluna.operador.valor"""
+    negate = False
+    if operator.startswith("not."):
+        negate, operator = True, operator[4:]
+    row_value = row.get(column)
+    if operator == "is":
+        lowered = value.lower()
+        result = row_value is None if lowered == "null" else row_value is (lowered == "true")
+    elif operator == "in":
+        options = [_unquote(option) for option in _split_top(value.strip()[1:-1])]
+        result = row_value is not None and any(
+            left == right for left, right in (_coerce(row_value, option) for option in options)
+        )
+    elif operator in ("like", "ilike"):
+        result = _like(value, row_value, re.IGNORECASE if operator == "ilike" else 0)
+    elif row_value is None:
+        result = False
+    else:
+        left, right = _coerce(row_value, value)
+        try:
+            result = {
+                "eq": left == right,
+                "neq": left != right,
+                "gt": left > right,
+                "gte": left >= right,
+                "lt": left < right,
+                "lte": left <= right,
+            }[operator]
+        except KeyError:
+            raise PostgrestError(400, f"Operador não suportado: {operator}")
+        except TypeError:
+            result = False
+    return not result if negate else result
+
+
+def _parse_condition(text: str) -> Callable[[Dict[str, Any]], bool]:
+    """AI dev note: Condição de filtro lógico: col.op.valor, and(...), or(...), not.and(...)"""
+    negate = text.startswith("not.")
+    body = text[4:] if negate else text
+    for logic in ("and", "or"):
+        if body.startswith(f"{logic}(") and body.endswith(")"):
+            inner = _parse_logic(logic, body[len(logic):])
+            return (lambda row: not inner(row)) if negate else inner
+    column, _, rest = text.partition(".")
+    operator, _, value = rest.partition(".")
+    if operator == "not":
+        real_operator, _, value = value.partition(".")
+        operator = f"not.{real_operator}"
+    value = _unquote(value)
+    return lambda row: _match(row, column, operator, value)
+
+
+def _parse_logic(logic: str, value: str) -> Callable[[Dict[str, Any]], bool]:
+    """AI dev note: Filtro lógico or=(...) / and=(...)"""
+    value = value.strip()
+    if not (value.startswith("(") and value.endswith(")")):
+        raise PostgrestError(400, f"Filtro lógico inválido: {value}")
+    conditions = [_parse_condition(part) for part in _split_top(value[1:-1])]
+    if logic == "or":
+        return lambda row: any(condition(row) for condition in conditions)
+    return lambda row: all(condition(row) for condition in conditions)
+
+
+def _parse_select(text: str) -> List[Dict[str, Any]]:
+    """AI dev note: Árvore do parâmetro select= (colunas e recursos embutidos)"""
+    nodes = []
+    for part in _split_top(text or "*"):
+        if "(" in part and part.endswith(")"):
+            head, children = part[:part.index("(")], part[part.index("(") + 1:-1]
+            alias, _, name = head.rpartition(":")
+            name, _, hint = name.partition("!")
+            nodes.append({
+                "embed": name,
+                "alias": alias or name,
+                "inner": hint == "inner",
+                "children": _parse_select(children),
+            })
+        else:
+            alias, _, name = part.rpartition(":")
+            name = name.split("::")[0]
+            nodes.append({"column": name, "alias": alias or name})
+    return nodes
+
+
+class FakePostgrest(httpx.AsyncBaseTransport):
+    """AI dev note: Transporte httpx que responde como o PostgREST do Supabase
+    
+    Suporta filtros (eq, neq, gt, gte, lt, lte, like, ilike, in, is, not.*,
+    or/and), order, limit/offset, header Range, select com embedding de
+    recursos relacionados, Prefer (return, count, resolution), upsert via
+    on_conflict e RPCs registradas. Latência e erros podem ser injetados.
+    
+    Diferença consciente: PUT é tratado como PATCH nas linhas filtradas,
+    que é como o SupabaseService o usa.
+    """
+    
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.table_latency: Dict[str, float] = {}
+        self.tables: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+        self.rpc_handlers: Dict[str, Callable[["FakePostgrest", Dict[str, Any]], Any]] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self._random = random.Random(seed)
+        self._forced_errors: List[int] = []
+        self._plano_seq = 0
+        self._clock = datetime.now(timezone.utc)
+    
+    # Configuração
+    def fail_next(self, count: int = 1, status: int = 503) -> None:
+        """AI dev note: Forçar erro nas próximas N requisições"""
+        self._forced_errors.extend([status] * count)
+    
+    def register_rpc(self, name: str, handler: Callable[["FakePostgrest", Dict[str, Any]], Any]) -> None:
+        """AI dev note: Registrar uma função acessível via POST /rpc/<name>"""
+        self.rpc_handlers[name] = handler
+    
+    def insert(self, table: str, rows: Any) -> List[Dict[str, Any]]:
+        """AI dev note: Inserir linhas diretamente (seed de dados), aplicando defaults"""
+        rows = rows if isinstance(rows, list) else [rows]
+        return [self._insert_row(table, dict(row), None, None) for row in rows]
+    
+    def _now(self) -> str:
+        """AI dev note: Relógio estritamente crescente (ordenação estável por timestamp)"""
+        now = datetime.now(timezone.utc)
+        self._clock = max(now, self._clock + timedelta(microseconds=1))
+        return self._clock.isoformat()
+    
+    # Transporte httpx
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        marker = "/rest/v1/"
+        resource = path[path.index(marker) + len(marker):] if marker in path else path.strip("/")
+        self.requests.append((request.method, resource))
+        
+        delay = self.table_latency.get(resource, self.latency)
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        
+        if self._forced_errors:
+            return self._error(self._forced_errors.pop(0), "Erro injetado")
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._error(self.error_status, "Erro injetado")
+        
+        try:
+            if resource.startswith("rpc/"):
+                return self._rpc(resource[4:], request)
+            if resource not in self.tables:
+                raise PostgrestError(404, f"Tabela {resource} não existe", "42P01")
+            return self._handle(resource, request)
+        except PostgrestError as e:
+            return self._error(e.status, str(e), e.code)
+    
+    @staticmethod
+    def _error(status: int, message: str, code: str = "PGRST000") -> httpx.Response:
+        return httpx.Response(status, json={"code": code, "message": message, "details": None, "hint": None})
+    
+    def _rpc(self, name: str, request: httpx.Request) -> httpx.Response:
+        handler = self.rpc_handlers.get(name)
+        if handler is None:
+            raise PostgrestError(404, f"Função {name} não encontrada", "PGRST202")
+        payload = json.loads(request.content) if request.content else {}
+        return httpx.Response(200, json=handler(self, payload))
+    
+    @staticmethod
+    def _prefer(request: httpx.Request) -> Dict[str, str]:
+        prefer = {}
+        for item in request.headers.get("prefer", "").split(","):
+            key, _, value = item.strip().partition("=")
+            if key:
+                prefer[key] = value
+        return prefer
+    
+    def _handle(self, table: str, request: httpx.Request) -> httpx.Response:
+        params = [(key, unquote(value)) for key, value in request.url.params.multi_items()]
+        prefer = self._prefer(request)
+        method = request.method
+        
+        if method in ("GET", "HEAD"):
+            return self._read(table, params, prefer, request, head=method == "HEAD")
+        
+        body = json.loads(request.content) if request.content else None
+        if method == "POST":
+            rows = self._write_insert(table, body, params, prefer)
+            status = 201
+        elif method in ("PATCH", "PUT"):
+            rows = self._write_update(table, body or {}, params)
+            status = 200
+        elif method == "DELETE":
+            rows = self._write_delete(table, params)
+            status = 200
+        else:
+            raise PostgrestError(405, f"Método {method} não suportado")
+        return self._write_response(table, rows, params, prefer, status)
+    
+    # Leitura
+    def _filters(self, params: List[Tuple[str, str]]) -> Tuple[List[Callable], Dict[str, List[Tuple[str, str]]]]:
+        """AI dev note: Filtros do nível raiz e parâmetros dos recursos embutidos (por caminho)"""
+        root, embedded = [], {}
+        for key, value in params:
+            if key in ("or", "and"):
+                root.append(_parse_logic(key, value))
+            elif "." in key:
+                path, _, name = key.rpartition(".")
+                embedded.setdefault(path, []).append((name, value))
+            elif key not in RESERVED_PARAMS:
+                operator, _, operand = value.partition(".")
+                if operator == "not":
+                    real_operator, _, operand = operand.partition(".")
+                    operator = f"not.{real_operator}"
+                if operator.replace("not.", "") not in OPERATORS:
+                    raise PostgrestError(400, f"Filtro inválido: {key}={value}")
+                root.append(lambda row, c=key, o=operator, v=operand: _match(row, c, o, v))
+        return root, embedded
+    
+    def _relation(self, parent: str, child: str) -> Tuple[str, str]:
+        """AI dev note: Direção e coluna da relação entre duas tabelas"""
+        for column, target in FOREIGN_KEYS.get(parent, {}).items():
+            if target == child:
+                return "many_to_one", column
+        for column, target in FOREIGN_KEYS.get(child, {}).items():
+            if target == parent:
+                return "one_to_many", column
+        raise PostgrestError(400, f"Sem relação entre {parent} e {child}", "PGRST200")
+    
+    def _embed(
+        self,
+        parent: str,
+        row: Dict[str, Any],
+        node: Dict[str, Any],
+        path: str,
+        embedded: Dict[str, List[Tuple[str, str]]],
+    ) -> Tuple[bool, Any]:
+        """AI dev note: Calcular um recurso embutido; retorna (mantém linha pai, valor)"""
+        child = node["embed"]
+        kind, column = self._relation(parent, child)
+        child_params = embedded.get(path, [])
+        filters, _ = self._filters([(k, v) for k, v in child_params if k not in RESERVED_PARAMS])
+        
+        if kind == "many_to_one":
+            candidates = [r for r in self.tables[child] if r.get("id") == row.get(column)]
+        else:
+            candidates = [r for r in self.tables[child] if r.get(column) == row.get("id")]
+        
+        results = []
+        for candidate in candidates:
+            if not all(check(candidate) for check in filters):
+                continue
+            keep, projected = self._project(child, candidate, node["children"], path, embedded)
+            if keep:
+                results.append((candidate, projected))
+        
+        modifiers = dict(child_params)
+        if "order" in modifiers:
+            results = self._sorted(results, modifiers["order"], key=lambda item: item[0])
+        offset = int(modifiers.get("offset", 0))
+        limit = int(modifiers["limit"]) if "limit" in modifiers else None
+        results = results[offset:offset + limit if limit is not None else None]
+        values = [projected for _, projected in results]
+        
+        if kind == "many_to_one":
+            value = values[0] if values else None
+            return (value is not None or not node["inner"]), value
+        return (bool(values) or not node["inner"]), values
+    
+    def _project(
+        self,
+        table: str,
+        row: Dict[str, Any],
+        nodes: List[Dict[str, Any]],
+        prefix: str,
+        embedded: Dict[str, List[Tuple[str, str]]],
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """AI dev note: Aplicar o select numa linha; False se um embed !inner a excluir"""
+        output: Dict[str, Any] = {}
+        for node in nodes:
+            if "embed" in node:
+                path = f"{prefix}.{node['alias']}" if prefix else node["alias"]
+                keep, value = self._embed(table, row, node, path, embedded)
+                if not keep:
+                    return False, output
+                output[node["alias"]] = value
+            elif node["column"] == "*":
+                output.update(row)
+            else:
+                output[node["alias"]] = row.get(node["column"])
+        return True, output
+    
+    def _sorted(self, items: List[Any], order: str, key: Callable[[Any], Dict[str, Any]] = lambda row: row) -> List[Any]:
+        """AI dev note: Ordenar por order=col.asc|desc[.nullsfirst|.nullslast],..."""
+        specs = []
+        for part in order.split(","):
+            column, *modifiers = part.strip().split(".")
+            descending = "desc" in modifiers
+            nulls_first = "nullsfirst" in modifiers or (descending and "nullslast" not in modifiers)
+            specs.append((column, descending, nulls_first))
+        
+        def compare(a, b) -> int:
+            row_a, row_b = key(a), key(b)
+            for column, descending, nulls_first in specs:
+                va, vb = row_a.get(column), row_b.get(column)
+                if va is None or vb is None:
+                    if va is None and vb is None:
+                        continue
+                    return (-1 if va is None else 1) * (1 if nulls_first else -1)
+                da, db = _parse_datetime(va), _parse_datetime(vb)
+                if da and db:
+                    va, vb = da, db
+                if va == vb:
+                    continue
+                result = -1 if va < vb else 1
+                return -result if descending else result
+            return 0
+        
+        return sorted(items, key=cmp_to_key(compare))
+    
+    def _read(
+        self,
+        table: str,
+        params: List[Tuple[str, str]],
+        prefer: Dict[str, str],
+        request: httpx.Request,
+        head: bool,
+    ) -> httpx.Response:
+        filters, embedded = self._filters(params)
+        values = dict(params)
+        nodes = _parse_select(values.get("select", "*"))
+        
+        matched = []
+        for row in self.tables[table]:
+            if not all(check(row) for check in filters):
+                continue
+            keep, projected = self._project(table, row, nodes, "", embedded)
+            if keep:
+                matched.append((row, projected))
+        
+        if "order" in values:
+            matched = self._sorted(matched, values["order"], key=lambda item: item[0])
+        
+        total = len(matched)
+        start = int(values.get("offset", 0))
+        end = start + int(values["limit"]) if "limit" in values else None
+        range_header = request.headers.get("range")
+        if range_header:
+            first, _, last = range_header.partition("-")
+            range_start, range_end = int(first), int(last) + 1 if last else None
+            start += range_start
+            if range_end is not None:
+                stop = start + (range_end - range_start)
+                end = min(end, stop) if end is not None else stop
+        page = [projected for _, projected in matched[start:end]]
+        
+        total_text = str(total) if "count" in prefer else "*"
+        content_range = f"{start}-{start + len(page) - 1}/{total_text}" if page else f"*/{total_text}"
+        headers = {"Content-Range": content_range}
+        if head:
+            return httpx.Response(200, headers=headers)
+        return httpx.Response(200, json=page, headers=headers)
+    
+    # Escrita
+    def _insert_row(
+        self,
+        table: str,
+        row: Dict[str, Any],
+        on_conflict: Optional[Tuple[str, ...]],
+        resolution: Optional[str],
+    ) -> Optional[Dict[str, Any]]:
+        """AI dev note: Inserir uma linha respeitando PK/UNIQUE e upsert"""
+        rows = self.tables[table]
+        conflict_keys = [("id",)] + [(column,) for column in UNIQUE_KEYS.get(table, ())]
+        if on_conflict and on_conflict not in conflict_keys:
+            raise PostgrestError(400, f"Sem constraint UNIQUE em {','.join(on_conflict)}", "42P10")
+        for keys in conflict_keys:
+            if not all(row.get(column) is not None for column in keys):
+                continue
+            existing = next((r for r in rows if all(r.get(c) == row.get(c) for c in keys)), None)
+            if existing is None:
+                continue
+            if on_conflict == keys and resolution == "merge-duplicates":
+                existing.update(row)
+                existing["updated_at"] = self._now()
+                return existing
+            if on_conflict == keys and resolution == "ignore-duplicates":
+                return None
+            raise PostgrestError(409, f"Valor duplicado para {','.join(keys)}", "23505")
+        
+        now = self._now()
+        if "id" not in row or row["id"] is None:
+            if table == "planos":
+                self._plano_seq += 1
+                row["id"] = self._plano_seq
+            else:
+                row["id"] = str(uuid.uuid4())
+        for column in TIMESTAMP_DEFAULTS.get(table, ()) + ("created_at", "updated_at"):
+            row.setdefault(column, now)
+        for column in NULL_DEFAULTS.get(table, ()):
+            row.setdefault(column, None)
+        if table == "planos":
+            row.setdefault("is_ativo", True)
+            self._plano_seq = max(self._plano_seq, int(row["id"]))
+        rows.append(row)
+        return row
+    
+    def _write_insert(
+        self,
+        table: str,
+        body: Any,
+        params: List[Tuple[str, str]],
+        prefer: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        if body is None:
+            raise PostgrestError(400, "Corpo vazio")
+        items = body if isinstance(body, list) else [body]
+        values = dict(params)
+        on_conflict = tuple(values["on_conflict"].split(",")) if "on_conflict" in values else None
+        resolution = prefer.get("resolution")
+        # Array insert é atômico: validar num snapshot e só então aplicar
+        snapshot = [dict(row) for row in self.tables[table]]
+        try:
+            results = [self._insert_row(table, dict(item), on_conflict, resolution) for item in items]
+        except PostgrestError:
+            self.tables[table] = snapshot
+            raise
+        return [row for row in results if row is not None]
+    
+    def _write_update(self, table: str, body: Dict[str, Any], params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        filters, _ = self._filters(params)
+        updated = []
+        for row in self.tables[table]:
+            if all(check(row) for check in filters):
+                row.update(body)
+                row["updated_at"] = self._now()
+                updated.append(row)
+        return updated
+    
+    def _write_delete(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        filters, _ = self._filters(params)
+        kept, deleted = [], []
+        for row in self.tables[table]:
+            (deleted if all(check(row) for check in filters) else kept).append(row)
+        self.tables[table] = kept
+        return deleted
+    
+    def _write_response(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        params: List[Tuple[str, str]],
+        prefer: Dict[str, str],
+        status: int,
+    ) -> httpx.Response:
+        # Como o PostgREST: faixa das linhas afetadas e total só com Prefer: count
+        total = str(len(rows)) if "count" in prefer else "*"
+        headers = {"Content-Range": f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"}
+        mode = prefer.get("return", "minimal")
+        if mode == "representation":
+            nodes = _parse_select(dict(params).get("select", "*"))
+            body = [self._project(table, row, nodes, "", {})[1] for row in rows]
+            return httpx.Response(status, json=body, headers=headers)
+        if mode == "headers-only" and rows:
+            headers["Location"] = f"/{table}?id=eq.{rows[0]['id']}"
+        return httpx.Response(201 if status == 201 else 204, headers=headers)
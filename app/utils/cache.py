@@ -0,0 +1,80 @@
+# AI dev note: Cache em memória com TTL
+# Usado para tabelas de leitura intensa e escrita rara (ex.: planos)
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """AI dev note: Cache read-through com expiração por TTL e invalidação explícita
+    
+    Cada chave tem uma geração incrementada por invalidate(): uma carga que
+    começou antes da invalidação devolve seu valor a quem pediu, mas não o
+    grava (senão o dado velho seria servido pelo TTL inteiro).
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0  # incrementado ao invalidar o cache inteiro
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """AI dev note: Obter valor se ainda válido"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return default
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """AI dev note: Gravar valor (TTL <= 0 desativa o cache)"""
+        if self.ttl > 0:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+    
+    def invalidate(self, key: Hashable = None) -> None:
+        """AI dev note: Invalidar uma chave ou o cache inteiro"""
+        if key is None:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+        else:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+    
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+    
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """AI dev note: Ler do cache ou carregar uma única vez mesmo com chamadas concorrentes"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        
+        async with self._lock:
+            # Outra corrotina pode ter carregado enquanto esperávamos o lock
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation(key)
+            value = await loader()
+            if self._generation(key) == generation:
+                self.set(key, value)
+            return value
+    
+    def stats(self) -> Dict[str, Any]:
+        """AI dev note: Contadores de acerto/erro do cache"""
+        return {
+            "ttl": self.ttl,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
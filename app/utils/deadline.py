@@ -0,0 +1,77 @@
+# AI dev note: Propagação de deadline por requisição via contextvars
+# O middleware define o prazo; chamadas externas usam o tempo restante como timeout
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class Deadline:
+    """AI dev note: Prazo absoluto (time.monotonic) compartilhado pela requisição
+    
+    É mutável para que o middleware possa liberá-lo depois que a resposta
+    começou a ser enviada (ex.: exportações em streaming).
+    """
+    
+    __slots__ = ("expires_at",)
+    
+    def __init__(self, expires_at: Optional[float]):
+        self.expires_at = expires_at
+    
+    def clear(self) -> None:
+        """AI dev note: Remover o prazo"""
+        self.expires_at = None
+
+
+_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """AI dev note: O orçamento de tempo da requisição acabou"""
+    
+    def __init__(self, message: str = "Tempo limite da requisição excedido"):
+        super().__init__(message)
+
+
+def remaining() -> Optional[float]:
+    """AI dev note: Segundos restantes até o deadline (None = sem deadline)"""
+    deadline = _deadline.get()
+    if deadline is None or deadline.expires_at is None:
+        return None
+    return deadline.expires_at - time.monotonic()
+
+
+def check() -> None:
+    """AI dev note: Levantar DeadlineExceeded se o prazo já acabou"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+
+
+def timeout_for(default: float) -> float:
+    """AI dev note: Timeout de uma operação limitado pelo tempo restante
+    
+    Levanta DeadlineExceeded se não houver mais tempo.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(default, left)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    """AI dev note: Definir um deadline (nunca estende um deadline externo mais curto)"""
+    expires_at = time.monotonic() + seconds
+    left = remaining()
+    if left is not None:
+        expires_at = min(expires_at, time.monotonic() + left)
+    deadline = Deadline(expires_at)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,101 @@
+# AI dev note: Codificação binária compacta de embeddings no fio
+# Lista JSON gasta ~10 bytes por dimensão e muito parse; base64 de floats little-endian
+# ocupa ~5,3 bytes (float32) ou ~2,7 (float16) e decodifica sem cópia com NumPy
+
+import base64
+import binascii
+import math
+import struct
+from typing import Any, Dict, Literal, Optional
+
+from app.utils.vector_index import np, parse_vector
+
+EmbeddingDtype = Literal["float32", "float16"]
+EmbeddingFormat = Literal["json", "float32", "float16"]
+
+# AI dev note: dtype -> (dtype NumPy little-endian, formato struct, bytes por valor)
+EMBEDDING_DTYPES = {
+    "float32": ("<f4", "f", 4),
+    "float16": ("<f2", "e", 2),
+}
+
+# AI dev note: Parâmetro do Accept que pede a codificação (ex.: application/json; embedding=float32)
+EMBEDDING_MEDIA_PARAM = "embedding"
+
+
+def negotiate_embedding_dtype(accept: Optional[str], override: Optional[str] = None) -> Optional[str]:
+    """AI dev note: dtype binário pedido pelo cliente ou None para a lista JSON
+    
+    O parâmetro de query (override) vence o Accept; "json" força a lista.
+    """
+    if override:
+        return override if override in EMBEDDING_DTYPES else None
+    for media_range in (accept or "").split(","):
+        for param in media_range.split(";")[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == EMBEDDING_MEDIA_PARAM:
+                value = value.strip().strip('"').lower()
+                if value in EMBEDDING_DTYPES:
+                    return value
+    return None
+
+
+def encode_embedding(value: Any, dtype: str = "float32") -> Optional[Dict[str, Any]]:
+    """AI dev note: Embedding (lista, texto do pgvector ou array) -> {dtype, dim, data base64}"""
+    if value is None:
+        return None
+    numpy_dtype, fmt, _ = EMBEDDING_DTYPES[dtype]
+    if np is not None:
+        with np.errstate(over="ignore"):
+            array = np.asarray(value if isinstance(value, np.ndarray) else parse_vector(value), dtype=numpy_dtype)
+        if not np.isfinite(array).all():
+            raise ValueError(f"Embedding não cabe em {dtype}")
+        dim, raw = len(array), array.tobytes()
+    else:
+        values = parse_vector(value)
+        dim = len(values)
+        try:
+            raw = struct.pack(f"<{dim}{fmt}", *values)
+        except (OverflowError, struct.error):
+            raise ValueError(f"Embedding não cabe em {dtype}")
+    return {"dtype": dtype, "dim": dim, "data": base64.b64encode(raw).decode("ascii")}
+
+
+def decode_embedding(encoded: Dict[str, Any]) -> Any:
+    """AI dev note: {dtype, dim, data} -> vetor (np.frombuffer sem cópia; lista sem NumPy)"""
+    dtype = encoded.get("dtype")
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"dtype de embedding não suportado: {dtype}")
+    numpy_dtype, fmt, itemsize = EMBEDDING_DTYPES[dtype]
+    try:
+        raw = base64.b64decode(encoded["data"], validate=True)
+    except (binascii.Error, TypeError) as e:
+        raise ValueError(f"Embedding em base64 inválido: {e}")
+    dim = encoded.get("dim")
+    if dim is None:
+        dim = len(raw) // itemsize
+    if not dim or len(raw) != dim * itemsize:
+        raise ValueError(f"Embedding com {len(raw)} bytes não corresponde a {dim} valores {dtype}")
+    if np is not None:
+        vector = np.frombuffer(raw, dtype=numpy_dtype)
+        if not np.isfinite(vector).all():
+            raise ValueError("Embedding com valores não finitos")
+        return vector
+    values = list(struct.unpack(f"<{dim}{fmt}", raw))
+    if not all(math.isfinite(x) for x in values):
+        raise ValueError("Embedding com valores não finitos")
+    return values
+
+
+def encode_embedding_rows(data: Any, dtype: Optional[str]) -> Any:
+    """AI dev note: Trocar embedding_vetorial por sua forma binária em linha, lista ou página"""
+    if dtype is None:
+        return data
+    if isinstance(data, list):
+        return [encode_embedding_rows(row, dtype) for row in data]
+    if isinstance(data, dict):
+        if "embedding_vetorial" in data:
+            return {**data, "embedding_vetorial": encode_embedding(data["embedding_vetorial"], dtype)}
+        if isinstance(data.get("items"), list):
+            return {**data, "items": encode_embedding_rows(data["items"], dtype)}
+    return data
@@ -0,0 +1,30 @@
+# AI dev note: ETags fortes e GET condicional (If-None-Match -> 304)
+# A versão de uma linha é id + updated_at, então a checagem pode usar só essas colunas
+
+import hashlib
+from typing import Any, Dict, Optional
+
+# AI dev note: Projeção barata para checar se o recurso mudou
+FRESHNESS_COLUMNS = "id,updated_at"
+
+
+def compute_etag(row: Dict[str, Any]) -> str:
+    """AI dev note: ETag forte derivado de id e updated_at da linha"""
+    version = f"{row.get('id')}:{row.get('updated_at')}".encode()
+    return f'"{hashlib.blake2b(version, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """AI dev note: Comparação fraca do If-None-Match (RFC 9110), aceitando lista e '*'"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
@@ -0,0 +1,244 @@
+# AI dev note: Métricas no formato de exposição do Prometheus (texto 0.0.4)
+# Registro próprio e enxuto: gravar uma observação custa uma busca em dict e um bisect
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# AI dev note: Buckets em segundos, do cache local (~1ms) ao timeout do upstream
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """AI dev note: Base das métricas com filhos por combinação de labels"""
+    
+    type_name = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+    
+    def labels(self, *values: str):
+        """AI dev note: Filho para os valores de label (criado uma vez e reaproveitado)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def _label_dict(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(self._label_dict(values), child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+    
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """AI dev note: Contador monotônico"""
+    
+    type_name = "counter"
+    
+    def _new_child(self) -> _Value:
+        return _Value()
+    
+    def _render_child(self, labels: Dict[str, str], child: _Value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class Gauge(Counter):
+    """AI dev note: Valor instantâneo (inc/dec/set)"""
+    
+    type_name = "gauge"
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """AI dev note: Histograma com buckets fixos (contagens acumuladas só na renderização)"""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+    
+    def _render_child(self, labels: Dict[str, str], child: _HistogramValue) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            bucket_labels = {**labels, "le": _format_value(bound)}
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """AI dev note: Métrica calculada na coleta (ex.: estado do pool), sem custo no caminho quente"""
+    
+    def __init__(self, name: str, documentation: str, type_name: str, collect: Callable[[], Iterable[Sample]]):
+        self.name = name
+        self.documentation = documentation
+        self.type_name = type_name
+        self.collect = collect
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """AI dev note: Conjunto de métricas expostas em /metrics"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+    
+    def register(self, metric):
+        """AI dev note: Registrar métrica (nome repetido devolve a já registrada)"""
+        return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[Sample]],
+        type_name: str = "gauge",
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, type_name, collect))
+    
+    def get(self, name: str) -> Optional[object]:
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        """AI dev note: Texto no formato de exposição do Prometheus"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# AI dev note: Registro global e métricas compartilhadas entre middleware e serviços
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "guido_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota e status",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "guido_http_requests_in_progress",
+    "Requisições HTTP em andamento",
+    ("method",),
+)
+SUPABASE_REQUEST_DURATION = REGISTRY.histogram(
+    "guido_supabase_request_duration_seconds",
+    "Latência das chamadas ao PostgREST por tabela e método",
+    ("table", "method"),
+)
+SUPABASE_ERRORS = REGISTRY.counter(
+    "guido_supabase_errors_total",
+    "Erros nas chamadas ao PostgREST por tabela, método e motivo (status HTTP, timeout, transport)",
+    ("table", "method", "reason"),
+)
+EMBEDDING_MESSAGES = REGISTRY.counter(
+    "guido_embedding_messages_total",
+    "Mensagens processadas pelo worker de embeddings (embedded, failed, dropped)",
+    ("result",),
+)
+EMBEDDING_BATCH_SIZE = REGISTRY.histogram(
+    "guido_embedding_batch_size",
+    "Mensagens por micro-lote do worker de embeddings",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+EMBEDDING_BATCH_DURATION = REGISTRY.histogram(
+    "guido_embedding_batch_duration_seconds",
+    "Tempo por micro-lote (embedding + gravação em massa)",
+)
+DOSSIE_REFRESHES = REGISTRY.counter(
+    "guido_dossie_refreshes_total",
+    "Atualizações incrementais de dossiê (updated, unchanged, failed)",
+    ("result",),
+)
+DOSSIE_REFRESH_MESSAGES = REGISTRY.counter(
+    "guido_dossie_refresh_messages_total",
+    "Mensagens novas incorporadas aos dossiês",
+)
@@ -0,0 +1,86 @@
+# AI dev note: Helpers de paginação por cursor (keyset) sobre o PostgREST
+# O cursor é opaco para o cliente: JSON com os valores da última linha, em base64url
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+# (coluna, descendente)
+OrderColumns = Sequence[Tuple[str, bool]]
+
+
+class InvalidCursorError(ValueError):
+    """AI dev note: Cursor de paginação malformado ou de outra ordenação"""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """AI dev note: Codificar os valores de ordenação da última linha"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """AI dev note: Decodificar cursor e validar o número de colunas"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Cursor inválido")
+    return values
+
+
+def _quote(value: Any) -> str:
+    """AI dev note: Valor entre aspas para filtros lógicos do PostgREST"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def order_param(columns: OrderColumns) -> str:
+    """AI dev note: Valor do parâmetro order= do PostgREST"""
+    return ",".join(f"{col}.{'desc' if desc else 'asc'}" for col, desc in columns)
+
+
+def keyset_filter(columns: OrderColumns, values: Sequence[Any]) -> str:
+    """AI dev note: Filtro or=(...) com as linhas estritamente após o cursor"""
+    clauses = []
+    for i, (col, desc) in enumerate(columns):
+        parts = [f"{prev}.eq.{_quote(value)}" for (prev, _), value in zip(columns[:i], values[:i])]
+        parts.append(f"{col}.{'lt' if desc else 'gt'}.{_quote(values[i])}")
+        clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return f"({','.join(clauses)})"
+
+
+def keyset_filter_nulls_last(column: str, value: Any, id_value: Any) -> str:
+    """AI dev note: Filtro keyset para order=col.desc.nullslast,id.desc com col anulável
+    
+    Depois de um valor não nulo vêm os menores, os empates com id menor e todos
+    os nulos; depois de um nulo, só os nulos com id menor.
+    """
+    if value is None:
+        return f"(and({column}.is.null,id.lt.{_quote(id_value)}))"
+    quoted = _quote(value)
+    return f"({column}.lt.{quoted},and({column}.eq.{quoted},id.lt.{_quote(id_value)}),{column}.is.null)"
+
+
+def parse_content_range_count(content_range: Optional[str]) -> Optional[int]:
+    """AI dev note: Linhas afetadas numa escrita ('0-2/3', '*/0' ou '0-2/*')"""
+    total = parse_content_range_total(content_range)
+    if total is not None or not content_range:
+        return total
+    span = content_range.split("/", 1)[0]
+    if span == "*":
+        return 0
+    first, _, last = span.partition("-")
+    if first.isdigit() and last.isdigit():
+        return int(last) - int(first) + 1
+    return None
+
+
+def parse_content_range_total(content_range: Optional[str]) -> Optional[int]:
+    """AI dev note: Total do header Content-Range (ex.: '0-24/3573')"""
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
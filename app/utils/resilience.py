@@ -0,0 +1,109 @@
+# AI dev note: Primitivas de resiliência para chamadas a serviços externos
+# Backoff exponencial com jitter, circuit breaker e rastreio de latência para hedging
+
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """AI dev note: Backoff exponencial com full jitter (attempt começa em 0)"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    """AI dev note: Circuito aberto: a chamada falha rápido sem ir à rede"""
+    
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuito aberto para '{name}'; tente novamente em {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """AI dev note: Circuit breaker clássico (fechado → aberto → meio-aberto)
+    
+    Abre após failure_threshold falhas seguidas. Depois de recovery_timeout
+    deixa passar uma chamada de teste: sucesso fecha, falha reabre.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started = None
+    
+    def before_call(self) -> None:
+        """AI dev note: Levantar CircuitOpenError se a chamada não deve ser feita"""
+        if self.state == self.CLOSED:
+            return
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == self.OPEN and elapsed >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+        # Uma chamada de teste por vez; se ela sumir (ex.: cancelada), liberar outra após o timeout
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN and (
+            self._probe_started is None or now - self._probe_started >= self.recovery_timeout
+        ):
+            self._probe_started = now
+            return
+        raise CircuitOpenError(self.name, max(self.recovery_timeout - elapsed, 1.0))
+    
+    def record_success(self) -> None:
+        """AI dev note: Sucesso fecha o circuito e zera as falhas"""
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_started = None
+    
+    def record_failure(self) -> None:
+        """AI dev note: Falha conta para abrir o circuito (ou reabre no meio-aberto)"""
+        self.failures += 1
+        self._probe_started = None
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    def stats(self) -> Dict[str, object]:
+        """AI dev note: Estado atual do circuito"""
+        return {"state": self.state, "failures": self.failures}
+
+
+class LatencyTracker:
+    """AI dev note: Janela deslizante de latências para estimar percentis
+    
+    Os percentis são recalculados a cada refresh_every amostras para manter
+    o custo por requisição baixo.
+    """
+    
+    def __init__(self, window: int = 500, refresh_every: int = 50):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+        self._cache: Dict[float, float] = {}
+    
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+        if self._since_refresh >= self._refresh_every:
+            self._cache.clear()
+            self._since_refresh = 0
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """AI dev note: Percentil q (0-1) das amostras, None se vazio"""
+        if not self._samples:
+            return None
+        if q not in self._cache:
+            ordered = sorted(self._samples)
+            self._cache[q] = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return self._cache[q]
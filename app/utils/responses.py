@@ -0,0 +1,46 @@
+# AI dev note: Respostas JSON rápidas
+# Linhas do PostgREST são validadas uma única vez e serializadas direto para bytes
+
+import json
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.utils.tracing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """AI dev note: JSONResponse com orjson quando instalado (fallback: json da stdlib)"""
+    
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """AI dev note: TypeAdapter reaproveitado entre requisições (montá-lo é caro)"""
+    return TypeAdapter(tp)
+
+
+def model_response(tp: Any, data: Any, status_code: int = 200) -> Response:
+    """AI dev note: Validar dados crus contra o schema de resposta e devolver bytes prontos
+    
+    Substitui o caminho Schema(**row) + response_model, que valida duas vezes e
+    passa por jsonable_encoder. O response_model da rota continua documentando
+    o OpenAPI; como a rota devolve um Response, o FastAPI não o reaplica.
+    """
+    adapter = type_adapter(tp)
+    with span("validate"):
+        value = adapter.validate_python(data)
+    with span("encode"):
+        body = adapter.dump_json(value)
+    return Response(content=body, status_code=status_code, media_type="application/json")
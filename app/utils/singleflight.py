@@ -0,0 +1,58 @@
+# AI dev note: Coalescência de chamadas idênticas concorrentes (single-flight)
+# Chamadas com a mesma chave enquanto uma está em andamento compartilham o resultado
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils import deadline
+
+
+class SingleFlight:
+    """AI dev note: Compartilha uma única tarefa entre chamadas concorrentes com a mesma chave"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """AI dev note: Executar fn ou aguardar a execução em andamento para a mesma chave
+        
+        A chamada roda em uma tarefa própria, então o cancelamento de quem a
+        iniciou não derruba as demais que estão aguardando. Ela roda num
+        contexto vazio, sem o deadline nem o trace de quem a iniciou; cada
+        chamador aplica o próprio deadline só à espera pelo resultado.
+        """
+        left = deadline.remaining()
+        if left is not None and left <= 0:
+            raise deadline.DeadlineExceeded()
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn(), context=contextvars.Context())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        if left is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), left)
+        except asyncio.TimeoutError:
+            raise deadline.DeadlineExceeded()
+    
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """AI dev note: Remover a tarefa concluída e marcar a exceção como consumida"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> Dict[str, int]:
+        """AI dev note: Quantas chamadas foram executadas e quantas foram coalescidas"""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,61 @@
+# AI dev note: Respostas em streaming para exportações grandes
+# Valida cada bloco vindo do PostgREST e emite NDJSON ou um array JSON em partes
+
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Literal, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+StreamFormat = Literal["ndjson", "json"]
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """AI dev note: TypeAdapter de lista reaproveitado entre requisições"""
+    return TypeAdapter(List[model])
+
+
+def _encode_chunk(adapter: TypeAdapter, rows: List[Dict[str, Any]], fmt: StreamFormat) -> bytes:
+    """AI dev note: Validar um bloco de linhas e serializar em bytes"""
+    items = adapter.validate_python(rows)
+    if fmt == "ndjson":
+        return b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+    # Array JSON: remover os colchetes do bloco para concatenar com os demais
+    return adapter.dump_json(items)[1:-1]
+
+
+async def stream_pages(
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    model: Type[BaseModel],
+    fmt: StreamFormat = "ndjson",
+) -> StreamingResponse:
+    """AI dev note: StreamingResponse a partir de páginas do PostgREST
+    
+    A primeira página é buscada antes de responder para que falhas iniciais
+    ainda virem um status HTTP de erro; depois disso a memória fica limitada
+    a um bloco por vez.
+    """
+    adapter = _list_adapter(model)
+    first = await anext(pages, [])
+    
+    async def body() -> AsyncIterator[bytes]:
+        if fmt == "json":
+            yield b"["
+        written = False
+        rows = first
+        try:
+            while rows:
+                chunk = _encode_chunk(adapter, rows, fmt)
+                if fmt == "json" and written:
+                    chunk = b"," + chunk
+                written = True
+                yield chunk
+                rows = await anext(pages, [])
+        finally:
+            await pages.aclose()
+        if fmt == "json":
+            yield b"]"
+    
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return StreamingResponse(body(), media_type=media_type)
@@ -0,0 +1,140 @@
+# AI dev note: Tracing leve por requisição via contextvars
+# Spans de chamadas ao Supabase, validação e serialização; Server-Timing e log JSON amostrado
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+# AI dev note: Formato W3C Trace Context: versão-trace_id-parent_id-flags
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    """AI dev note: Intervalo medido dentro de um trace (tempos em perf_counter)"""
+    
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs")
+    
+    def __init__(self, name: str, parent_id: Optional[str], start: float, attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = start
+        self.end = start
+        self.attrs = attrs
+    
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+
+class Trace:
+    """AI dev note: Spans de uma requisição; compartilhado pelas tasks filhas via contextvar"""
+    
+    def __init__(self, trace_id: Optional[str] = None, parent_id: Optional[str] = None, sampled: bool = False):
+        self.trace_id = trace_id or _new_id(16)
+        self.parent_id = parent_id
+        self.root_id = _new_id(8)
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.started_wall = time.time()
+        self.spans: List[Span] = []
+        self.marks: Dict[str, float] = {}
+    
+    @classmethod
+    def from_traceparent(cls, header: Optional[str], sample_rate: float, rand: float) -> "Trace":
+        """AI dev note: Continuar um trace recebido ou iniciar um novo (amostragem por taxa)"""
+        match = TRACEPARENT_RE.match(header.strip().lower()) if header else None
+        if match and match.group(1) != "0" * 32:
+            trace_id, parent_id, flags = match.groups()
+            sampled = bool(int(flags, 16) & 1) or rand < sample_rate
+            return cls(trace_id, parent_id, sampled)
+        return cls(sampled=rand < sample_rate)
+    
+    def traceparent(self) -> str:
+        """AI dev note: Header traceparent apontando para o span raiz desta requisição"""
+        return f"00-{self.trace_id}-{self.root_id}-{'01' if self.sampled else '00'}"
+    
+    def record(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """AI dev note: Registrar um span já medido (ex.: validação entre marcas)"""
+        span = Span(name, self.root_id, start, attrs)
+        span.end = end
+        self.spans.append(span)
+    
+    def server_timing(self, total_ms: float) -> str:
+        """AI dev note: Header Server-Timing agregando spans por nome"""
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, [0.0, 0])
+            entry[0] += span.duration_ms
+            entry[1] += 1
+        parts = []
+        for name, (duration, count) in totals.items():
+            desc = f';desc="{count} chamadas"' if count > 1 else ""
+            parts.append(f"{name};dur={duration:.2f}{desc}")
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+    
+    def to_log(self, end: float) -> Dict[str, Any]:
+        """AI dev note: Registro JSON do trace (tempos absolutos em epoch)"""
+        offset = self.started_wall - self.started
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.root_id,
+            "parent_id": self.parent_id,
+            "start": self.started_wall,
+            "duration_ms": round((end - self.started) * 1000, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start": span.start + offset,
+                    "duration_ms": round(span.duration_ms, 3),
+                    **({"attrs": span.attrs} if span.attrs else {}),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_parent: ContextVar[Optional[str]] = ContextVar("trace_parent_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """AI dev note: Trace da requisição atual (None fora do middleware)"""
+    return _trace.get()
+
+
+@contextmanager
+def trace_scope(trace: Trace) -> Iterator[Trace]:
+    """AI dev note: Ativar um trace no contexto atual"""
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """AI dev note: Medir um trecho como span filho do span atual (no-op sem trace)"""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(name, _parent.get() or trace.root_id, time.perf_counter(), attrs)
+    token = _parent.set(current.span_id)
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        _parent.reset(token)
+        trace.spans.append(current)
@@ -0,0 +1,319 @@
+# AI dev note: Índice vetorial em memória para busca semântica de mensagens
+# Fallback quando o banco não expõe a RPC do pgvector: cosseno por força bruta e IVF opcional (NumPy)
+
+import asyncio
+import heapq
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy é opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+def parse_vector(value: Any) -> Optional[List[float]]:
+    """AI dev note: Embedding como vem do PostgREST (lista ou texto '[0.1,...]' do pgvector)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    elif np is not None and isinstance(value, np.ndarray):
+        return value.astype(np.float64).tolist()
+    return [float(x) for x in value]
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+class VectorIndex:
+    """AI dev note: Vetores normalizados por mensagem, com conversa_id para o escopo
+    
+    Sem NumPy a busca é força bruta em Python puro. Com NumPy os vetores ficam
+    numa matriz float32 contígua e, a partir de ivf_min_size vetores, um IVF
+    (k-means esférico com sqrt(n) listas) limita a busca às nprobe listas mais
+    próximas da consulta. Inclusões, trocas e remoções são incrementais; o IVF
+    é retreinado quando o índice dobra de tamanho desde o último treino.
+    O treino (k-means) roda numa thread com schedule_training(); enquanto não
+    termina, a busca segue em força bruta (ou no IVF anterior).
+    """
+    
+    def __init__(self, nprobe: int = 8, ivf_min_size: int = 4096, seed: int = 0):
+        self.nprobe = nprobe
+        self.ivf_min_size = ivf_min_size
+        self.seed = seed
+        self.dim: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self._ids: List[Optional[str]] = []  # posição -> id da mensagem (None = livre)
+        self._conversas: List[Optional[str]] = []
+        self._positions: Dict[str, int] = {}
+        self._by_conversa: Dict[str, Set[int]] = {}
+        self._free: List[int] = []
+        self._vectors: Any = None  # np.ndarray (capacidade, dim) ou lista de listas
+        self._centroids: Any = None
+        self._lists: List[List[int]] = []
+        self._assignment: Dict[int, int] = {}
+        self._trained_size = 0
+        self._training: Optional[asyncio.Task] = None
+        self._dirty: Optional[Set[int]] = None  # posições alteradas durante o treino
+    
+    def __len__(self) -> int:
+        return len(self._positions)
+    
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+    
+    @property
+    def uses_ivf(self) -> bool:
+        return self._centroids is not None
+    
+    @property
+    def training(self) -> bool:
+        return self._training is not None
+    
+    def mark_loaded(self) -> None:
+        """AI dev note: Marcar a carga inicial como concluída"""
+        self.loaded_at = time.monotonic()
+    
+    def age(self) -> float:
+        """AI dev note: Segundos desde a carga (infinito se nunca carregado)"""
+        return time.monotonic() - self.loaded_at if self.loaded_at is not None else math.inf
+    
+    def _prepare(self, vector: Any) -> Any:
+        # Array já decodificado (ex.: np.frombuffer do formato binário) entra sem virar lista
+        values = vector if np is not None and isinstance(vector, np.ndarray) else parse_vector(vector)
+        if values is None or not len(values):
+            raise ValueError("Embedding vazio")
+        if self.dim is None:
+            self.dim = len(values)
+        elif len(values) != self.dim:
+            raise ValueError(f"Embedding com {len(values)} dimensões; o índice usa {self.dim}")
+        if np is None:
+            return _normalize(values)
+        array = np.asarray(values, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+    
+    def _slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        position = len(self._ids)
+        self._ids.append(None)
+        self._conversas.append(None)
+        if np is None:
+            if self._vectors is None:
+                self._vectors = []
+            self._vectors.append(None)
+        elif self._vectors is None or position >= self._vectors.shape[0]:
+            # Capacidade dobra para manter inclusões O(1) amortizadas
+            capacity = max(1024, position * 2)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            if self._vectors is not None:
+                grown[:position] = self._vectors[:position]
+            self._vectors = grown
+        return position
+    
+    def add(self, mensagem_id: str, conversa_id: str, vector: Any) -> None:
+        """AI dev note: Incluir ou trocar o embedding de uma mensagem"""
+        prepared = self._prepare(vector)
+        position = self._positions.get(mensagem_id)
+        if position is None:
+            position = self._slot()
+            self._positions[mensagem_id] = position
+        else:
+            self._detach(position)
+        if self._dirty is not None:
+            self._dirty.add(position)
+        self._ids[position] = mensagem_id
+        self._conversas[position] = conversa_id
+        self._by_conversa.setdefault(conversa_id, set()).add(position)
+        self._vectors[position] = prepared
+        if self._centroids is not None:
+            cluster = int(np.argmax(self._centroids @ prepared))
+            self._lists[cluster].append(position)
+            self._assignment[position] = cluster
+    
+    def remove(self, mensagem_id: str) -> bool:
+        """AI dev note: Retirar uma mensagem do índice (ex.: mensagem apagada)"""
+        position = self._positions.pop(mensagem_id, None)
+        if position is None:
+            return False
+        self._detach(position)
+        if self._dirty is not None:
+            self._dirty.add(position)
+        self._ids[position] = None
+        self._conversas[position] = None
+        self._free.append(position)
+        return True
+    
+    def _detach(self, position: int) -> None:
+        conversa_id = self._conversas[position]
+        if conversa_id is not None:
+            members = self._by_conversa.get(conversa_id)
+            if members is not None:
+                members.discard(position)
+                if not members:
+                    del self._by_conversa[conversa_id]
+        cluster = self._assignment.pop(position, None)
+        if cluster is not None:
+            self._lists[cluster].remove(position)
+    
+    def needs_training(self) -> bool:
+        """AI dev note: IVF ainda não treinado (ou índice dobrou desde o treino) e nenhum treino em curso"""
+        if np is None or len(self) < self.ivf_min_size or self._training is not None:
+            return False
+        return self._centroids is None or len(self) >= 2 * self._trained_size
+    
+    def _snapshot(self) -> Tuple[Any, Any]:
+        positions = np.fromiter(self._positions.values(), dtype=np.int64, count=len(self._positions))
+        self._dirty = set()
+        return positions, self._vectors[positions]  # indexação por array copia os vetores
+    
+    def train(self) -> None:
+        """AI dev note: Treinar o IVF agora, bloqueando (benchmarks e uso fora do event loop)"""
+        if np is None or not self._positions:
+            return
+        positions, data = self._snapshot()
+        try:
+            self._apply_training(positions, *self._kmeans(data, self.seed))
+        finally:
+            self._dirty = None
+    
+    def schedule_training(self) -> bool:
+        """AI dev note: Treinar o IVF numa thread se necessário; devolve se um treino começou"""
+        if not self.needs_training():
+            return False
+        positions, data = self._snapshot()
+        self._training = asyncio.get_running_loop().create_task(self._train_in_thread(positions, data))
+        return True
+    
+    async def wait_training(self) -> None:
+        """AI dev note: Aguardar o treino em curso (se houver)"""
+        if self._training is not None:
+            await asyncio.shield(self._training)
+    
+    async def _train_in_thread(self, positions: Any, data: Any) -> None:
+        try:
+            centroids, labels = await asyncio.to_thread(self._kmeans, data, self.seed)
+            self._apply_training(positions, centroids, labels)
+        except Exception as e:
+            logger.warning("Falha ao treinar o IVF do índice vetorial: %s", e)
+        finally:
+            self._training = None
+            self._dirty = None
+    
+    @staticmethod
+    def _kmeans(data: Any, seed: int, iterations: int = 8, chunk: int = 65536) -> Tuple[Any, Any]:
+        """AI dev note: k-means esférico (produto interno em vetores normalizados); não toca no índice"""
+        nlist = max(1, int(math.sqrt(len(data))))
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+        
+        def assign() -> Any:
+            labels = np.empty(len(data), dtype=np.int64)
+            for start in range(0, len(data), chunk):
+                labels[start:start + chunk] = np.argmax(data[start:start + chunk] @ centroids.T, axis=1)
+            return labels
+        
+        for _ in range(iterations):
+            labels = assign()
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            # Listas vazias mantêm o centróide anterior
+            centroids[filled] = sums[filled] / norms[filled]
+        return centroids, assign()
+    
+    def _apply_training(self, positions: Any, centroids: Any, labels: Any) -> None:
+        """AI dev note: Trocar o IVF; posições alteradas durante o treino são reatribuídas aqui"""
+        dirty = self._dirty or set()
+        lists: List[List[int]] = [[] for _ in range(len(centroids))]
+        assignment: Dict[int, int] = {}
+        for position, cluster in zip(positions.tolist(), labels.tolist()):
+            if position in dirty:
+                continue
+            lists[cluster].append(position)
+            assignment[position] = cluster
+        changed = [position for position in dirty if self._ids[position] is not None]
+        if changed:
+            index = np.asarray(changed, dtype=np.int64)
+            for position, cluster in zip(changed, np.argmax(self._vectors[index] @ centroids.T, axis=1).tolist()):
+                lists[cluster].append(position)
+                assignment[position] = cluster
+        self._centroids = centroids
+        self._lists = lists
+        self._assignment = assignment
+        self._trained_size = len(positions)
+    
+    def _candidates(self, conversa_ids: Optional[Iterable[str]]) -> Optional[List[int]]:
+        if conversa_ids is None:
+            return None
+        positions: List[int] = []
+        for conversa_id in conversa_ids:
+            positions.extend(self._by_conversa.get(conversa_id, ()))
+        return positions
+    
+    def _score(self, query: Any, positions: Optional[List[int]], k: int) -> List[Tuple[str, float]]:
+        if np is None:
+            if positions is None:
+                positions = list(self._positions.values())
+            scored = ((sum(a * b for a, b in zip(self._vectors[p], query)), p) for p in positions)
+            return [(self._ids[p], score) for score, p in heapq.nlargest(k, scored)]
+        if positions is None:
+            positions = list(self._positions.values())
+        if not positions:
+            return []
+        index = np.asarray(positions, dtype=np.int64)
+        scores = self._vectors[index] @ query
+        top = min(k, len(index))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [(self._ids[int(index[i])], float(scores[i])) for i in best]
+    
+    def search(
+        self,
+        query: Sequence[float],
+        k: int,
+        conversa_ids: Optional[Iterable[str]] = None,
+        exact: bool = False,
+    ) -> List[Tuple[str, float]]:
+        """AI dev note: Top-k por similaridade de cosseno: [(mensagem_id, score)]
+        
+        conversa_ids restringe a busca (escopo de cliente/conta). Com IVF, se as
+        listas sondadas não tiverem k candidatos no escopo, cai na força bruta.
+        """
+        if not self._positions:
+            return []
+        prepared = self._prepare(query)
+        candidates = self._candidates(conversa_ids)
+        if candidates is not None and not candidates:
+            return []
+        
+        if self._centroids is not None and not exact and (candidates is None or len(candidates) > self.nprobe * k):
+            probes = np.argsort(-(self._centroids @ prepared))[:self.nprobe]
+            probed = [position for cluster in probes.tolist() for position in self._lists[cluster]]
+            if candidates is not None:
+                allowed = set(candidates)
+                probed = [position for position in probed if position in allowed]
+            if len(probed) >= k:
+                return self._score(prepared, probed, k)
+        return self._score(prepared, candidates, k)
+    
+    def stats(self) -> Dict[str, Any]:
+        """AI dev note: Tamanho e modo do índice"""
+        return {
+            "vectors": len(self),
+            "dim": self.dim,
+            "numpy": np is not None,
+            "ivf_lists": len(self._lists) if self._centroids is not None else 0,
+            "training": self.training,
+            "age_seconds": round(self.age(), 1) if self.loaded else None,
+        }
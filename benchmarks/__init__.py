@@ -0,0 +1 @@
+# AI dev note: Benchmarks de desempenho da API
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+AI dev note: Benchmark de carga das rotas /api/v1/guido
+Executa misturas realistas (cadastro completo, rajadas de mensagens e leitura
+de inbox), mede throughput e p50/p95/p99 por rota, grava JSON e compara com
+um baseline, saindo com código 1 quando há regressão acima do limite.
+
+Exemplos:
+    python -m benchmarks.load_test --duration 20 --output atual.json
+    python -m benchmarks.load_test --baseline base.json --threshold 0.15
+    python -m benchmarks.load_test --target http://localhost:8000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+
+API = "/api/v1/guido"
+SCENARIOS = ("signup", "ingest", "inbox")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """AI dev note: Percentil por nearest-rank sobre valores já ordenados"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """AI dev note: Latências e erros por rota (rótulo 'MÉTODO /template')"""
+    
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+    
+    async def call(
+        self,
+        client: httpx.AsyncClient,
+        label: str,
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            self.latencies[label].append((time.perf_counter() - start) * 1000)
+            return None
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+    
+    def summary(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        routes = {}
+        for label, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            routes[label] = {
+                "count": len(ordered),
+                "errors": self.errors.get(label, 0),
+                "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                "mean_ms": round(sum(ordered) / len(ordered), 3),
+                "p50_ms": round(percentile(ordered, 0.50), 3),
+                "p95_ms": round(percentile(ordered, 0.95), 3),
+                "p99_ms": round(percentile(ordered, 0.99), 3),
+            }
+        total = sum(route["count"] for route in routes.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "errors": sum(route["errors"] for route in routes.values()),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "routes": routes,
+        }
+
+
+class Workload:
+    """AI dev note: Cenários da carga; cada worker mantém seus próprios IDs"""
+    
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, burst_size: int):
+        self.client = client
+        self.recorder = recorder
+        self.burst_size = burst_size
+        self.fixture: Dict[str, str] = {}
+    
+    async def _post(self, label: str, path: str, payload: Any) -> Optional[Dict[str, Any]]:
+        response = await self.recorder.call(self.client, label, "POST", f"{API}{path}", json=payload)
+        return response.json() if response is not None else None
+    
+    async def signup(self) -> Dict[str, str]:
+        """AI dev note: Workflow completo do test_full_workflow do test_api.py"""
+        suffix = uuid4().hex[:12]
+        conta = await self._post("POST /contas", "/contas", {
+            "nome_conta": f"Imobiliária {suffix}", "tipo_conta": "IMOBILIARIA", "documento": suffix,
+        })
+        if not conta:
+            return {}
+        corretor = await self._post("POST /corretores", "/corretores", {
+            "conta_id": conta["id"], "nome": "João Silva", "email": f"joao.{suffix}@imobiliaria.com",
+            "funcao": "DONO", "hash_senha": "senha_hash_exemplo",
+        })
+        if not corretor:
+            return {}
+        cliente = await self._post("POST /clientes", "/clientes", {
+            "conta_id": conta["id"], "corretor_id": corretor["id"], "nome": "Maria Santos",
+            "telefone": "(11) 99999-9999", "email": f"maria.{suffix}@email.com", "status_funil": "Novo",
+        })
+        if not cliente:
+            return {}
+        conversa = await self._post("POST /conversas", "/conversas", {
+            "cliente_id": cliente["id"], "plataforma": "WhatsApp", "status_conversa": "AGUARDANDO_CORRETOR",
+        })
+        if not conversa:
+            return {}
+        await self._post("POST /mensagens", "/mensagens", {
+            "conversa_id": conversa["id"], "remetente": "CLIENTE",
+            "conteudo_texto": "Olá, estou interessada em um apartamento de 2 quartos",
+        })
+        lembrete_em = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        await self._post("POST /lembretes", "/lembretes", {
+            "corretor_id": corretor["id"], "cliente_id": cliente["id"],
+            "descricao": "Ligar para Maria", "data_lembrete": lembrete_em, "status": "PENDENTE",
+        })
+        await self._post("POST /dossies-ia", "/dossies-ia", {
+            "cliente_id": cliente["id"], "resumo_gerado": "Cliente interessada em apartamento",
+            "sentimento_geral": "POSITIVO",
+        })
+        return {
+            "conta_id": conta["id"], "corretor_id": corretor["id"],
+            "cliente_id": cliente["id"], "conversa_id": conversa["id"],
+        }
+    
+    async def ingest(self) -> None:
+        """AI dev note: Rajada de mensagens via lote seguida de uma mensagem avulsa"""
+        conversa_id = self.fixture["conversa_id"]
+        items = [
+            {"conversa_id": conversa_id, "remetente": random.choice(("CLIENTE", "CORRETOR")),
+             "conteudo_texto": f"Mensagem {i} da rajada"}
+            for i in range(self.burst_size)
+        ]
+        await self._post("POST /mensagens/batch", "/mensagens/batch", items)
+        await self._post("POST /mensagens", "/mensagens", {
+            "conversa_id": conversa_id, "remetente": "CLIENTE", "conteudo_texto": "Mensagem avulsa",
+        })
+    
+    async def inbox(self) -> None:
+        """AI dev note: Leitura da caixa de entrada do corretor"""
+        call = self.recorder.call
+        await asyncio.gather(
+            call(self.client, "GET /conversas/inbox", "GET",
+                 f"{API}/conversas/inbox", params={"corretor_id": self.fixture["corretor_id"], "limit": 20}),
+            call(self.client, "GET /lembretes/corretor/{id}", "GET",
+                 f"{API}/lembretes/corretor/{self.fixture['corretor_id']}", params={"limit": 20}),
+        )
+        await call(self.client, "GET /mensagens/conversa/{id}", "GET",
+                   f"{API}/mensagens/conversa/{self.fixture['conversa_id']}", params={"limit": 50})
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """AI dev note: 'signup=1,ingest=3,inbox=6' -> pesos por cenário"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Cenário desconhecido: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: Dict[str, float],
+    concurrency: int = 8,
+    duration: Optional[float] = None,
+    iterations: Optional[int] = None,
+    burst_size: int = 50,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """AI dev note: Executar a carga por tempo (duration) ou por número de cenários (iterations)"""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration if duration else None
+    remaining = [iterations if iterations is not None else -1]
+    
+    # Warm-up fora da medição: dados base para ingest e inbox
+    setup = Workload(client, Recorder(), burst_size)
+    fixture = await setup.signup()
+    if not fixture:
+        raise RuntimeError("Falha ao preparar os dados base (verifique o alvo)")
+    
+    recorder = Recorder()
+    
+    async def worker() -> None:
+        workload = Workload(client, recorder, burst_size)
+        workload.fixture = fixture
+        scenarios: Dict[str, Callable] = {
+            "signup": workload.signup, "ingest": workload.ingest, "inbox": workload.inbox,
+        }
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if remaining[0] == 0:
+                return
+            if remaining[0] > 0:
+                remaining[0] -= 1
+            await scenarios[rng.choices(names, weights)[0]]()
+    
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """AI dev note: Regressões de p95/p99 ou throughput acima do limite relativo"""
+    regressions = []
+    for label, base in baseline.get("routes", {}).items():
+        route = current.get("routes", {}).get(label)
+        if route is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] > 0 and route[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{label}: {metric} {base[metric]:.2f} -> {route[metric]:.2f} "
+                    f"(+{(route[metric] / base[metric] - 1) * 100:.1f}%)"
+                )
+    base_rps, rps = baseline.get("throughput_rps", 0), current.get("throughput_rps", 0)
+    if base_rps > 0 and rps < base_rps * (1 - threshold):
+        regressions.append(f"throughput: {base_rps:.1f} -> {rps:.1f} rps ({(rps / base_rps - 1) * 100:.1f}%)")
+    return regressions
+
+
+def in_process_client(backend_latency: float = 0.0) -> httpx.AsyncClient:
+    """AI dev note: Cliente ASGI direto na aplicação, com o PostgREST em memória"""
+    os.environ.setdefault("SUPABASE_URL", "http://supabase.bench")
+    os.environ.setdefault("SUPABASE_KEY", "bench-key")
+    from app.main import app
+    from app.services.supabase_service import supabase_service
+    from app.testing import FakePostgrest
+    
+    supabase_service.set_transport(FakePostgrest(latency=backend_latency))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n{'rota':<34}{'n':>7}{'erros':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, route in result["routes"].items():
+        print(
+            f"{label:<34}{route['count']:>7}{route['errors']:>7}{route['throughput_rps']:>9.1f}"
+            f"{route['p50_ms']:>9.2f}{route['p95_ms']:>9.2f}{route['p99_ms']:>9.2f}"
+        )
+    print(
+        f"\nTotal: {result['requests']} requisições, {result['errors']} erros, "
+        f"{result['throughput_rps']:.1f} rps em {result['elapsed_s']:.1f}s (latências em ms)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga das rotas /api/v1/guido")
+    parser.add_argument("--target", default=None, help="URL base da API; omitido = em processo com backend falso")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("signup=1,ingest=3,inbox=6"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--iterations", type=int, default=None, help="Total de cenários (ignora --duration)")
+    parser.add_argument("--burst-size", type=int, default=50, help="Mensagens por rajada no cenário ingest")
+    parser.add_argument("--backend-latency-ms", type=float, default=2.0, help="Latência do backend em processo")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Arquivo JSON de resultado")
+    parser.add_argument("--baseline", default=None, help="JSON de um resultado anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regressão relativa tolerada (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+    
+    async def run() -> Dict[str, Any]:
+        if args.target:
+            client = httpx.AsyncClient(base_url=args.target, timeout=60.0)
+        else:
+            client = in_process_client(args.backend_latency_ms / 1000)
+        async with client:
+            return await run_load(
+                client, args.mix, args.concurrency,
+                duration=None if args.iterations else args.duration,
+                iterations=args.iterations, burst_size=args.burst_size, seed=args.seed,
+            )
+    
+    result = asyncio.run(run())
+    result["meta"] = {
+        "target": args.target or "in-process",
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "burst_size": args.burst_size,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    print_report(result)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(result, handle, indent=2, ensure_ascii=False)
+        print(f"Resultado gravado em {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressões acima de {args.threshold * 100:.0f}%:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"\n✅ Sem regressões acima de {args.threshold * 100:.0f}% em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+AI dev note: Microbenchmark do caminho de resposta das listagens
+Compara, com 10k linhas no formato do PostgREST, o caminho antigo
+(Schema(**row) + response_model, validação dupla) com model_response
+(validação única via TypeAdapter e serialização direta para bytes).
+
+    python -m benchmarks.serialization --rows 10000 --repeat 7
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    """AI dev note: Linhas de mensagens como chegam do PostgREST (datas em string ISO)"""
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    conversa_id = str(uuid4())
+    rows = []
+    for i in range(count):
+        moment = (base + timedelta(seconds=i)).isoformat()
+        rows.append({
+            "id": str(uuid4()), "conversa_id": conversa_id,
+            "remetente": "CLIENTE" if i % 2 else "CORRETOR",
+            "conteudo_texto": f"Mensagem {i}: gostaria de agendar uma visita ao apartamento",
+            "timestamp": moment, "created_at": moment, "updated_at": moment,
+        })
+    return rows
+
+
+def build_apps(rows: List[Dict[str, Any]]):
+    """AI dev note: Mesma rota nos dois caminhos, rodando no FastAPI real"""
+    from app.schemas.guido import MensagemResumoResponse
+    from app.utils.responses import FastJSONResponse, model_response
+    
+    antigo = FastAPI(default_response_class=JSONResponse)
+    
+    @antigo.get("/mensagens", response_model=List[MensagemResumoResponse])
+    async def listar_antigo():
+        return [MensagemResumoResponse(**row) for row in rows]
+    
+    novo = FastAPI(default_response_class=FastJSONResponse)
+    
+    @novo.get("/mensagens", response_model=List[MensagemResumoResponse])
+    async def listar_novo():
+        return model_response(List[MensagemResumoResponse], rows)
+    
+    return antigo, novo
+
+
+async def measure(app: FastAPI, repeat: int) -> List[float]:
+    timings = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/mensagens")  # aquecimento (TypeAdapter, caches do pydantic)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.get("/mensagens")
+            timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+    return timings
+
+
+def measure_render(render: Callable[[Any], bytes], content: Any, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(rows_count: int = 10000, repeat: int = 7) -> Dict[str, Any]:
+    """AI dev note: Medianas em ms de cada caminho e o ganho relativo"""
+    from app.utils.responses import FastJSONResponse
+    
+    rows = make_rows(rows_count)
+    antigo, novo = build_apps(rows)
+    old = statistics.median(asyncio.run(measure(antigo, repeat)))
+    new = statistics.median(asyncio.run(measure(novo, repeat)))
+    
+    # Respostas em dict (sem response_model): json da stdlib x orjson
+    plain = JSONResponse(content=None)
+    fast = FastJSONResponse(content=None)
+    render_old = statistics.median(measure_render(plain.render, rows, repeat))
+    render_new = statistics.median(measure_render(fast.render, rows, repeat))
+    return {
+        "rows": rows_count,
+        "response_model_ms": round(old, 2),
+        "model_response_ms": round(new, 2),
+        "speedup": round(old / new, 2),
+        "jsonresponse_render_ms": round(render_old, 2),
+        "fastjsonresponse_render_ms": round(render_new, 2),
+        "render_speedup": round(render_old / render_new, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark de serialização das listagens")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+    
+    os.environ.setdefault("SUPABASE_URL", "http://supabase.bench")
+    os.environ.setdefault("SUPABASE_KEY", "bench-key")
+    result = run(args.rows, args.repeat)
+    print(f"{result['rows']} linhas (mediana de {args.repeat} execuções)")
+    print(f"  Schema(**row) + response_model: {result['response_model_ms']:>8.2f} ms")
+    print(f"  model_response (TypeAdapter):   {result['model_response_ms']:>8.2f} ms  ({result['speedup']:.2f}x)")
+    print(f"  JSONResponse.render (dicts):    {result['jsonresponse_render_ms']:>8.2f} ms")
+    print(f"  FastJSONResponse.render:        {result['fastjsonresponse_render_ms']:>8.2f} ms  ({result['render_speedup']:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
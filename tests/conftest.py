@@ -0,0 +1,21 @@
+# AI dev note: Configuração compartilhada dos testes
+# Os serviços exigem credenciais do Supabase na importação; usar valores fictícios
+
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+import pytest
+
+from app.services.supabase_service import supabase_service
+from app.testing import FakePostgrest
+
+
+@pytest.fixture
+def fake_supabase():
+    """AI dev note: Instala um PostgREST em memória no serviço global"""
+    backend = FakePostgrest()
+    supabase_service.set_transport(backend)
+    yield backend
+    supabase_service.set_transport(None)
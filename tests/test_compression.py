@@ -0,0 +1,137 @@
+# AI dev note: Testes da compressão negociada (gzip em streaming, tamanho mínimo, opt-out)
+
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.main import app
+from app.middleware.compression import CompressionMiddleware, choose_encoding, no_compression
+
+client = TestClient(app)
+
+
+def _raw(response):
+    """AI dev note: Corpo como veio da rede (o httpx descomprime .content)"""
+    return b"".join(response.iter_raw())
+
+
+def test_choose_encoding_respeita_q_e_preferencia():
+    assert choose_encoding("gzip, br", ["br", "gzip"]) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("identity", ["gzip"]) is None
+    assert choose_encoding("*;q=0.3", ["gzip"]) == "gzip"
+    assert choose_encoding("gzip;q=0", ["gzip"]) is None
+
+
+def test_listagem_grande_comprimida_com_gzip(fake_supabase):
+    fake_supabase.insert("contas", [
+        {"nome_conta": f"Conta {i}", "tipo_conta": "INDIVIDUAL", "documento": str(i)} for i in range(50)
+    ])
+    with client.stream("GET", "/api/v1/guido/contas", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = _raw(response)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert len(raw) < len(gzip.decompress(raw))
+    assert b"Conta 49" in gzip.decompress(raw)
+
+
+def test_resposta_pequena_ou_sem_accept_encoding_passa_direto(fake_supabase):
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/api/v1/guido/contas", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_streaming_comprimido_por_bloco():
+    mini = FastAPI()
+
+    @mini.get("/linhas")
+    async def linhas():
+        async def body():
+            for i in range(300):
+                yield f"linha {i}\n".encode()
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    mini.add_middleware(CompressionMiddleware, minimum_size=100)
+    with TestClient(mini).stream("GET", "/linhas", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = _raw(response)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).count(b"\n") == 300
+
+
+def test_exportacao_ndjson_nao_e_comprimida(fake_supabase):
+    fake_supabase.insert("contas", [
+        {"nome_conta": f"Conta {i}", "tipo_conta": "INDIVIDUAL", "documento": str(i)} for i in range(300)
+    ])
+    with client.stream("GET", "/api/v1/guido/contas/export", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = _raw(response)
+    assert "content-encoding" not in response.headers
+    assert "accept-encoding" not in response.headers.get("vary", "").lower()
+    assert raw.count(b"\n") == 300
+
+
+def test_vary_em_toda_resposta_negociada():
+    mini = FastAPI()
+
+    @mini.get("/texto")
+    async def texto(tamanho: int):
+        return PlainTextResponse("a" * tamanho, headers={"Vary": "Origin"})
+
+    mini.add_middleware(CompressionMiddleware, minimum_size=100)
+    mini_client = TestClient(mini)
+    comprimida = mini_client.get("/texto?tamanho=5000", headers={"Accept-Encoding": "gzip"})
+    pequena = mini_client.get("/texto?tamanho=10", headers={"Accept-Encoding": "gzip"})
+    sem_gzip = mini_client.get("/texto?tamanho=5000", headers={"Accept-Encoding": "identity"})
+    assert comprimida.headers["content-encoding"] == "gzip"
+    for response in (comprimida, pequena, sem_gzip):
+        assert response.headers["vary"] == "Origin, Accept-Encoding"
+    assert "content-encoding" not in pequena.headers
+    assert "content-encoding" not in sem_gzip.headers
+
+
+def test_opt_out_por_rota_e_por_prefixo():
+    mini = FastAPI()
+
+    @mini.get("/texto")
+    async def texto():
+        return PlainTextResponse("a" * 5000)
+
+    @mini.get("/crua")
+    @no_compression
+    async def crua():
+        return PlainTextResponse("a" * 5000)
+
+    @mini.get("/interno/texto")
+    async def interno():
+        return PlainTextResponse("a" * 5000)
+
+    @mini.get("/pequeno-em-streaming")
+    async def pequeno():
+        async def body():
+            yield b"a" * 10
+            yield b"b" * 10
+        return StreamingResponse(body(), media_type="text/plain")
+
+    mini.add_middleware(CompressionMiddleware, minimum_size=100, excluded_paths=["/interno"])
+    mini_client = TestClient(mini)
+    headers = {"Accept-Encoding": "gzip"}
+    assert mini_client.get("/texto", headers=headers).headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in mini_client.get("/crua", headers=headers).headers
+    assert "content-encoding" not in mini_client.get("/interno/texto", headers=headers).headers
+    response = mini_client.get("/pequeno-em-streaming", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert response.text == "a" * 10 + "b" * 10
+
+
+def test_etag_vira_fraco_quando_comprimido():
+    mini = FastAPI()
+
+    @mini.get("/doc")
+    async def doc():
+        return PlainTextResponse("x" * 5000, headers={"ETag": '"abc"'})
+
+    mini.add_middleware(CompressionMiddleware, minimum_size=100)
+    response = TestClient(mini).get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["etag"] == 'W/"abc"'
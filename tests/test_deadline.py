@@ -0,0 +1,57 @@
+# AI dev note: Testes da propagação de deadline
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware.deadline import DeadlineMiddleware
+from app.services.supabase_service import SupabaseService
+from app.utils import deadline
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware, default_timeout=5)
+
+    @app.get("/lento")
+    async def lento():
+        await asyncio.sleep(2)
+        return {"ok": True}
+
+    @app.get("/restante")
+    async def restante():
+        return {"remaining": deadline.remaining()}
+
+    return app
+
+
+def test_header_overrides_budget_and_propagates():
+    """AI dev note: Orçamento do header chega ao handler via contextvar"""
+    client = TestClient(_app())
+    left = client.get("/restante", headers={"X-Request-Timeout": "0.5"}).json()["remaining"]
+    assert 0 < left <= 0.5
+    left = client.get("/restante", headers={"X-Request-Timeout": "999"}).json()["remaining"]
+    assert 4 < left <= 5  # o header não estende o orçamento padrão
+
+
+def test_slow_request_is_cancelled_with_504():
+    """AI dev note: Requisição que estoura o orçamento vira 504"""
+    client = TestClient(_app())
+    response = client.get("/lento", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == 504
+
+
+def test_supabase_call_fails_fast_when_deadline_is_gone():
+    """AI dev note: Sem tempo restante o SupabaseService nem chama a rede"""
+    calls = []
+    service = SupabaseService(transport=httpx.MockTransport(lambda request: calls.append(request)))
+
+    async def run():
+        with deadline.deadline_scope(0):
+            await service.get_conta_by_id("1")
+
+    with pytest.raises(deadline.DeadlineExceeded):
+        asyncio.run(run())
+    assert calls == []
@@ -0,0 +1,147 @@
+# AI dev note: Testes da atualização incremental dos dossiês (marca d'água, resumo e debounce)
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.dossie_refresher import DossieRefresher
+from app.services.summarizers import RuleBasedSummarizer
+from app.services.supabase_service import supabase_service
+
+client = TestClient(app)
+API = "/api/v1/guido"
+
+
+class RecordingSummarizer(RuleBasedSummarizer):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def summarize(self, dossie, mensagens):
+        self.calls.append([mensagem["conteudo_texto"] for mensagem in mensagens])
+        return super().summarize(dossie, mensagens)
+
+
+def _seed(fake, textos):
+    cliente = fake.insert("clientes", {"conta_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10", "nome": "Ana"})[0]
+    conversa = fake.insert("conversas", {
+        "cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": "AGUARDANDO_CORRETOR",
+    })[0]
+    _mensagens(fake, conversa, textos)
+    return cliente, conversa
+
+
+def _mensagens(fake, conversa, textos):
+    return fake.insert("mensagens", [
+        {"conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": texto} for texto in textos
+    ])
+
+
+def test_summarizer_dobra_interesses_destaques_e_sentimento():
+    summarizer = RuleBasedSummarizer(max_highlights=2)
+    primeiro = summarizer.summarize(None, [
+        {"remetente": "CLIENTE", "conteudo_texto": "Adorei o apartamento de 2 quartos"},
+        {"remetente": "CORRETOR", "conteudo_texto": "Que ótimo! Posso agendar a visita?"},
+    ])
+    assert primeiro["sentimento_geral"] == "POSITIVO"
+    assert primeiro["resumo_gerado"].splitlines() == [
+        "Interesses: apartamento, quartos", "- Adorei o apartamento de 2 quartos",
+    ]
+
+    segundo = summarizer.summarize(primeiro, [
+        {"remetente": "CLIENTE", "conteudo_texto": "Achei caro, o valor não cabe"},
+        {"remetente": "CLIENTE", "conteudo_texto": "Tem vaga de garagem? A demora foi ruim"},
+    ])
+    linhas = segundo["resumo_gerado"].splitlines()
+    assert linhas[0] == "Interesses: apartamento, quartos, orçamento, vaga de garagem"
+    assert linhas[1:] == ["- Achei caro, o valor não cabe", "- Tem vaga de garagem? A demora foi ruim"]
+    assert segundo["sentimento_geral"] == "NEUTRO"  # o positivo anterior segura a queda
+
+
+def test_refresh_le_so_mensagens_apos_a_marca_dagua(fake_supabase):
+    cliente, conversa = _seed(fake_supabase, ["Quero 2 quartos", "Obrigado!"])
+    summarizer = RecordingSummarizer()
+    refresher = DossieRefresher(supabase_service, summarizer, batch_size=100)
+
+    dossie = asyncio.run(refresher.refresh(cliente["id"]))
+    mensagens = fake_supabase.tables["mensagens"]
+    assert dossie["ultima_atualizacao"] == mensagens[-1]["timestamp"]
+    assert dossie["sentimento_geral"] == "POSITIVO"
+
+    _mensagens(fake_supabase, conversa, ["Tem garagem?"])
+    fake_supabase.requests.clear()
+    dossie = asyncio.run(refresher.refresh(cliente["id"]))
+    assert summarizer.calls == [["Quero 2 quartos", "Obrigado!"], ["Tem garagem?"]]
+    assert "vaga de garagem" in dossie["resumo_gerado"].splitlines()[0]
+    assert dossie["ultima_atualizacao"] == fake_supabase.tables["mensagens"][-1]["timestamp"]
+    assert fake_supabase.requests == [("GET", "dossies_ia"), ("GET", "mensagens"), ("POST", "dossies_ia")]
+
+    # Sem mensagens novas não há escrita
+    fake_supabase.requests.clear()
+    assert asyncio.run(refresher.refresh(cliente["id"]))["id"] == dossie["id"]
+    assert ("POST", "dossies_ia") not in fake_supabase.requests
+
+
+def test_refresh_pagina_historico_longo(fake_supabase):
+    cliente, _ = _seed(fake_supabase, [f"Mensagem {i}" for i in range(5)])
+    summarizer = RecordingSummarizer()
+    refresher = DossieRefresher(supabase_service, summarizer, batch_size=2)
+
+    asyncio.run(refresher.refresh(cliente["id"]))
+    assert summarizer.calls == [["Mensagem 0", "Mensagem 1"], ["Mensagem 2", "Mensagem 3"], ["Mensagem 4"]]
+    assert len(fake_supabase.tables["dossies_ia"]) == 1
+
+
+def test_refresh_nao_perde_mensagem_com_o_mesmo_timestamp_da_marca(fake_supabase):
+    cliente, conversa = _seed(fake_supabase, [])
+    timestamp = "2024-05-01T12:00:00+00:00"
+
+    def mensagem(sufixo, texto):
+        return {"id": f"00000000-0000-4000-8000-00000000000{sufixo}", "conversa_id": conversa["id"],
+                "remetente": "CLIENTE", "conteudo_texto": texto, "timestamp": timestamp}
+
+    summarizer = RecordingSummarizer()
+    refresher = DossieRefresher(supabase_service, summarizer, batch_size=100)
+    fake_supabase.insert("mensagens", mensagem(1, "Quero 2 quartos"))
+    dossie = asyncio.run(refresher.refresh(cliente["id"]))
+    assert dossie["ultima_mensagem_id"].endswith("1")
+
+    # Outro bloco do mesmo lote chega depois, com o mesmo timestamp
+    fake_supabase.insert("mensagens", mensagem(2, "Tem garagem?"))
+    asyncio.run(refresher.refresh(cliente["id"]))
+    assert summarizer.calls == [["Quero 2 quartos"], ["Tem garagem?"]]
+
+
+def test_rajada_de_mensagens_gera_uma_atualizacao(fake_supabase):
+    cliente, conversa = _seed(fake_supabase, [])
+    refresher = DossieRefresher(supabase_service, RuleBasedSummarizer(), debounce=0.05, max_delay=1.0)
+
+    async def run():
+        await refresher.start()
+        try:
+            for i in range(3):
+                refresher.notify_mensagens(_mensagens(fake_supabase, conversa, [f"Visita às {i}h?"]))
+                await asyncio.sleep(0.01)
+            assert refresher.refreshed_total == 0
+            loop = asyncio.get_running_loop()
+            limit = loop.time() + 2
+            while refresher.refreshed_total == 0 and loop.time() < limit:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+        finally:
+            await refresher.stop()
+
+    asyncio.run(run())
+    assert refresher.refreshed_total == 1
+    assert fake_supabase.requests.count(("GET", "conversas")) == 1  # conversa -> cliente em cache
+    assert len(fake_supabase.tables["dossies_ia"][0]["resumo_gerado"].splitlines()) == 4
+
+
+def test_endpoint_refresh(fake_supabase):
+    cliente, _ = _seed(fake_supabase, ["Quero financiamento"])
+    response = client.post(f"{API}/dossies-ia/cliente/{cliente['id']}/refresh")
+    assert response.status_code == 200
+    assert response.json()["resumo_gerado"].startswith("Interesses: financiamento")
+
+    vazio, _ = _seed(fake_supabase, [])
+    assert client.post(f"{API}/dossies-ia/cliente/{vazio['id']}/refresh").status_code == 404
@@ -0,0 +1,89 @@
+# AI dev note: Testes da codificação binária de embeddings (base64 float32/float16)
+
+import base64
+import struct
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.embedding_codec import decode_embedding, encode_embedding, negotiate_embedding_dtype
+
+client = TestClient(app)
+API = "/api/v1/guido"
+
+
+def test_codec_ida_e_volta_float32_e_float16():
+    vector = [0.5, -0.25, 0.125, 1.0]
+    encoded = encode_embedding(vector, "float32")
+    assert encoded["dim"] == 4
+    assert base64.b64decode(encoded["data"]) == struct.pack("<4f", *vector)
+    assert list(decode_embedding(encoded)) == vector
+
+    half = encode_embedding("[0.5, -0.25, 0.125, 1.0]", "float16")  # texto do pgvector
+    assert len(base64.b64decode(half["data"])) == 8
+    assert list(decode_embedding(half)) == vector
+    assert [float(x) for x in decode_embedding(encode_embedding([0.1], "float16"))] == pytest.approx([0.1], abs=1e-3)
+
+
+def test_codec_rejeita_entradas_invalidas():
+    with pytest.raises(ValueError):
+        decode_embedding({"dtype": "float32", "dim": 3, "data": base64.b64encode(b"\0" * 8).decode()})
+    with pytest.raises(ValueError):
+        decode_embedding({"dtype": "float32", "dim": 1, "data": "não é base64"})
+    with pytest.raises(ValueError):
+        decode_embedding({"dtype": "float32", "dim": 1, "data": base64.b64encode(struct.pack("<f", float("nan"))).decode()})
+    with pytest.raises(ValueError):
+        encode_embedding([1e6], "float16")
+
+
+def test_negociacao_por_accept_e_query():
+    assert negotiate_embedding_dtype(None) is None
+    assert negotiate_embedding_dtype("application/json; embedding=float16") == "float16"
+    assert negotiate_embedding_dtype("text/html, application/json;q=0.9;embedding=\"float32\"") == "float32"
+    assert negotiate_embedding_dtype("application/json; embedding=float16", "json") is None
+    assert negotiate_embedding_dtype("application/json", "float32") == "float32"
+
+
+def _seed(fake):
+    conversa = fake.insert("conversas", {
+        "cliente_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10", "plataforma": "WHATSAPP",
+        "status_conversa": "AGUARDANDO_CORRETOR",
+    })[0]
+    mensagem = fake.insert("mensagens", {
+        "conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": "Olá",
+        "embedding_vetorial": [0.1 * i for i in range(64)],
+    })[0]
+    return conversa, mensagem
+
+
+def test_listagem_negocia_embedding_binario(fake_supabase):
+    conversa, mensagem = _seed(fake_supabase)
+    url = f"{API}/mensagens/conversa/{conversa['id']}?include_embedding=true"
+
+    como_lista = client.get(url)
+    binario = client.get(url, headers={"Accept": "application/json; embedding=float32"})
+    assert binario.status_code == 200 and "Accept" in binario.headers["vary"]
+    embedding = binario.json()["items"][0]["embedding_vetorial"]
+    assert embedding["dtype"] == "float32" and embedding["dim"] == 64
+    assert list(decode_embedding(embedding)) == pytest.approx(como_lista.json()["items"][0]["embedding_vetorial"])
+    assert len(binario.content) < len(como_lista.content)
+
+    half = client.get(url + "&embedding_format=float16").json()["items"][0]["embedding_vetorial"]
+    assert len(base64.b64decode(half["data"])) == 128
+
+
+def test_escrita_aceita_embedding_binario(fake_supabase):
+    _, mensagem = _seed(fake_supabase)
+    vector = [0.25, -0.5, 0.75]
+    encoded = {"dtype": "float32", "dim": 3, "data": base64.b64encode(struct.pack("<3f", *vector)).decode()}
+
+    response = client.put(f"{API}/mensagens/{mensagem['id']}/embedding?embedding_format=float32", json={"embedding": encoded})
+    assert response.status_code == 200
+    assert response.json()["embedding_vetorial"] == encoded
+    assert fake_supabase.tables["mensagens"][0]["embedding_vetorial"] == vector
+
+    como_lista = client.put(f"{API}/mensagens/{mensagem['id']}/embedding", json={"embedding": [1.0, 0.0]})
+    assert como_lista.json()["embedding_vetorial"] == [1.0, 0.0]
+
+    invalido = {"dtype": "float32", "dim": 2, "data": encoded["data"]}
+    assert client.put(f"{API}/mensagens/{mensagem['id']}/embedding", json={"embedding": invalido}).status_code == 400
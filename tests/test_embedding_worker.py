@@ -0,0 +1,207 @@
+# AI dev note: Testes do worker de embeddings (micro-lotes, gravação em massa e backpressure)
+
+import asyncio
+import math
+
+from app.services.embedders import HashingEmbedder
+from app.services.embedding_worker import EmbeddingWorker
+from app.services.supabase_service import supabase_service
+
+
+def _seed(fake, count):
+    conversa = fake.insert("conversas", {
+        "cliente_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10", "plataforma": "WHATSAPP",
+        "status_conversa": "AGUARDANDO_CORRETOR",
+    })[0]
+    return fake.insert("mensagens", [
+        {"conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": f"Quero visitar o imóvel {i}"}
+        for i in range(count)
+    ])
+
+
+async def _wait_until(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    limit = loop.time() + timeout
+    while not condition():
+        assert loop.time() < limit, "tempo esgotado"
+        await asyncio.sleep(0.01)
+
+
+def test_hashing_embedder_deterministico_e_normalizado():
+    embedder = HashingEmbedder(dim=64)
+    a, b, c = embedder.embed(["apartamento com 2 quartos", "apartamento com 2 quartos", "boleto vencido"])
+    assert a == b
+    assert math.isclose(sum(x * x for x in a), 1.0)
+    similar = sum(x * y for x, y in zip(a, embedder.embed_one("apartamento 2 quartos")))
+    distante = sum(x * y for x, y in zip(a, c))
+    assert similar > distante
+
+
+def test_worker_embeda_pendentes_em_lotes(fake_supabase):
+    mensagens = _seed(fake_supabase, 10)
+    embedder = HashingEmbedder(dim=16)
+    worker = EmbeddingWorker(supabase_service, embedder, batch_size=4, queue_size=8, poll_interval=0.01)
+
+    async def run():
+        await worker.start()
+        try:
+            await _wait_until(lambda: worker.embedded_total == 10)
+        finally:
+            await worker.stop()
+
+    fake_supabase.requests.clear()
+    asyncio.run(run())
+
+    rows = {row["id"]: row for row in fake_supabase.tables["mensagens"]}
+    for mensagem in mensagens:
+        assert rows[mensagem["id"]]["embedding_vetorial"] == embedder.embed_one(mensagem["conteudo_texto"])
+    # Sem a RPC de gravação em massa: uma tentativa e depois PATCH por linha
+    assert fake_supabase.requests.count(("POST", "rpc/update_mensagens_embeddings")) == 1
+    assert fake_supabase.requests.count(("PATCH", "mensagens")) == 10
+    assert ("POST", "mensagens") not in fake_supabase.requests
+    assert worker.batches_total <= 4
+    assert worker.failed_total == 0 and not worker.running
+
+
+def test_worker_backpressure_descarta_submit_e_recupera_pelo_poll(fake_supabase):
+    mensagens = _seed(fake_supabase, 6)
+
+    class LentoEmbedder(HashingEmbedder):
+        async def embed(self, texts):
+            await self.gate.wait()
+            return [self.embed_one(text) for text in texts]
+
+    async def run():
+        embedder = LentoEmbedder(dim=8)
+        embedder.gate = asyncio.Event()
+        worker = EmbeddingWorker(supabase_service, embedder, batch_size=2, queue_size=2, poll_interval=0.01)
+        await worker.start()
+        try:
+            # Poller enche a fila; o consumidor está preso no embedder lento
+            await _wait_until(lambda: worker.queue_depth() == 2)
+            novas = _seed(fake_supabase, 3)
+            assert worker.submit(novas) == 0
+            assert worker.dropped_total == 3
+            embedder.gate.set()
+            await _wait_until(lambda: worker.embedded_total == 9)
+        finally:
+            await worker.stop()
+        return worker
+
+    worker = asyncio.run(run())
+    assert all(row["embedding_vetorial"] for row in fake_supabase.tables["mensagens"])
+    assert worker.embedded_total == len(mensagens) + 3
+
+
+def test_worker_reprocessa_lote_que_falhou(fake_supabase, monkeypatch):
+    _seed(fake_supabase, 3)
+    worker = EmbeddingWorker(supabase_service, HashingEmbedder(dim=8), batch_size=8, poll_interval=0.01)
+    original = supabase_service.update_mensagens_embeddings
+
+    async def falha_uma_vez(items):
+        if not worker.failed_total:
+            raise RuntimeError("banco indisponível")
+        return await original(items)
+
+    monkeypatch.setattr(supabase_service, "update_mensagens_embeddings", falha_uma_vez)
+
+    async def run():
+        await worker.start()
+        try:
+            await _wait_until(lambda: worker.embedded_total == 3)
+        finally:
+            await worker.stop()
+
+    asyncio.run(run())
+    assert worker.failed_total == 3
+    assert all(row["embedding_vetorial"] for row in fake_supabase.tables["mensagens"])
+
+
+def test_gravacao_preserva_edicao_e_nao_recria_mensagem_apagada(fake_supabase):
+    editada, apagada = _seed(fake_supabase, 2)
+    worker = EmbeddingWorker(supabase_service, HashingEmbedder(dim=8))
+    batch = asyncio.run(supabase_service.get_mensagens_sem_embedding(10))
+
+    # Entre a leitura e a gravação: uma mensagem é editada e a outra apagada
+    asyncio.run(supabase_service.update_mensagem(editada["id"], {"conteudo_texto": "Texto corrigido"}))
+    asyncio.run(supabase_service.delete_mensagem(apagada["id"]))
+    asyncio.run(worker.process_batch(batch))
+
+    rows = fake_supabase.tables["mensagens"]
+    assert [row["id"] for row in rows] == [editada["id"]]
+    assert rows[0]["conteudo_texto"] == "Texto corrigido"
+    assert rows[0]["embedding_vetorial"] is not None
+
+
+def _rpc_update_embeddings(fake, payload):
+    rows = {row["id"]: row for row in fake.tables["mensagens"]}
+    updated = []
+    for item in payload["items"]:
+        if item["id"] in rows:
+            rows[item["id"]]["embedding_vetorial"] = item["embedding_vetorial"]
+            updated.append({"id": item["id"]})
+    return updated
+
+
+def test_worker_grava_cada_lote_numa_unica_rpc(fake_supabase):
+    _seed(fake_supabase, 10)
+    fake_supabase.register_rpc("update_mensagens_embeddings", _rpc_update_embeddings)
+    worker = EmbeddingWorker(supabase_service, HashingEmbedder(dim=8), batch_size=4, queue_size=8, poll_interval=0.01)
+
+    async def run():
+        await worker.start()
+        try:
+            await _wait_until(lambda: worker.embedded_total == 10)
+        finally:
+            await worker.stop()
+
+    fake_supabase.requests.clear()
+    asyncio.run(run())
+    assert all(row["embedding_vetorial"] for row in fake_supabase.tables["mensagens"])
+    assert fake_supabase.requests.count(("POST", "rpc/update_mensagens_embeddings")) == worker.batches_total
+    assert ("PATCH", "mensagens") not in fake_supabase.requests
+
+
+def test_falha_de_uma_linha_nao_derruba_o_lote(fake_supabase):
+    mensagens = _seed(fake_supabase, 4)
+    items = [
+        {"id": mensagem["id"], "conversa_id": mensagem["conversa_id"], "embedding_vetorial": [1.0, 0.0]}
+        for mensagem in mensagens
+    ]
+
+    async def run():
+        index = await supabase_service._load_vector_index()
+        await supabase_service.update_mensagens_embeddings(items[:1])  # descobre que não há RPC
+        fake_supabase.fail_next(1, status=400)
+        return index, await supabase_service.update_mensagens_embeddings(items[1:])
+
+    index, result = asyncio.run(run())
+    assert len(result.updated) == 2 and len(result.failed) == 1
+    assert result.error is not None
+    assert len(index) == 3  # só as linhas gravadas entram no índice local
+
+
+def test_worker_conta_so_as_linhas_que_falharam(fake_supabase, monkeypatch):
+    _seed(fake_supabase, 3)
+    worker = EmbeddingWorker(supabase_service, HashingEmbedder(dim=8), batch_size=8, poll_interval=0.01)
+    original = supabase_service.update_mensagens_embeddings
+
+    async def falha_uma_linha(items):
+        if worker.failed_total:
+            return await original(items)
+        result = await original(items[1:])
+        return result._replace(failed=[items[0]["id"]], error=RuntimeError("linha rejeitada"))
+
+    monkeypatch.setattr(supabase_service, "update_mensagens_embeddings", falha_uma_linha)
+
+    async def run():
+        await worker.start()
+        try:
+            await _wait_until(lambda: worker.embedded_total == 3)
+        finally:
+            await worker.stop()
+
+    asyncio.run(run())
+    assert worker.failed_total == 1
+    assert all(row["embedding_vetorial"] for row in fake_supabase.tables["mensagens"])
+
@@ -0,0 +1,50 @@
+# AI dev note: Testes de ETag e GET condicional
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.etag import compute_etag, etag_matches
+
+client = TestClient(app)
+API = "/api/v1/guido"
+
+
+def test_etag_matches():
+    etag = compute_etag({"id": "1", "updated_at": "2024-01-01T00:00:00+00:00"})
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"outro", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"outro"', etag)
+    assert compute_etag({"id": "1", "updated_at": "2024-01-02T00:00:00+00:00"}) != etag
+
+
+def test_cliente_304_usa_projecao_barata(fake_supabase):
+    cliente = fake_supabase.insert("clientes", {"conta_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10", "nome": "Ana"})[0]
+    url = f"{API}/clientes/{cliente['id']}"
+
+    primeira = client.get(url)
+    assert primeira.status_code == 200
+    etag = primeira.headers["etag"]
+
+    fake_supabase.requests.clear()
+    segunda = client.get(url, headers={"If-None-Match": etag})
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert segunda.headers["etag"] == etag
+    assert len(fake_supabase.requests) == 1
+
+    client.put(url, json={"nome": "Ana Maria"})
+    terceira = client.get(url, headers={"If-None-Match": etag})
+    assert terceira.status_code == 200
+    assert terceira.headers["etag"] != etag
+    assert terceira.json()["nome"] == "Ana Maria"
+
+
+def test_dossie_e_conta_com_etag(fake_supabase):
+    conta = fake_supabase.insert("contas", {"nome_conta": "A", "tipo_conta": "INDIVIDUAL", "documento": "1"})[0]
+    dossie = fake_supabase.insert("dossies_ia", {"cliente_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10"})[0]
+
+    for url in (f"{API}/contas/{conta['id']}", f"{API}/dossies-ia/cliente/{dossie['cliente_id']}"):
+        etag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"{API}/contas/nao-existe", headers={"If-None-Match": '"x"'}).status_code == 404
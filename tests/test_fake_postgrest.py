@@ -0,0 +1,172 @@
+# AI dev note: Testes de ponta a ponta dos endpoints contra o PostgREST em memória
+
+import asyncio
+
+import httpx
+import pytest
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.supabase_service import SupabaseService
+from app.testing import FakePostgrest
+
+client = TestClient(app)
+API = "/api/v1/guido"
+
+
+def _criar_conta(documento="12345678900"):
+    response = client.post(f"{API}/contas", json={
+        "nome_conta": "Imobiliária Teste", "tipo_conta": "IMOBILIARIA", "documento": documento,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_fluxo_completo(fake_supabase):
+    """AI dev note: Conta -> corretor -> cliente -> conversa -> mensagem -> lembrete -> dossiê"""
+    conta = _criar_conta()
+    corretor = client.post(f"{API}/corretores", json={
+        "conta_id": conta["id"], "nome": "Ana", "email": "ana@example.com",
+        "funcao": "DONO", "hash_senha": "x",
+    }).json()
+    assert "hash_senha" not in corretor
+
+    cliente = client.post(f"{API}/clientes", json={
+        "conta_id": conta["id"], "nome": "Bruno", "corretor_id": corretor["id"],
+    }).json()
+    conversa = client.post(f"{API}/conversas", json={
+        "cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": "AGUARDANDO_CORRETOR",
+    }).json()
+    mensagem = client.post(f"{API}/mensagens", json={
+        "conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": "Olá",
+    })
+    assert mensagem.status_code == 200, mensagem.text
+
+    lembrete = client.post(f"{API}/lembretes", json={
+        "corretor_id": corretor["id"], "descricao": "Ligar", "data_lembrete": "2024-05-01T10:00:00Z",
+        "status": "PENDENTE", "cliente_id": cliente["id"],
+    })
+    assert lembrete.status_code == 200, lembrete.text
+
+    for resumo in ("primeiro", "segundo"):
+        dossie = client.post(f"{API}/dossies-ia", json={"cliente_id": cliente["id"], "resumo_gerado": resumo})
+        assert dossie.status_code == 200, dossie.text
+    assert len(fake_supabase.tables["dossies_ia"]) == 1
+    assert client.get(f"{API}/dossies-ia/cliente/{cliente['id']}").json()["resumo_gerado"] == "segundo"
+
+    mensagens = client.get(f"{API}/mensagens/conversa/{conversa['id']}").json()
+    assert [m["conteudo_texto"] for m in mensagens["items"]] == ["Olá"]
+
+    assert client.delete(f"{API}/clientes/{cliente['id']}").status_code == 200
+    assert client.get(f"{API}/clientes/{cliente['id']}").status_code == 404
+
+
+def test_paginacao_keyset_percorre_todas_as_linhas(fake_supabase):
+    """AI dev note: Cursor do keyset retorna cada cliente exatamente uma vez"""
+    conta = _criar_conta()
+    fake_supabase.insert("clientes", [{"conta_id": conta["id"], "nome": f"C{i}"} for i in range(7)])
+
+    nomes, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"{API}/clientes/conta/{conta['id']}", params=params).json()
+        nomes.extend(item["nome"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(nomes) == sorted(f"C{i}" for i in range(7))
+    assert len(nomes) == 7
+
+
+def test_upsert_e_conflito_de_documento(fake_supabase):
+    """AI dev note: Upsert por documento reaproveita a linha; insert simples recebe 409"""
+    service = SupabaseService(transport=fake_supabase)
+    conta = {"nome_conta": "A", "tipo_conta": "INDIVIDUAL", "documento": "1"}
+
+    async def scenario():
+        primeira = await service.upsert_conta(conta)
+        segunda = await service.upsert_conta({**conta, "nome_conta": "B"})
+        assert primeira["id"] == segunda["id"] and segunda["nome_conta"] == "B"
+        with pytest.raises(httpx.HTTPStatusError) as exc:
+            await service.create_conta(conta)
+        assert exc.value.response.status_code == 409
+        await service.shutdown()
+
+    asyncio.run(scenario())
+    assert len(fake_supabase.tables["contas"]) == 1
+
+
+def test_export_ndjson(fake_supabase):
+    conta = _criar_conta()
+    fake_supabase.insert("clientes", [{"conta_id": conta["id"], "nome": f"C{i}"} for i in range(3)])
+    response = client.get(f"{API}/clientes/conta/{conta['id']}/export")
+    assert response.status_code == 200
+    assert len(response.text.strip().splitlines()) == 3
+
+
+def test_erro_injetado_vira_503(fake_supabase):
+    fake_supabase.fail_next(5, status=503)
+    response = client.get(f"{API}/contas")
+    assert response.status_code == 503
+
+
+def test_filtros_embedding_e_count():
+    """AI dev note: Filtros lógicos, embedding !inner e Content-Range exato"""
+    backend = FakePostgrest()
+    conta = backend.insert("contas", {"nome_conta": "A", "tipo_conta": "INDIVIDUAL", "documento": "1"})[0]
+    clientes = backend.insert("clientes", [
+        {"conta_id": conta["id"], "nome": "Ana"},
+        {"conta_id": conta["id"], "nome": "Bia", "status_funil": "NOVO"},
+    ])
+    backend.insert("conversas", {"cliente_id": clientes[1]["id"], "plataforma": "WHATSAPP",
+                                 "status_conversa": "AGUARDANDO_CORRETOR"})
+    service = SupabaseService(transport=backend)
+
+    async def scenario():
+        rows = await service._make_request("GET", "clientes", params=[
+            ("or", '(nome.eq."Ana",status_funil.is.null)'), ("order", "nome.desc"),
+        ])
+        assert [row["nome"] for row in rows] == ["Ana"]
+
+        rows = await service._make_request("GET", "conversas", params=[
+            ("select", "id,clientes!inner(nome,conta_id)"), ("clientes.conta_id", f"eq.{conta['id']}"),
+        ])
+        assert rows[0]["clientes"]["nome"] == "Bia"
+
+        rows = await service._make_request("GET", "clientes", params=[
+            ("select", "nome,conversas(status_conversa)"), ("order", "nome.asc"),
+        ])
+        assert [len(row["conversas"]) for row in rows] == [0, 1]
+
+        assert await service._count("clientes", [("conta_id", f"eq.{conta['id']}")], "exact") == 2
+        await service.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_delete_e_update_inexistentes_retornam_404(fake_supabase):
+    """AI dev note: Contagem do Content-Range faz os ramos 404 funcionarem"""
+    conta = _criar_conta()
+    assert client.delete(f"{API}/contas/{conta['id']}").status_code == 200
+    assert client.delete(f"{API}/contas/{conta['id']}").status_code == 404
+    assert client.put(f"{API}/contas/{conta['id']}", json={"nome_conta": "X"}).status_code == 404
+
+
+def test_modos_de_retorno_das_escritas(fake_supabase):
+    service = SupabaseService(transport=fake_supabase)
+    fake_supabase.insert("clientes", [{"conta_id": "c1", "nome": f"C{i}", "status_funil": "NOVO"} for i in range(3)])
+
+    async def scenario():
+        minimal = await service._update("clientes", [("conta_id", "eq.c1")], {"status_funil": "QUENTE"}, "minimal")
+        assert minimal.rows == [] and minimal.count == 3
+        full = await service._update("clientes", [("nome", "eq.C0")], {"status_funil": "FRIO"})
+        assert full.count == 1 and full.rows[0]["status_funil"] == "FRIO"
+        headers_only = await service._write("POST", "clientes", {"conta_id": "c1", "nome": "Novo"}, returning="headers-only")
+        assert headers_only.rows == [] and headers_only.location.startswith("/clientes?id=eq.")
+        assert await service._delete("clientes", [("conta_id", "eq.c1")]) == 4
+        assert await service._delete("clientes", [("conta_id", "eq.c1")]) == 0
+        await service.shutdown()
+
+    asyncio.run(scenario())
+    delete_request = [r for r in fake_supabase.requests if r[0] == "DELETE"]
+    assert len(delete_request) == 2
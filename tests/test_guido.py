@@ -0,0 +1,180 @@
+# AI dev note: Testes dos endpoints do sistema Guido
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.services.supabase_service import supabase_service, MENSAGEM_COLUMNS_SEM_EMBEDDING
+
+client = TestClient(app)
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat()
+
+
+def _mensagem(**extra):
+    return {
+        "id": str(uuid4()), "conversa_id": str(uuid4()), "remetente": "CLIENTE",
+        "conteudo_texto": "Olá", "timestamp": NOW, "created_at": NOW, "updated_at": NOW, **extra,
+    }
+
+
+def test_mensagens_conversa_exclui_embedding_por_padrao(monkeypatch):
+    """AI dev note: Listagem de mensagens projeta colunas sem embedding"""
+    selects = []
+
+    async def fake_page(conversa_id, limit, cursor=None, count=None, select=None):
+        selects.append(select)
+        row = _mensagem() if select else _mensagem(embedding_vetorial=[0.1, 0.2])
+        return {"items": [row], "next_cursor": None, "total_count": None}
+
+    monkeypatch.setattr(supabase_service, "get_mensagens_by_conversa_page", fake_page)
+
+    response = client.get("/api/v1/guido/mensagens/conversa/c1")
+    assert response.status_code == 200
+    assert "embedding_vetorial" not in response.json()["items"][0]
+
+    response = client.get("/api/v1/guido/mensagens/conversa/c1", params={"include_embedding": "true"})
+    assert response.json()["items"][0]["embedding_vetorial"] == [0.1, 0.2]
+    assert selects == [MENSAGEM_COLUMNS_SEM_EMBEDDING, None]
+
+
+def test_overview_cliente_em_paralelo_com_cauda_limitada(fake_supabase):
+    """AI dev note: Visão 360 agrega cinco consultas concorrentes em uma resposta"""
+    conta_id = str(uuid4())
+    cliente = fake_supabase.insert("clientes", {"conta_id": conta_id, "nome": "Ana"})[0]
+    antiga, recente = fake_supabase.insert("conversas", [
+        {"cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": "FINALIZADA",
+         "timestamp_ultima_mensagem": "2024-01-01T00:00:00+00:00"},
+        {"cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": "AGUARDANDO_CORRETOR",
+         "timestamp_ultima_mensagem": "2024-02-01T00:00:00+00:00"},
+    ])
+    fake_supabase.insert("mensagens", [
+        {"conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": f"{nome} {i}",
+         "timestamp": f"2024-0{mes}-01T00:00:{i:02d}+00:00"}
+        for conversa, nome, mes in ((antiga, "antiga", 1), (recente, "recente", 2)) for i in range(8)
+    ])
+    fake_supabase.insert("dossies_ia", {"cliente_id": cliente["id"], "resumo_gerado": "Busca 2 quartos"})
+    fake_supabase.insert("lembretes", {
+        "corretor_id": str(uuid4()), "cliente_id": cliente["id"], "descricao": "Ligar",
+        "data_lembrete": NOW, "status": "PENDENTE",
+    })
+    fake_supabase.latency = 0.05
+    fake_supabase.requests.clear()
+
+    started = datetime.now()
+    response = client.get(f"/api/v1/guido/clientes/{cliente['id']}/overview", params={"mensagens": 5})
+    elapsed = (datetime.now() - started).total_seconds()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["cliente"]["nome"] == "Ana"
+    assert [c["id"] for c in body["conversas"]] == [recente["id"], antiga["id"]]
+    assert body["ultima_conversa_id"] == recente["id"]
+    assert [m["conteudo_texto"] for m in body["mensagens_recentes"]] == [f"recente {i}" for i in range(3, 8)]
+    assert body["mais_mensagens"] is True
+    assert body["dossie"]["resumo_gerado"] == "Busca 2 quartos"
+    assert len(body["lembretes"]) == 1
+    assert body["mais_conversas"] is False
+    assert len(fake_supabase.requests) == 5
+    assert elapsed < 0.2  # sequencial levaria ≥ 0.25s
+
+
+def test_overview_limita_conversas_e_omite_lembretes_concluidos(fake_supabase, monkeypatch):
+    """AI dev note: Histórico longo não cresce a resposta; concluídos antigos não escondem os pendentes"""
+    monkeypatch.setattr(settings, "overview_conversas_limit", 2)
+    monkeypatch.setattr(settings, "overview_lembretes_limit", 2)
+    cliente = fake_supabase.insert("clientes", {"conta_id": str(uuid4()), "nome": "Ana"})[0]
+    fake_supabase.insert("conversas", [
+        {"cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": "FINALIZADA",
+         "timestamp_ultima_mensagem": f"2024-01-0{i}T00:00:00+00:00"}
+        for i in range(1, 4)
+    ])
+    corretor_id = str(uuid4())
+    fake_supabase.insert("lembretes", [
+        {"corretor_id": corretor_id, "cliente_id": cliente["id"], "descricao": descricao,
+         "data_lembrete": data, "status": status}
+        for descricao, data, status in (
+            ("velho 1", "2023-01-01T00:00:00+00:00", "CONCLUIDO"),
+            ("velho 2", "2023-01-02T00:00:00+00:00", "CONCLUIDO"),
+            ("próximo", "2099-01-01T00:00:00+00:00", "PENDENTE"),
+        )
+    ])
+
+    body = client.get(f"/api/v1/guido/clientes/{cliente['id']}/overview").json()
+    assert len(body["conversas"]) == 2 and body["mais_conversas"] is True
+    assert [lembrete["descricao"] for lembrete in body["lembretes"]] == ["próximo"]
+
+
+def test_overview_cliente_inexistente_404(fake_supabase):
+    response = client.get(f"/api/v1/guido/clientes/{uuid4()}/overview")
+    assert response.status_code == 404
+
+
+def test_inbox_prioriza_aguardando_corretor_e_pagina_por_cursor(fake_supabase):
+    """AI dev note: Inbox do corretor: prioridade, última mensagem embutida e keyset entre faixas"""
+    conta_id, corretor_id = str(uuid4()), str(uuid4())
+    ana, bia = fake_supabase.insert("clientes", [
+        {"conta_id": conta_id, "corretor_id": corretor_id, "nome": "Ana"},
+        {"conta_id": conta_id, "corretor_id": corretor_id, "nome": "Bia"},
+    ])
+    outro = fake_supabase.insert("clientes", {"conta_id": conta_id, "corretor_id": str(uuid4()), "nome": "Caio"})[0]
+
+    def conversa(cliente, status, ts):
+        return {"cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": status,
+                "timestamp_ultima_mensagem": ts}
+
+    rows = fake_supabase.insert("conversas", [
+        conversa(ana, "AGUARDANDO_CLIENTE", "2024-03-01T00:00:00+00:00"),
+        conversa(bia, "AGUARDANDO_CORRETOR", "2024-01-01T00:00:00+00:00"),
+        conversa(ana, "AGUARDANDO_CORRETOR", "2024-02-01T00:00:00+00:00"),
+        conversa(bia, "FINALIZADA", None),
+        conversa(outro, "AGUARDANDO_CORRETOR", "2024-04-01T00:00:00+00:00"),
+    ])
+    fake_supabase.insert("mensagens", [
+        {"conversa_id": rows[2]["id"], "remetente": "CLIENTE", "conteudo_texto": texto, "timestamp": ts}
+        for texto, ts in (("primeira", "2024-02-01T00:00:00+00:00"), ("última", "2024-02-01T00:00:05+00:00"))
+    ])
+
+    fake_supabase.requests.clear()
+    client.get("/api/v1/guido/conversas/inbox", params={"corretor_id": corretor_id, "limit": 1})
+    assert len(fake_supabase.requests) == 1  # a faixa prioritária completou a página
+
+    primeira = client.get("/api/v1/guido/conversas/inbox", params={"corretor_id": corretor_id, "limit": 2}).json()
+    assert [item["id"] for item in primeira["items"]] == [rows[2]["id"], rows[1]["id"]]
+    assert primeira["items"][0]["cliente"]["nome"] == "Ana"
+    assert primeira["items"][0]["ultima_mensagem"]["conteudo_texto"] == "última"
+    assert primeira["items"][1]["ultima_mensagem"] is None
+
+    segunda = client.get("/api/v1/guido/conversas/inbox", params={
+        "corretor_id": corretor_id, "limit": 2, "cursor": primeira["next_cursor"],
+    }).json()
+    assert [item["id"] for item in segunda["items"]] == [rows[0]["id"], rows[3]["id"]]
+    assert segunda["next_cursor"] is None
+
+    por_conta = client.get("/api/v1/guido/conversas/inbox", params={
+        "conta_id": conta_id, "status": ["AGUARDANDO_CORRETOR"],
+    }).json()
+    assert [item["cliente"]["nome"] for item in por_conta["items"]] == ["Caio", "Ana", "Bia"]
+
+    assert client.get("/api/v1/guido/conversas/inbox").status_code == 400
+
+
+def test_inbox_inclui_status_nulo_e_escapa_filtro(fake_supabase):
+    """AI dev note: Conversa sem status entra na segunda faixa; status com aspas não quebra o in.(...)"""
+    corretor_id = str(uuid4())
+    cliente = fake_supabase.insert("clientes", {"conta_id": str(uuid4()), "corretor_id": corretor_id, "nome": "Ana"})[0]
+    sem_status, com_aspas = fake_supabase.insert("conversas", [
+        {"cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": None},
+        {"cliente_id": cliente["id"], "plataforma": "WHATSAPP", "status_conversa": 'EM "TESTE"'},
+    ])
+
+    inbox = client.get("/api/v1/guido/conversas/inbox", params={"corretor_id": corretor_id}).json()
+    assert {item["id"] for item in inbox["items"]} == {sem_status["id"], com_aspas["id"]}
+
+    filtrada = client.get("/api/v1/guido/conversas/inbox", params={
+        "corretor_id": corretor_id, "status": ['EM "TESTE"', "FINALIZADA"],
+    })
+    assert filtrada.status_code == 200
+    assert [item["id"] for item in filtrada.json()["items"]] == [com_aspas["id"]]
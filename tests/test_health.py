@@ -37,4 +37,13 @@ def test_info_endpoint():
     assert "name" in data
     assert "version" in data
     assert "debug" in data
-    assert "api_version" in data 
\ No newline at end of file
+    assert "api_version" in data 
+
+def test_supabase_pool_stats_endpoint():
+    """AI dev note: Teste do endpoint de estatísticas do pool do Supabase"""
+    response = client.get("/api/v1/health/supabase")
+    assert response.status_code == 200
+    pool = response.json()["pool"]
+    assert pool["max_connections"] > 0
+    assert "active_connections" in pool
+    assert "idle_connections" in pool
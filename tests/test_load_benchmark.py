@@ -0,0 +1,24 @@
+# AI dev note: Testes do benchmark de carga (execução curta em processo)
+
+import asyncio
+
+from benchmarks.load_test import compare, in_process_client, parse_mix, run_load
+
+
+def test_run_load_em_processo(fake_supabase):
+    async def scenario():
+        async with in_process_client() as client:
+            return await run_load(client, parse_mix("signup=1,ingest=1,inbox=1"), concurrency=2, iterations=6, burst_size=5, seed=1)
+
+    result = asyncio.run(scenario())
+    assert result["errors"] == 0
+    assert result["requests"] > 0
+    assert all(route["p99_ms"] >= route["p50_ms"] for route in result["routes"].values())
+
+
+def test_compare_detecta_regressao():
+    baseline = {"throughput_rps": 100.0, "routes": {"GET /contas": {"p95_ms": 10.0, "p99_ms": 20.0}}}
+    atual = {"throughput_rps": 95.0, "routes": {"GET /contas": {"p95_ms": 12.5, "p99_ms": 21.0}}}
+    regressions = compare(atual, baseline, threshold=0.10)
+    assert len(regressions) == 1 and regressions[0].startswith("GET /contas: p95_ms")
+    assert compare(atual, baseline, threshold=0.30) == []
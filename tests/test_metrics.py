@@ -0,0 +1,52 @@
+# AI dev note: Testes do registro de métricas e do endpoint /metrics
+
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.metrics import Registry
+
+client = TestClient(app)
+
+
+def test_histograma_renderiza_buckets_acumulados():
+    registry = Registry()
+    histogram = registry.histogram("lat_seconds", "Latência", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("/x").observe(value)
+
+    text = registry.render()
+    assert 'lat_seconds_bucket{route="/x",le="0.1"} 2' in text
+    assert 'lat_seconds_bucket{route="/x",le="1"} 3' in text
+    assert 'lat_seconds_bucket{route="/x",le="+Inf"} 4' in text
+    assert 'lat_seconds_count{route="/x"} 4' in text
+
+
+def test_custo_de_gravacao_em_microssegundos():
+    """AI dev note: Gravar uma observação deve custar poucos microssegundos"""
+    histogram = Registry().histogram("h", "h", ("method", "route", "status"))
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        histogram.labels("GET", "/api/v1/guido/contas", "200").observe(0.003)
+    assert (time.perf_counter() - start) / n < 20e-6
+
+
+def test_endpoint_metrics_expoe_rotas_e_tabelas(fake_supabase):
+    fake_supabase.insert("contas", {"nome_conta": "A", "tipo_conta": "INDIVIDUAL", "documento": "1"})
+    assert client.get("/api/v1/guido/contas").status_code == 200
+    assert client.get(f"/api/v1/guido/contas/{uuid4()}").status_code == 404
+    # valor igual a um trecho fixo do path
+    assert client.get("/api/v1/guido/contas/guido").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'guido_http_request_duration_seconds_count{method="GET",route="/api/v1/guido/contas",status="200"}' in text
+    assert 'route="/api/v1/guido/contas/{conta_id}"' in text
+    assert "{conta_id}/contas" not in text
+    assert 'guido_supabase_request_duration_seconds_count{table="contas",method="GET"}' in text
+    assert "guido_supabase_pool_connections" in text
+    assert 'guido_cache_hits_total{cache="planos"}' in text
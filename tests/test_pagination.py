@@ -0,0 +1,70 @@
+# AI dev note: Testes da paginação por cursor (keyset)
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.supabase_service import SupabaseService, MENSAGENS_ORDER
+from app.utils.pagination import (
+    InvalidCursorError, decode_cursor, encode_cursor, keyset_filter,
+    parse_content_range_count, parse_content_range_total,
+)
+
+client = TestClient(app)
+
+
+def test_cursor_round_trip():
+    """AI dev note: Cursor codifica e decodifica os valores de ordenação"""
+    cursor = encode_cursor(["2024-01-01T10:00:00+00:00", "abc"])
+    assert decode_cursor(cursor, 2) == ["2024-01-01T10:00:00+00:00", "abc"]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 3)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("não-é-cursor", 2)
+
+
+def test_keyset_filter_and_content_range():
+    """AI dev note: Filtro keyset no formato or=(...) do PostgREST"""
+    expr = keyset_filter(MENSAGENS_ORDER, ["2024-01-01", "m1"])
+    assert expr == '(timestamp.gt."2024-01-01",and(timestamp.eq."2024-01-01",id.gt."m1"))'
+    assert keyset_filter((("ts", True),), [5]) == '(ts.lt."5")'
+    assert parse_content_range_total("0-24/3573") == 3573
+    assert parse_content_range_total("0-24/*") is None
+
+
+def test_service_page_uses_limit_plus_one_and_count():
+    """AI dev note: Página busca limit + 1 linhas e lê o total do Content-Range"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        rows = [{"id": f"m{i}", "timestamp": f"2024-01-0{i + 1}"} for i in range(3)]
+        return httpx.Response(200, json=rows, headers={"Content-Range": "0-2/10"})
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    page = asyncio.run(service.get_mensagens_by_conversa_page("c1", limit=2, count="exact"))
+
+    params = requests[0].url.params
+    assert params["conversa_id"] == "eq.c1"
+    assert params["order"] == "timestamp.asc,id.asc"
+    assert params["limit"] == "3"
+    assert requests[0].headers["prefer"] == "count=exact"
+    assert [row["id"] for row in page["items"]] == ["m0", "m1"]
+    assert page["total_count"] == 10
+    assert decode_cursor(page["next_cursor"], 2) == ["2024-01-02", "m1"]
+
+
+def test_invalid_cursor_returns_400():
+    """AI dev note: Cursor inválido vira 400 e não 500"""
+    response = client.get("/api/v1/guido/contas", params={"cursor": "lixo"})
+    assert response.status_code == 400
+
+
+def test_parse_content_range_count():
+    assert parse_content_range_count("0-2/3") == 3
+    assert parse_content_range_count("*/0") == 0
+    assert parse_content_range_count("0-4/*") == 5
+    assert parse_content_range_count("*/*") == 0
+    assert parse_content_range_count(None) is None
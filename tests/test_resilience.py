@@ -0,0 +1,108 @@
+# AI dev note: Testes da camada de resiliência do SupabaseService
+
+import asyncio
+
+import httpx
+import pytest
+from app.config import settings
+from app.services.supabase_service import SupabaseService
+from app.utils.resilience import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "supabase_retry_backoff_base", 0.001)
+    monkeypatch.setattr(settings, "supabase_retry_backoff_max", 0.002)
+
+
+def _service(statuses, calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status = statuses.pop(0) if statuses else 200
+        return httpx.Response(status, json=[{"id": "1"}])
+    return SupabaseService(transport=httpx.MockTransport(handler))
+
+
+def test_idempotent_get_is_retried_on_transient_errors():
+    """AI dev note: GET repete após 503/502 e devolve o sucesso"""
+    calls = []
+    service = _service([503, 502], calls)
+    assert asyncio.run(service.get_conta_by_id("1")) == {"id": "1"}
+    assert len(calls) == 3
+    assert service.get_resilience_stats()["retries_total"] == 2
+
+
+def test_post_is_not_retried():
+    """AI dev note: POST não idempotente falha na primeira resposta 503"""
+    calls = []
+    service = _service([503], calls)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service.create_conta({"nome_conta": "x"}))
+    assert len(calls) == 1
+
+
+def test_delete_is_retried_only_before_the_request_is_sent():
+    """AI dev note: DELETE repete falha de conexão, mas não uma resposta perdida após o envio"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("recusada", request=request)
+        if len(calls) == 2:
+            raise httpx.ReadError("conexão caiu", request=request)
+        return httpx.Response(204, headers={"content-range": "*/0"})
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    with pytest.raises(httpx.ReadError):
+        asyncio.run(service.delete_conta("1"))
+    assert len(calls) == 2
+
+
+def test_circuit_opens_and_fails_fast(monkeypatch):
+    """AI dev note: Após o limite de falhas o circuito abre sem chamar a rede"""
+    monkeypatch.setattr(settings, "supabase_circuit_failure_threshold", 2)
+    monkeypatch.setattr(settings, "supabase_retry_max_attempts", 1)
+    calls = []
+    service = _service([500, 500], calls)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await service.get_conta_by_id("1")
+        with pytest.raises(CircuitOpenError):
+            await service.get_conta_by_id("1")
+        # Outras tabelas têm circuito próprio
+        return await service.get_cliente_by_id("1")
+
+    assert asyncio.run(run()) == {"id": "1"}
+    assert len(calls) == 3
+    assert service.get_resilience_stats()["circuits"]["contas"]["state"] == "open"
+
+
+def test_circuit_half_open_probe():
+    """AI dev note: Meio-aberto deixa passar uma chamada de teste"""
+    breaker = CircuitBreaker("t", failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_hedged_get_returns_fastest_copy(monkeypatch):
+    """AI dev note: Segunda cópia do GET responde antes da primeira lenta"""
+    monkeypatch.setattr(settings, "supabase_hedge_enabled", True)
+    monkeypatch.setattr(settings, "supabase_hedge_delay_ms", 10)
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+            return httpx.Response(200, json=[{"id": "lento"}])
+        return httpx.Response(200, json=[{"id": "rapido"}])
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    assert asyncio.run(asyncio.wait_for(service.get_conta_by_id("1"), 0.5)) == {"id": "rapido"}
+    assert service.get_resilience_stats()["hedged_total"] == 1
@@ -0,0 +1,38 @@
+# AI dev note: Testes das respostas com validação única e encoder rápido
+
+import json
+from typing import List
+
+from app.schemas.guido import ContaResponse
+from app.schemas.pagination import PaginatedResponse
+from app.utils import responses
+from app.utils.responses import FastJSONResponse, model_response, type_adapter
+
+ROW = {
+    "id": "7d9f7b6e-1c1a-4f3e-9c3b-2f7e8a1d2c3b", "nome_conta": "Imobiliária", "tipo_conta": "INDIVIDUAL",
+    "documento": "1", "data_criacao": "2024-01-01T00:00:00+00:00",
+    "created_at": "2024-01-01T00:00:00+00:00", "updated_at": "2024-01-01T00:00:00+00:00",
+    "coluna_extra": "ignorada",
+}
+
+
+def test_model_response_equivale_ao_caminho_com_schema():
+    page = {"items": [ROW, ROW], "next_cursor": "abc", "total_count": None}
+    response = model_response(PaginatedResponse[ContaResponse], page)
+    assert response.media_type == "application/json"
+
+    esperado = PaginatedResponse[ContaResponse](
+        items=[ContaResponse(**row) for row in page["items"]], next_cursor="abc", total_count=None,
+    )
+    assert PaginatedResponse[ContaResponse].model_validate_json(response.body) == esperado
+    assert "coluna_extra" not in json.loads(response.body)["items"][0]
+
+
+def test_type_adapter_reaproveitado():
+    assert type_adapter(List[ContaResponse]) is type_adapter(List[ContaResponse])
+
+
+def test_fast_json_response_sem_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    body = FastJSONResponse(content={"nome": "São Paulo", 1: "x"}).body
+    assert json.loads(body) == {"nome": "São Paulo", "1": "x"}
@@ -0,0 +1,59 @@
+# AI dev note: Testes da exportação em streaming
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import httpx
+from app.schemas.guido import ContaResponse
+from app.services.supabase_service import SupabaseService
+from app.utils.streaming import stream_pages
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat()
+CONTAS = [
+    {
+        "id": str(uuid4()), "nome_conta": f"Conta {i}", "tipo_conta": "INDIVIDUAL",
+        "documento": str(i), "data_criacao": NOW, "created_at": NOW, "updated_at": NOW,
+    }
+    for i in range(5)
+]
+
+
+def _service(ranges):
+    def handler(request: httpx.Request) -> httpx.Response:
+        start, end = (int(v) for v in request.headers["range"].split("-"))
+        ranges.append((start, end))
+        return httpx.Response(200, json=CONTAS[start:end + 1])
+    return SupabaseService(transport=httpx.MockTransport(handler))
+
+
+async def _collect(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_ndjson_export_pages_with_range_header():
+    """AI dev note: Exportação percorre as páginas via Range e emite uma linha por item"""
+    ranges = []
+    service = _service(ranges)
+
+    async def run():
+        response = await stream_pages(service.iter_contas(page_size=2), ContaResponse, "ndjson")
+        return response, await _collect(response)
+
+    response, body = asyncio.run(run())
+    lines = body.decode().splitlines()
+    assert response.media_type == "application/x-ndjson"
+    assert [json.loads(line)["nome_conta"] for line in lines] == [f"Conta {i}" for i in range(5)]
+    assert ranges == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_json_array_export():
+    """AI dev note: Formato json concatena os blocos em um único array válido"""
+    service = _service([])
+
+    async def run():
+        response = await stream_pages(service.iter_contas(page_size=2), ContaResponse, "json")
+        return await _collect(response)
+
+    assert len(json.loads(asyncio.run(run()))) == 5
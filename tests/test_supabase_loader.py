@@ -0,0 +1,36 @@
+# AI dev note: Testes do carregador em lote por ID
+
+import asyncio
+
+import httpx
+from app.services.supabase_loader import SupabaseLoader
+from app.services.supabase_service import SupabaseService
+
+
+def test_loads_in_same_tick_become_one_query_per_table():
+    """AI dev note: N buscas por ID viram uma consulta id=in.(...) por tabela"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        ids = request.url.params["id"][len("in.("):-1].replace('"', "").split(",")
+        return httpx.Response(200, json=[{"id": row_id} for row_id in ids if row_id != "ausente"])
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    loader = SupabaseLoader(service)
+
+    async def run():
+        return await asyncio.gather(
+            loader.load_cliente("c1"),
+            loader.load_cliente("c2"),
+            loader.load_cliente("ausente"),
+            loader.load_conta("a1"),
+            loader.load_cliente("c1"),
+        )
+
+    c1, c2, ausente, a1, c1_again = asyncio.run(run())
+    assert c1 == {"id": "c1"} and c2 == {"id": "c2"} and a1 == {"id": "a1"}
+    assert ausente is None
+    assert c1_again is c1
+    assert sorted(str(call.url.path) for call in calls) == ["/rest/v1/clientes", "/rest/v1/contas"]
+    assert loader.batches == 2
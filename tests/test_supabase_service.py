@@ -0,0 +1,266 @@
+# AI dev note: Testes do SupabaseService
+# Usa httpx.MockTransport para não depender de um Supabase real
+
+import asyncio
+import json
+
+import httpx
+from app.services.supabase_service import SupabaseService
+from app.utils import deadline
+from app.utils.singleflight import SingleFlight
+
+
+def _mock_transport(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=[{"id": "1", "url": str(request.url)}])
+    return httpx.MockTransport(handler)
+
+
+def test_pooled_client_is_reused():
+    """AI dev note: Todas as chamadas usam o mesmo cliente do pool"""
+    calls = []
+    service = SupabaseService(transport=_mock_transport(calls))
+
+    async def run():
+        await service.startup()
+        client = service.client
+        await service.get_conta_by_id("1")
+        await service.get_cliente_by_id("2")
+        assert service.client is client
+        stats = service.get_pool_stats()
+        await service.shutdown()
+        return stats
+
+    stats = asyncio.run(run())
+    assert len(calls) == 2
+    assert str(calls[1].url) == "http://supabase.test/rest/v1/clientes?id=eq.2"
+    assert calls[0].headers["apikey"] == "test-key"
+    assert stats["requests_total"] == 2
+    assert stats["in_flight_requests"] == 0
+    assert stats["client_open"] is True
+    assert service.get_pool_stats()["client_open"] is False
+
+
+def test_planos_cache_read_through_and_invalidation():
+    """AI dev note: Planos vêm do cache até uma escrita invalidar"""
+    calls = []
+    planos = [
+        {"id": 1, "nome_plano": "Básico", "is_ativo": True},
+        {"id": 2, "nome_plano": "Antigo", "is_ativo": False},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json=planos)
+        return httpx.Response(200, json=[{"id": 1, "nome_plano": "Novo", "is_ativo": True}])
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+
+    async def run():
+        ativos = await service.get_planos_ativos()
+        plano = await service.get_plano_by_id(2)
+        assert len(calls) == 1
+        await service.update_plano(1, {"nome_plano": "Novo"})
+        await service.get_planos_ativos()
+        await service.shutdown()
+        return ativos, plano
+
+    ativos, plano = asyncio.run(run())
+    assert [p["id"] for p in ativos] == [1]
+    assert plano["nome_plano"] == "Antigo"
+    assert [r.method for r in calls] == ["GET", "PATCH", "GET"]
+    stats = service.get_cache_stats()["planos"]
+    assert stats["hits"] >= 1
+
+
+def test_mensagens_batch_chunks_and_updates_conversa_once():
+    """AI dev note: Lote insere em blocos e atualiza cada conversa uma vez"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.method == "PATCH":
+            return httpx.Response(204, headers={"content-range": "*/1"})
+        body = json.loads(request.content)
+        if any(item["conteudo_texto"] == "falha" for item in body):
+            return httpx.Response(400, json={"message": "erro"})
+        rows = [dict(item, id=f"m{item['conteudo_texto']}", timestamp=f"2024-01-01T00:00:0{item['conteudo_texto']}") for item in body]
+        return httpx.Response(201, json=rows)
+
+    items = [
+        {"conversa_id": "c1", "remetente": "CLIENTE", "conteudo_texto": "1"},
+        {"conversa_id": "c2", "remetente": "CLIENTE", "conteudo_texto": "2"},
+        {"conversa_id": "c1", "remetente": "CLIENTE", "conteudo_texto": "3"},
+        {"conversa_id": "c2", "remetente": "CLIENTE", "conteudo_texto": "falha"},
+        {"conversa_id": "c1", "remetente": "CLIENTE", "conteudo_texto": "5"},
+    ]
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    result = asyncio.run(service.create_mensagens_batch(items, chunk_size=2))
+
+    assert [r["sucesso"] for r in result["resultados"]] == [True, True, False, False, True]
+    assert [r["indice"] for r in result["resultados"]] == [0, 1, 2, 3, 4]
+    patches = {r.url.params["id"]: json.loads(r.content) for r in calls if r.method == "PATCH"}
+    assert patches == {
+        "eq.c1": {"timestamp_ultima_mensagem": "2024-01-01T00:00:05"},
+        "eq.c2": {"timestamp_ultima_mensagem": "2024-01-01T00:00:02"},
+    }
+    assert result["conversas_atualizadas"] == 2
+    assert [r.method for r in calls].count("POST") == 3
+
+
+def test_mensagens_batch_replay_does_not_move_conversa_backwards(fake_supabase):
+    """AI dev note: timestamp_ultima_mensagem só avança; circuito aberto vira falha por item"""
+    from app.services.supabase_service import supabase_service
+    from app.utils.resilience import CircuitOpenError
+
+    futuro = "2099-01-01T00:00:00+00:00"
+    conversa = fake_supabase.insert("conversas", {
+        "cliente_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10", "plataforma": "WHATSAPP",
+        "status_conversa": "AGUARDANDO_CORRETOR", "timestamp_ultima_mensagem": futuro,
+    })[0]
+    items = [{"conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": str(i)} for i in range(3)]
+    original = supabase_service._make_request
+    posts = []
+
+    async def circuito_abre_no_segundo_bloco(method, endpoint, *args, **kwargs):
+        if method == "POST":
+            posts.append(endpoint)
+            if len(posts) == 2:
+                raise CircuitOpenError("supabase", 30)
+        return await original(method, endpoint, *args, **kwargs)
+
+    supabase_service._make_request = circuito_abre_no_segundo_bloco
+    try:
+        result = asyncio.run(supabase_service.create_mensagens_batch(items, chunk_size=2))
+    finally:
+        del supabase_service._make_request
+
+    assert [r["sucesso"] for r in result["resultados"]] == [True, True, False]
+    assert "Circuito aberto" in result["resultados"][2]["erro"]
+    assert fake_supabase.tables["conversas"][0]["timestamp_ultima_mensagem"] == futuro
+    assert result["conversas_atualizadas"] == 0  # o PATCH não casou nenhuma linha
+
+
+def test_mensagens_batch_compares_timestamps_across_offsets(fake_supabase):
+    """AI dev note: A mensagem mais nova é escolhida pelo instante, não pela string"""
+    from app.services.supabase_service import supabase_service
+
+    conversa = fake_supabase.insert("conversas", {
+        "cliente_id": "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10", "plataforma": "WHATSAPP",
+        "status_conversa": "AGUARDANDO_CORRETOR",
+    })[0]
+    mais_nova = "2024-01-01T10:00:00-03:00"  # 13:00 UTC
+    items = [
+        {"conversa_id": conversa["id"], "remetente": "CLIENTE", "conteudo_texto": texto, "timestamp": ts}
+        for texto, ts in (("a", "2024-01-01T12:00:00.500000+00:00"), ("b", mais_nova))
+    ]
+
+    result = asyncio.run(supabase_service.create_mensagens_batch(items, chunk_size=10))
+    assert result["conversas_atualizadas"] == 1
+    assert fake_supabase.tables["conversas"][0]["timestamp_ultima_mensagem"] == mais_nova
+
+
+def test_create_or_update_dossie_is_a_single_upsert():
+    """AI dev note: Dossiê usa upsert nativo em um único round trip"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(201, json=[dict(json.loads(request.content), id="d1")])
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    result = asyncio.run(service.create_or_update_dossie({"cliente_id": "c1", "resumo_gerado": "ok"}))
+
+    assert result["id"] == "d1"
+    assert len(calls) == 1
+    assert calls[0].method == "POST"
+    assert calls[0].url.params["on_conflict"] == "cliente_id"
+    assert "resolution=merge-duplicates" in calls[0].headers["prefer"]
+
+
+def test_concurrent_identical_reads_are_coalesced():
+    """AI dev note: GETs idênticos concorrentes viram uma única chamada"""
+    calls = []
+    service = SupabaseService(transport=_mock_transport(calls))
+
+    async def run():
+        results = await asyncio.gather(*(service.get_cliente_by_id("c1") for _ in range(5)))
+        await service.get_conta_by_id("x")
+        return results
+
+    results = asyncio.run(run())
+    assert len(calls) == 2
+    assert all(result == results[0] for result in results)
+    assert results[0] is not results[1]
+    stats = service.get_singleflight_stats()
+    assert stats["coalesced"] == 4
+    assert stats["leaders"] == 2
+
+
+def test_coalesced_call_ignores_leader_deadline():
+    """AI dev note: O deadline curto de quem inicia a chamada não derruba quem espera mais"""
+    flight = SingleFlight()
+    seen = []
+
+    async def fetch():
+        seen.append(deadline.remaining())
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def caller(seconds):
+        with deadline.deadline_scope(seconds):
+            return await flight.do("k", fetch)
+
+    async def run():
+        leader = asyncio.create_task(caller(0.02))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(caller(5))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(run())
+    assert isinstance(leader, deadline.DeadlineExceeded)
+    assert follower == "ok"
+    assert seen == [None]
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+
+
+def test_get_by_ids_escapes_values():
+    """AI dev note: IDs com aspas ou barra invertida não quebram o filtro in.(...)"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=[])
+
+    service = SupabaseService(transport=httpx.MockTransport(handler))
+    asyncio.run(service.get_by_ids("clientes", ['a"b', "c\\d"]))
+    assert calls[0].url.params["id"] == 'in.("a\\"b","c\\\\d")'
+
+
+def test_ttl_cache_invalidate_during_load_discards_stale_value():
+    """AI dev note: Invalidação no meio de uma carga impede gravar o valor velho"""
+    from app.utils.cache import TTLCache
+
+    cache = TTLCache(ttl=60)
+    versions = iter(["velho", "novo"])
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_loader():
+            value = next(versions)
+            started.set()
+            await release.wait()
+            return value
+
+        load = asyncio.create_task(cache.get_or_load("planos", slow_loader))
+        await started.wait()
+        cache.invalidate("planos")  # escrita concluída enquanto a leitura antiga estava em voo
+        release.set()
+        first = await load
+        second = await cache.get_or_load("planos", slow_loader)
+        return first, second
+
+    assert asyncio.run(run()) == ("velho", "novo")
@@ -0,0 +1,53 @@
+# AI dev note: Testes de tracing (Server-Timing, traceparent e log amostrado)
+
+import json
+import logging
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.tracing import Trace
+
+client = TestClient(app)
+
+
+def _server_timing(response):
+    entries = {}
+    for part in response.headers["server-timing"].split(", "):
+        name, *fields = part.split(";")
+        entries[name] = dict(field.split("=", 1) for field in fields)
+    return entries
+
+
+def test_server_timing_separa_supabase_validacao_e_encode(fake_supabase):
+    fake_supabase.latency = 0.01
+    response = client.post("/api/v1/guido/contas", json={
+        "nome_conta": "A", "tipo_conta": "INDIVIDUAL", "documento": "1",
+    })
+    assert response.status_code == 200
+    timing = _server_timing(response)
+    assert {"supabase", "validate", "endpoint", "encode", "total"} <= set(timing)
+    assert float(timing["supabase"]["dur"]) >= 10
+    assert float(timing["total"]["dur"]) >= float(timing["endpoint"]["dur"])
+
+
+def test_traceparent_recebido_e_continuado_e_logado(fake_supabase, caplog):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    with caplog.at_level(logging.INFO, logger="app.tracing"):
+        response = client.get("/api/v1/guido/contas", headers={
+            "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01",
+        })
+    assert response.headers["traceparent"].startswith(f"00-{trace_id}-")
+    assert response.headers["traceparent"].endswith("-01")
+
+    log = json.loads(caplog.records[-1].getMessage())
+    assert log["trace_id"] == trace_id and log["parent_id"] == "00f067aa0ba902b7"
+    supabase = [span for span in log["spans"] if span["name"] == "supabase"]
+    endpoint = next(span for span in log["spans"] if span["name"] == "endpoint")
+    assert supabase and supabase[0]["parent_id"] == endpoint["span_id"]
+    assert supabase[0]["attrs"] == {"table": "contas", "method": "GET"}
+
+
+def test_amostragem_por_taxa():
+    assert Trace.from_traceparent(None, 0.1, rand=0.05).sampled
+    assert not Trace.from_traceparent(None, 0.1, rand=0.5).sampled
+    assert not Trace.from_traceparent("lixo", 0.0, rand=0.0).sampled
@@ -0,0 +1,159 @@
+# AI dev note: Testes da busca semântica (índice vetorial local e RPC do pgvector)
+
+import asyncio
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.supabase_service import supabase_service
+from app.utils.vector_index import VectorIndex
+
+client = TestClient(app)
+API = "/api/v1/guido"
+
+
+def test_indice_escopo_troca_e_remocao():
+    index = VectorIndex()
+    index.add("a", "c1", [1.0, 0.0])
+    index.add("b", "c1", [0.9, 0.1])
+    index.add("c", "c2", "[0.0, 1.0]")  # texto, como o pgvector devolve
+
+    assert [hit for hit, _ in index.search([1.0, 0.0], 2)] == ["a", "b"]
+    assert [hit for hit, _ in index.search([1.0, 0.0], 2, ["c2"])] == ["c"]
+    assert index.search([1.0, 0.0], 2, ["sem-mensagens"]) == []
+
+    index.add("a", "c2", [0.0, 1.0])
+    assert {hit for hit, _ in index.search([0.0, 1.0], 5, ["c2"])} == {"a", "c"}
+    assert index.remove("c") and not index.remove("c")
+    assert len(index) == 2
+    with pytest.raises(ValueError):
+        index.search([1.0, 0.0, 0.0], 1)
+
+
+def test_ivf_recall_contra_forca_bruta():
+    pytest.importorskip("numpy")
+    rng = random.Random(7)
+    centers = [[rng.gauss(0, 1) for _ in range(16)] for _ in range(32)]
+    index = VectorIndex(nprobe=8, ivf_min_size=1000)
+    for i in range(4000):
+        center = centers[i % len(centers)]
+        index.add(f"m{i}", "c1", [x + rng.gauss(0, 0.3) for x in center])
+    index.train()
+    assert index.uses_ivf
+
+    hits = total = 0
+    for _ in range(20):
+        query = [x + rng.gauss(0, 0.3) for x in rng.choice(centers)]
+        exact = {hit for hit, _ in index.search(query, 10, exact=True)}
+        approx = {hit for hit, _ in index.search(query, 10)}
+        hits += len(exact & approx)
+        total += len(exact)
+    assert hits / total >= 0.9
+
+
+def test_treino_do_ivf_roda_fora_do_event_loop():
+    pytest.importorskip("numpy")
+    rng = random.Random(3)
+    index = VectorIndex(nprobe=4, ivf_min_size=500)
+    for i in range(600):
+        index.add(f"m{i}", "c1", [rng.gauss(0, 1) for _ in range(8)])
+    index.mark_loaded()
+    alvo = [1.0] + [0.0] * 7
+
+    async def run():
+        assert index.schedule_training() and not index.schedule_training()
+        # Enquanto treina: busca exata e escritas continuam
+        assert index.search(alvo, 3) == index.search(alvo, 3, exact=True)
+        index.add("novo", "c2", alvo)
+        index.remove("m0")
+        await index.wait_training()
+
+    asyncio.run(run())
+    assert index.uses_ivf and not index.training
+    assert index.search(alvo, 1, ["c2"])[0][0] == "novo"
+    assert "m0" not in {hit for hit, _ in index.search(alvo, 600, exact=True)}
+    assert sum(len(members) for members in index._lists) == len(index)
+
+
+def test_benchmark_vector_search_smoke():
+    from benchmarks.vector_search import run
+
+    result = run(vectors=300, dim=8, queries=3, k=5)
+    assert result["brute_p50_ms"] >= 0
+    if result["numpy"]:
+        assert 0 <= result["recall_at_k"] <= 1
+
+
+def _seed(fake):
+    conta_id = "8c1f2a52-3b5d-4e1a-9f0e-0d6b7c8a9e10"
+    ana, bia = fake.insert("clientes", [{"conta_id": conta_id, "nome": "Ana"}, {"conta_id": conta_id, "nome": "Bia"}])
+    conversa_ana, conversa_bia = fake.insert("conversas", [
+        {"cliente_id": ana["id"], "plataforma": "WHATSAPP", "status_conversa": "AGUARDANDO_CORRETOR"},
+        {"cliente_id": bia["id"], "plataforma": "WHATSAPP", "status_conversa": "AGUARDANDO_CORRETOR"},
+    ])
+    mensagens = fake.insert("mensagens", [
+        {"conversa_id": conversa_ana["id"], "remetente": "CLIENTE", "conteudo_texto": "2 quartos",
+         "embedding_vetorial": [1.0, 0.0, 0.0]},
+        {"conversa_id": conversa_ana["id"], "remetente": "CLIENTE", "conteudo_texto": "garagem",
+         "embedding_vetorial": [0.0, 1.0, 0.0]},
+        {"conversa_id": conversa_ana["id"], "remetente": "CLIENTE", "conteudo_texto": "sem embedding"},
+        {"conversa_id": conversa_bia["id"], "remetente": "CLIENTE", "conteudo_texto": "3 quartos",
+         "embedding_vetorial": [0.99, 0.01, 0.0]},
+    ])
+    return conta_id, ana, mensagens
+
+
+def test_busca_sem_rpc_usa_indice_local_incremental(fake_supabase):
+    conta_id, ana, mensagens = _seed(fake_supabase)
+
+    response = client.post(f"{API}/mensagens/search", json={
+        "embedding": [1.0, 0.0, 0.0], "k": 5, "cliente_id": ana["id"],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["conteudo_texto"] for item in body] == ["2 quartos", "garagem"]
+    assert body[0]["similaridade"] == pytest.approx(1.0)
+    assert "embedding_vetorial" not in body[0]
+    assert body[0]["cliente"] == {"id": ana["id"], "nome": "Ana"}
+
+    por_conta = client.post(f"{API}/mensagens/search", json={
+        "embedding": [1.0, 0.0, 0.0], "k": 2, "conta_id": conta_id,
+    }).json()
+    assert [item["conteudo_texto"] for item in por_conta] == ["2 quartos", "3 quartos"]
+    assert [item["cliente"]["nome"] for item in por_conta] == ["Ana", "Bia"]
+
+    # Novo embedding entra no índice sem recarregar a tabela
+    asyncio.run(supabase_service.update_mensagem_embedding(mensagens[1]["id"], [1.0, 0.0, 0.0]))
+    fake_supabase.requests.clear()
+    body = client.post(f"{API}/mensagens/search", json={
+        "embedding": [1.0, 0.0, 0.0], "k": 5, "cliente_id": ana["id"],
+    }).json()
+    assert [item["similaridade"] for item in body] == pytest.approx([1.0, 1.0])
+    assert ("POST", "rpc/match_mensagens") not in fake_supabase.requests
+    # Escopo, linhas e uma consulta por tabela para os clientes de todos os resultados
+    assert fake_supabase.requests[2:] == [("GET", "conversas"), ("GET", "clientes")]
+    assert [method for method, _ in fake_supabase.requests] == ["GET"] * 4
+
+
+def test_busca_usa_rpc_quando_disponivel(fake_supabase):
+    _, ana, mensagens = _seed(fake_supabase)
+    chamadas = []
+
+    def match_mensagens(fake, payload):
+        chamadas.append(payload)
+        return [{**mensagens[0], "similaridade": 0.97}]
+
+    fake_supabase.register_rpc("match_mensagens", match_mensagens)
+    body = client.post(f"{API}/mensagens/search", json={
+        "embedding": [1.0, 0.0, 0.0], "k": 3, "cliente_id": ana["id"],
+    }).json()
+    assert [item["id"] for item in body] == [mensagens[0]["id"]]
+    assert chamadas[0]["match_count"] == 3 and chamadas[0]["filter_cliente_id"] == ana["id"]
+
+
+def test_busca_exige_um_escopo_e_dimensao_compativel(fake_supabase):
+    _, ana, _ = _seed(fake_supabase)
+    assert client.post(f"{API}/mensagens/search", json={"embedding": [1.0]}).status_code == 400
+    response = client.post(f"{API}/mensagens/search", json={"embedding": [1.0, 0.0], "cliente_id": ana["id"]})
+    assert response.status_code == 400